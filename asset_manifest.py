@@ -0,0 +1,146 @@
+"""
+Content-hashed, immutable copies of the data files, and the manifest that
+maps each file to its current copy.
+
+Every JSON file under public/data (parasha files, shard indexes, shards and
+manifest.json) gets a copy named after its content in immutable/:
+
+    parashot/naso.json           -> immutable/parashot/naso.3fa9c1d27b.json
+    parashot/naso/aliyot-1.json  -> immutable/parashot/naso/aliyot-1.8e02b4c1f9.json
+
+(hard links, so they cost no space; precompressed siblings are linked too).
+A hashed name never changes content, so the host can serve immutable/ with
+`Cache-Control: public, max-age=31536000, immutable` and a client only
+downloads the files whose content changed. assets.json is the one file that
+must be revalidated:
+
+    {"version": "...", "files": {"parashot/naso.json": {"path": "immutable/parashot/naso.3fa9c1d27b.json", "size": 48213}, ...}}
+
+Copies referenced by the previous assets.json are kept for one more build,
+so clients still holding it can finish loading.
+
+    python asset_manifest.py public/data
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import data_release
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_FILE = "assets.json"
+IMMUTABLE_DIR = "immutable"
+HASH_LENGTH = 10
+# Precompressed siblings written by precompress.py
+SIBLING_SUFFIXES = (".gz", ".br")
+# Describe the tree rather than belong to it
+UNHASHED_FILES = {ASSETS_FILE, "release.json"}
+
+
+def hashed_name(relative, digest):
+    """'parashot/naso.json' -> 'immutable/parashot/naso.<hash>.json'."""
+    stem, extension = os.path.splitext(relative)
+    return f"{IMMUTABLE_DIR}/{stem}.{digest[:HASH_LENGTH]}{extension}"
+
+
+def read_assets(directory):
+    try:
+        with open(os.path.join(directory, ASSETS_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def source_files(directory):
+    """Relative paths of the JSON files to hash (not immutable/ and not the manifests)."""
+    found = []
+    for root, dirs, names in os.walk(directory):
+        if root == directory and IMMUTABLE_DIR in dirs:
+            dirs.remove(IMMUTABLE_DIR)
+        dirs.sort()
+        for name in sorted(names):
+            relative = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+            if name.endswith(".json") and relative not in UNHASHED_FILES:
+                found.append(relative)
+    return found
+
+
+def _link(source, target):
+    if os.path.exists(target):
+        # Same name, same content
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f"{target}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def build(directory, version=None):
+    """
+    Links a hashed copy of every source file into immutable/, writes
+    assets.json and removes the copies neither it nor the previous
+    assets.json refers to. Returns the new manifest.
+    """
+    previous = read_assets(directory) or {"files": {}}
+    files = {}
+    for relative in source_files(directory):
+        source = os.path.join(directory, relative)
+        with open(source, 'rb') as f:
+            data = f.read()
+        hashed = hashed_name(relative, hashlib.sha256(data).hexdigest())
+        _link(source, os.path.join(directory, hashed))
+        for suffix in SIBLING_SUFFIXES:
+            # Only siblings at least as new as their file (see precompress.compress_file)
+            sibling = source + suffix
+            if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(source):
+                _link(sibling, os.path.join(directory, hashed + suffix))
+        files[relative] = {"path": hashed, "size": len(data)}
+
+    assets = {"version": version, "files": files}
+    path = os.path.join(directory, ASSETS_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(assets, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+    keep = {entry['path'] for entry in files.values()} | {entry['path'] for entry in previous['files'].values()}
+    prune(directory, keep)
+    return assets
+
+
+def prune(directory, keep):
+    """Removes immutable/ files (and their siblings) whose path is not in `keep`."""
+    removed = 0
+    immutable = os.path.join(directory, IMMUTABLE_DIR)
+    for root, dirs, names in os.walk(immutable, topdown=False):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+            for suffix in SIBLING_SUFFIXES:
+                if relative.endswith(suffix):
+                    relative = relative[:-len(suffix)]
+            if relative not in keep:
+                os.remove(os.path.join(root, name))
+                removed += 1
+        if root != immutable and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="(Re)write the hashed copies and assets.json of a data directory.")
+    parser.add_argument("directory", nargs="?", default=os.path.join(BASE_DIR, "public", "data"))
+    args = parser.parse_args(argv)
+
+    release = data_release.read_release(args.directory)
+    assets = build(args.directory, release and release['version'])
+    total = sum(entry['size'] for entry in assets['files'].values())
+    print(f"{ASSETS_FILE}: {len(assets['files'])} files, {total:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE_FILE = os.path.join(BASE_DIR, ".cache", "build_state.json")
+
+
+def stable_hash(obj):
+    """sha256 of a JSON-serializable value, independent of key order."""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class BuildState:
+    """
+    Records, per parasha, the hash of everything its output depends on:
+    `inputs` (refs, override and haftara entries, transform code version)
+    and `upstream` (the Sefaria payloads). A parasha is rebuilt only when
+    one of them changed or its output file is missing or was edited.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('parashot', {})
+
+    def is_up_to_date(self, parasha_id, inputs, upstream, output_path):
+        with self.lock:
+            entry = self.entries.get(parasha_id)
+        if not entry:
+            return False
+        if entry.get('inputs') != inputs or entry.get('upstream') != upstream:
+            return False
+        return file_hash(output_path) == entry.get('output')
+
+    def record(self, parasha_id, inputs, upstream, output_path):
+        entry = {
+            "inputs": inputs,
+            "upstream": upstream,
+            "output": file_hash(output_path),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with self.lock:
+            self.entries[parasha_id] = entry
+
+    def save(self):
+        with self.lock:
+            data = {"parashot": dict(sorted(self.entries.items()))}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,295 @@
+"""
+SQLite corpus database: every verse, aliyah, Maftir, Yemenite override and
+haftara of the generated parashot in one indexed file.
+
+    verses          one row per (book, chapter, verse); all texts
+    parashot        parasha metadata
+    readings        one row per aliyah / Maftir / haftara of a parasha;
+                    `list` is aliyot, aliyot_yemenite, haftara or haftara_yemenite
+    reading_verses  the verses of a reading, in order, with their verse_num
+
+    python corpus_db.py build public/data/parashot/*.json
+    python corpus_db.py query "Numbers 17:9"
+    python corpus_db.py query "Numbers 16:1-16:13"
+"""
+import os
+import json
+import sqlite3
+import argparse
+import parasha_schema
+from sefaria_refs import parse_ref
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, "build", "corpus.db")
+
+SCHEMA = """
+CREATE TABLE parashot (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    hebrew TEXT,
+    ref TEXT NOT NULL,
+    book TEXT NOT NULL,
+    ref_yemenite TEXT,
+    is_override INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE verses (
+    id INTEGER PRIMARY KEY,
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    standard_full TEXT NOT NULL,
+    standard_clean TEXT NOT NULL,
+    yemenite_full TEXT NOT NULL,
+    yemenite_clean TEXT NOT NULL,
+    targum TEXT NOT NULL
+);
+CREATE TABLE readings (
+    id INTEGER PRIMARY KEY,
+    parasha_id TEXT NOT NULL REFERENCES parashot(id),
+    list TEXT NOT NULL,
+    aliyah_num INTEGER NOT NULL,
+    range TEXT NOT NULL
+);
+CREATE TABLE reading_verses (
+    reading_id INTEGER NOT NULL REFERENCES readings(id),
+    position INTEGER NOT NULL,
+    verse_id INTEGER NOT NULL REFERENCES verses(id),
+    verse_num INTEGER NOT NULL,
+    PRIMARY KEY (reading_id, position)
+) WITHOUT ROWID;
+"""
+
+# Created after the bulk load: building an index once is cheaper than
+# maintaining it row by row.
+INDEXES = """
+CREATE UNIQUE INDEX idx_verses_ref ON verses (book, chapter, verse);
+CREATE INDEX idx_readings_aliyah ON readings (parasha_id, aliyah_num);
+CREATE INDEX idx_reading_verses_verse ON reading_verses (verse_id);
+"""
+
+VERSE_COLUMNS = "v.book, v.chapter, v.verse, v.standard_full, v.standard_clean, v.yemenite_full, v.yemenite_clean, v.targum"
+
+
+# --- Building ---
+
+def _verse_key(book, verse):
+    return (book, verse['chapter'], verse['verse'])
+
+
+def collect_rows(parashot):
+    """Schema 1 parasha dicts -> row lists for every table."""
+    parasha_rows = []
+    verse_ids = {}
+    verse_rows = []
+    reading_rows = []
+    reading_verse_rows = []
+
+    def verse_id(book, verse):
+        key = _verse_key(book, verse)
+        existing = verse_ids.get(key)
+        if existing is not None:
+            return existing
+        new_id = verse_ids[key] = len(verse_rows) + 1
+        standard = verse['versions']['standard']
+        yemenite = verse['versions']['yemenite']
+        verse_rows.append((
+            new_id, book, verse['chapter'], verse['verse'],
+            standard['text_full'], standard['text_clean'],
+            yemenite['text_full'], yemenite['text_clean'], verse['targum']
+        ))
+        return new_id
+
+    def add_reading(parasha_id, list_name, reading, book):
+        reading_id = len(reading_rows) + 1
+        reading_rows.append((reading_id, parasha_id, list_name, reading['num'], reading['range']))
+        for position, verse in enumerate(reading['verses']):
+            reading_verse_rows.append((reading_id, position, verse_id(book, verse), verse['verse_num']))
+
+    for data in parashot:
+        torah_book = parse_ref(data['ref']).book
+        parasha_rows.append((
+            data['id'], data['name'], data.get('hebrew'), data['ref'], torah_book,
+            data.get('ref_yemenite'), int(bool(data.get('is_override')))
+        ))
+        for list_name in parasha_schema.ALIYAH_LISTS:
+            for reading in data.get(list_name, []):
+                add_reading(data['id'], list_name, reading, torah_book)
+        for list_name in parasha_schema.SINGLE_ALIYOT:
+            if list_name in data:
+                reading = data[list_name]
+                add_reading(data['id'], list_name, reading, parse_ref(reading['range']).book)
+
+    return parasha_rows, verse_rows, reading_rows, reading_verse_rows
+
+
+def build(parashot, path=DEFAULT_DB_PATH):
+    """
+    Writes a fresh database at `path` from schema 1 parasha dicts. Built in a
+    temp file in WAL mode with executemany inside one transaction, then
+    swapped in, so readers never see a half-built database.
+    """
+    parasha_rows, verse_rows, reading_rows, reading_verse_rows = collect_rows(parashot)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany("INSERT INTO parashot VALUES (?, ?, ?, ?, ?, ?, ?)", parasha_rows)
+            conn.executemany("INSERT INTO verses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", verse_rows)
+            conn.executemany("INSERT INTO readings VALUES (?, ?, ?, ?, ?)", reading_rows)
+            conn.executemany("INSERT INTO reading_verses VALUES (?, ?, ?, ?)", reading_verse_rows)
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        # Ship it in rollback-journal mode: readers then need no -wal/-shm
+        # files and can open it on a read-only filesystem.
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return {
+        "parashot": len(parasha_rows),
+        "verses": len(verse_rows),
+        "readings": len(reading_rows)
+    }
+
+
+def load_parasha_files(paths):
+    """Reads parasha JSON files (any schema); skips formats without aliyot."""
+    parashot = []
+    for filepath in paths:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = parasha_schema.decode(data)
+            if isinstance(data.get('aliyot'), list):
+                parashot.append(data)
+    return parashot
+
+
+# --- Queries ---
+
+def _verse_dict(row):
+    book, chapter, verse, std_full, std_clean, yem_full, yem_clean, targum = row[:8]
+    return {
+        "book": book,
+        "chapter": chapter,
+        "verse": verse,
+        "versions": {
+            "standard": {"text_full": std_full, "text_clean": std_clean},
+            "yemenite": {"text_full": yem_full, "text_clean": yem_clean}
+        },
+        "targum": targum
+    }
+
+
+class CorpusDB:
+    """
+    Read-only query API over a built database.
+
+        with CorpusDB() as db:
+            db.verse("Numbers", 17, 9)
+            db.range("Numbers 16:1-16:13")
+            db.aliyah("parashat-korach", 4, nusach="yemenite")
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No corpus database at {path} (build it with --corpus-db)")
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def verse(self, book, chapter, verse):
+        row = self.conn.execute(
+            f"SELECT {VERSE_COLUMNS} FROM verses v WHERE v.book = ? AND v.chapter = ? AND v.verse = ?",
+            (book, chapter, verse)
+        ).fetchone()
+        return _verse_dict(row) if row else None
+
+    def verse_range(self, book, start_chapter, start_verse, end_chapter, end_verse):
+        """Verses from start to end (inclusive), in order; a verse of None means whole chapter."""
+        rows = self.conn.execute(
+            f"SELECT {VERSE_COLUMNS} FROM verses v WHERE v.book = ? "
+            "AND (v.chapter, v.verse) >= (?, ?) AND (v.chapter, v.verse) <= (?, ?) "
+            "ORDER BY v.chapter, v.verse",
+            (book, start_chapter, start_verse or 0, end_chapter, end_verse if end_verse is not None else 1 << 30)
+        ).fetchall()
+        return [_verse_dict(row) for row in rows]
+
+    def range(self, ref):
+        """Verses of a Sefaria-style ref: 'Numbers 17:9', 'Numbers 16:1-18:32', 'Numbers 16'."""
+        return self.verse_range(*parse_ref(ref))
+
+    def aliyah(self, parasha_id, num, nusach="standard"):
+        """
+        Verses of aliyah `num` (8 = Maftir) with their verse_num. For
+        nusach="yemenite" the override breaks are used where they exist.
+        """
+        lists = ["aliyot_yemenite", "aliyot"] if nusach == "yemenite" else ["aliyot"]
+        for list_name in lists:
+            rows = self.conn.execute(
+                f"SELECT {VERSE_COLUMNS}, rv.verse_num FROM readings r "
+                "JOIN reading_verses rv ON rv.reading_id = r.id "
+                "JOIN verses v ON v.id = rv.verse_id "
+                "WHERE r.parasha_id = ? AND r.aliyah_num = ? AND r.list = ? "
+                "ORDER BY rv.position",
+                (parasha_id, num, list_name)
+            ).fetchall()
+            if rows:
+                return [dict(_verse_dict(row), verse_num=row[8]) for row in rows]
+        return []
+
+    def parashot_for(self, book, chapter, verse):
+        """(parasha_id, list, aliyah_num) of every reading containing a verse."""
+        return self.conn.execute(
+            "SELECT DISTINCT r.parasha_id, r.list, r.aliyah_num FROM verses v "
+            "JOIN reading_verses rv ON rv.verse_id = v.id "
+            "JOIN readings r ON r.id = rv.reading_id "
+            "WHERE v.book = ? AND v.chapter = ? AND v.verse = ? "
+            "ORDER BY r.parasha_id, r.list, r.aliyah_num",
+            (book, chapter, verse)
+        ).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the SQLite corpus database.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Database path (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Build from parasha JSON files")
+    build_parser.add_argument("files", nargs="+")
+    query_parser = commands.add_parser("query", help="Print the verses of a ref")
+    query_parser.add_argument("ref")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        counts = build(load_parasha_files(args.files), args.db)
+        print(f"Corpus DB: {counts['parashot']} parashot, {counts['verses']} verses, "
+              f"{counts['readings']} readings -> {args.db}")
+    else:
+        with CorpusDB(args.db) as db:
+            for verse in db.range(args.ref):
+                print(f"{verse['book']} {verse['chapter']}:{verse['verse']}  {verse['versions']['standard']['text_full']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Versioned, crash-safe publication of the generated data directory.
+
+A build never writes into public/data directly. It works in a staged copy:
+
+    stage()    build/releases/<version>.staging, seeded with hard links to the
+               live files (so unchanged parashot cost nothing and incremental
+               builds still see them)
+    finish()   writes release.json: the version and the sha256 and size of every file
+    publish()  verifies the checksums, moves the live directory to
+               build/releases/<its version> and renames the staged one into place
+
+Every writer in the ETL replaces files (temp file + rename) instead of
+rewriting them, so the hard links never leak changes into the live tree. An
+interrupted build leaves the live directory untouched; recover() removes its
+leftovers (publishing a build that had already written its release.json)
+and, should a crash land between the two renames of publish(), puts the
+newest complete release back. The last KEEP_RELEASES previous
+releases are kept for `python data_release.py rollback`.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LIVE_DIR = os.path.join(BASE_DIR, "public", "data")
+# Must be on the same filesystem as LIVE_DIR (rename and hard links)
+RELEASES_DIR = os.path.join(BASE_DIR, "build", "releases")
+RELEASE_FILE = "release.json"
+STAGING_SUFFIX = ".staging"
+KEEP_RELEASES = 3
+
+
+def new_version():
+    return time.strftime("%Y%m%dT%H%M%S")
+
+
+def read_release(directory):
+    """The release.json of a directory, or None if it has none (incomplete or unversioned)."""
+    try:
+        with open(os.path.join(directory, RELEASE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _link_tree(source, target):
+    for root, dirs, files in os.walk(source):
+        relative = os.path.relpath(root, source)
+        os.makedirs(os.path.join(target, relative), exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target, relative, name)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+
+# --- Building ---
+
+def stage(live_dir=LIVE_DIR, releases_dir=RELEASES_DIR):
+    """Creates a staged copy of the live directory and returns (version, path)."""
+    os.makedirs(releases_dir, exist_ok=True)
+    live = read_release(live_dir)
+    taken = set(os.listdir(releases_dir)) | {live['version'] if live else None}
+    # Two builds within a second get distinct versions
+    version = base = new_version()
+    suffix = 1
+    while version in taken or version + STAGING_SUFFIX in taken:
+        suffix += 1
+        version = f"{base}-{suffix}"
+    staged = os.path.join(releases_dir, version + STAGING_SUFFIX)
+    if os.path.isdir(live_dir):
+        _link_tree(live_dir, staged)
+    else:
+        os.makedirs(staged)
+    # The previous release.json describes the old tree, not this one
+    if os.path.exists(os.path.join(staged, RELEASE_FILE)):
+        os.remove(os.path.join(staged, RELEASE_FILE))
+    return version, staged
+
+
+def file_checksums(directory):
+    """{relative path: {"sha256", "size"}} of every file but release.json and temp files."""
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith(".tmp") or name.startswith(".tmp-"):
+                continue
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            if relative == RELEASE_FILE:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            files[relative] = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+    return files
+
+
+def finish(staged, version):
+    """Writes release.json into the staged directory; marks it complete."""
+    release = {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": file_checksums(staged)
+    }
+    path = os.path.join(staged, RELEASE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(release, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return release
+
+
+def verify(directory):
+    """Files that are missing, unlisted or differ from release.json (empty = intact)."""
+    release = read_release(directory)
+    if release is None:
+        return [RELEASE_FILE]
+    expected = release['files']
+    actual = file_checksums(directory)
+    return sorted(path for path in set(expected) | set(actual) if expected.get(path) != actual.get(path))
+
+
+# --- Publishing ---
+
+def _swap_in(directory, live_dir, releases_dir):
+    """Moves the live directory into releases_dir, then `directory` into its place."""
+    if os.path.isdir(live_dir):
+        current = read_release(live_dir)
+        retired = os.path.join(releases_dir, current['version'] if current else f"unversioned-{new_version()}")
+        if os.path.exists(retired):
+            shutil.rmtree(retired)
+        os.rename(live_dir, retired)
+    os.rename(directory, live_dir)
+
+
+def publish(staged, live_dir=LIVE_DIR, releases_dir=RELEASES_DIR, keep=KEEP_RELEASES):
+    """Swaps a finished staged directory in as the live one. Returns its version."""
+    problems = verify(staged)
+    if problems:
+        raise ValueError(f"Not publishing {staged}: {len(problems)} files fail their checksum ({problems[0]}, ...)")
+    version = read_release(staged)['version']
+    _swap_in(staged, live_dir, releases_dir)
+    prune(releases_dir, keep)
+    return version
+
+
+def releases(releases_dir=RELEASES_DIR):
+    """Versions of the complete previous releases, newest first."""
+    if not os.path.isdir(releases_dir):
+        return []
+    found = [name for name in os.listdir(releases_dir)
+             if not name.endswith(STAGING_SUFFIX) and read_release(os.path.join(releases_dir, name))]
+    return sorted(found, reverse=True)
+
+
+def prune(releases_dir=RELEASES_DIR, keep=KEEP_RELEASES):
+    for version in releases(releases_dir)[keep:]:
+        shutil.rmtree(os.path.join(releases_dir, version))
+
+
+def recover(live_dir=LIVE_DIR, releases_dir=RELEASES_DIR):
+    """
+    Cleans up after an interrupted build. Returns a description of what
+    was repaired, or None.
+
+    A live directory without release.json (e.g. an empty one) counts as
+    missing. A staging directory whose release.json was written is a
+    finished build: it is published if it is newer than the live release,
+    never deleted unchecked.
+    """
+    repaired = None
+    if read_release(live_dir) is None:
+        # Crashed between the two renames: the newest complete tree is either
+        # the finished staging directory or the release that was just retired.
+        candidates = []
+        if os.path.isdir(releases_dir):
+            for name in os.listdir(releases_dir):
+                release = read_release(os.path.join(releases_dir, name))
+                if release and not (name.endswith(STAGING_SUFFIX) and verify(os.path.join(releases_dir, name))):
+                    candidates.append((release['version'], name))
+        if candidates:
+            _, name = max(candidates)
+            if os.path.isdir(live_dir) and not os.listdir(live_dir):
+                os.rmdir(live_dir)
+            # An unversioned tree that is not empty is retired, not deleted
+            _swap_in(os.path.join(releases_dir, name), live_dir, releases_dir)
+            repaired = f"restored {live_dir} from {name}"
+
+    if os.path.isdir(releases_dir):
+        live = read_release(live_dir)
+        for name in sorted(os.listdir(releases_dir), reverse=True):
+            if not name.endswith(STAGING_SUFFIX):
+                continue
+            path = os.path.join(releases_dir, name)
+            release = read_release(path)
+            if release and not verify(path) and (live is None or release['version'] > live['version']):
+                publish(path, live_dir, releases_dir)
+                live = release
+                repaired = repaired or f"published the finished build {name}"
+            else:
+                shutil.rmtree(path)
+                repaired = repaired or f"removed the unfinished build {name}"
+    return repaired
+
+
+def rollback(version=None, live_dir=LIVE_DIR, releases_dir=RELEASES_DIR):
+    """Makes a previous release (default: the newest) live again; the current one is kept."""
+    available = releases(releases_dir)
+    if not available:
+        raise ValueError(f"No previous releases in {releases_dir}")
+    version = version or available[0]
+    if version not in available:
+        raise ValueError(f"Unknown release {version} (have: {', '.join(available)})")
+    _swap_in(os.path.join(releases_dir, version), live_dir, releases_dir)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, verify or roll back published data releases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show the live and previous releases")
+    commands.add_parser("verify", help="Check the live files against release.json")
+    rollback_parser = commands.add_parser("rollback", help="Make a previous release live again")
+    rollback_parser.add_argument("version", nargs="?")
+    commands.add_parser("checksum", help="(Re)write release.json for the live directory as it is")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        live = read_release(LIVE_DIR)
+        print(f"live: {live['version'] if live else '(unversioned)'}")
+        for version in releases():
+            print(f"      {version}")
+    elif args.command == "verify":
+        problems = verify(LIVE_DIR)
+        for path in problems:
+            print(f"  mismatch: {path}")
+        print(f"{len(problems)} problems" if problems else "OK")
+        return 1 if problems else 0
+    elif args.command == "rollback":
+        print(f"Live release is now {rollback(args.version)}")
+    else:
+        live = read_release(LIVE_DIR)
+        release = finish(LIVE_DIR, live['version'] if live else new_version())
+        print(f"release.json: {len(release['files'])} files, version {release['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
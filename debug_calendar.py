@@ -1,7 +1,10 @@
+import os
 import requests
 import json
 
-url = "https://www.sefaria.org/api/calendars?timezone=Asia/Jerusalem"
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
+url = f"{SEFARIA_API_BASE}/calendars?timezone=Asia/Jerusalem"
 resp = requests.get(url)
 data = resp.json()
 
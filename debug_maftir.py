@@ -1,7 +1,10 @@
+import os
 import requests
 import json
 
-url = "https://www.sefaria.org/api/texts/Maftir_Bereshit?context=0"
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
+url = f"{SEFARIA_API_BASE}/texts/Maftir_Bereshit?context=0"
 try:
     resp = requests.get(url)
     print(json.dumps(resp.json(), indent=2))
@@ -1,7 +1,10 @@
+import os
 import requests
 import json
 
-url = "https://www.sefaria.org/api/v2/index/Genesis"
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
+url = f"{SEFARIA_API_BASE}/v2/index/Genesis"
 resp = requests.get(url)
 data = resp.json()
 
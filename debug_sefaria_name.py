@@ -1,8 +1,11 @@
+import os
 import requests
 import json
 
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
 # Try to get info about the term "Bereshit" or the ref "Parashat Bereshit"
-url = "https://www.sefaria.org/api/name/Parashat_Bereshit"
+url = f"{SEFARIA_API_BASE}/name/Parashat_Bereshit"
 try:
     resp = requests.get(url)
     print(resp.text[:500]) # Print beginning
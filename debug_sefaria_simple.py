@@ -1,8 +1,11 @@
+import os
 import requests
 import json
 
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
 # Check structure for a single-chapter range
-url = "https://www.sefaria.org/api/texts/Genesis%201:1-1:5?context=0&versionTitle=Tanach with Ta'amei Hamikra"
+url = f"{SEFARIA_API_BASE}/texts/Genesis%201:1-1:5?context=0&versionTitle=Tanach with Ta'amei Hamikra"
 resp = requests.get(url)
 data = resp.json()
 
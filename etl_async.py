@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import concurrent.futures
+import etl_pipeline
+import etl_trace
+import sefaria_cache
+import sefaria_client
+import retry_policy
+from rate_limit import TokenBucket
+from singleflight import SingleFlight, describe
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, only needed for --engine async
+    aiohttp = None
+
+# Hashing and JSON writing run in worker threads, and the CPU-bound transform
+# in a process pool, so the event loop keeps fetching while parashot are
+# being assembled.
+WRITER_THREADS = etl_pipeline.MAX_WORKERS
+
+
+class AsyncSefariaClient:
+    """
+    aiohttp client sharing one token bucket (requests/sec) and one
+    in-flight cap across every task. Goes through the on-disk cache;
+    repeats of a URL share one request (see sefaria_client).
+    """
+
+    def __init__(self, rate, max_in_flight, timeout=30):
+        self.bucket = TokenBucket(rate)
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self.session = None
+        self.semaphore = None
+        self.requests = 0
+        self.flights = SingleFlight(memoize=sefaria_client.memo_entry, weigh=sefaria_client.memo_weight,
+                                    max_weight=sefaria_client.MEMO_MAX_CHARS)
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def get(self, url):
+        response = await self.flights.do_async(sefaria_cache.normalize_url(url), lambda: self._get(url))
+        # Requests overlap on the event loop thread, so they are counted but
+        # not traced as spans
+        if etl_trace.enabled():
+            etl_trace.count(etl_trace.BYTES_FETCHED, len(response.content))
+        return response
+
+    async def _get(self, url):
+        cached, entry = sefaria_cache.lookup(url)
+        if cached is not None:
+            return cached
+
+        headers = sefaria_cache.revalidation_headers(entry)
+        response = await self._get_with_retry(url, headers)
+        return sefaria_cache.record(url, entry, response.status_code, response.text, response.headers)
+
+    async def _attempt(self, url, headers):
+        async with self.semaphore:
+            await self.bucket.acquire_async()
+            self.requests += 1
+            async with self.session.get(url, headers=headers) as resp:
+                body = (await resp.read()).decode('utf-8', errors='replace')
+                return sefaria_cache.CachedResponse(url, resp.status, body, resp.headers, from_cache=False)
+
+    async def _get_with_retry(self, url, headers):
+        """Async twin of retry_policy.call_with_retry."""
+        policy = retry_policy.DEFAULT_POLICY
+        breaker = retry_policy.breaker_for(url)
+        attempt = 0
+        waited = 0.0
+
+        while True:
+            wait = retry_policy.breaker_wait(policy, breaker, url, waited)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                waited += wait
+                continue
+
+            attempt += 1
+            try:
+                response = await self._attempt(url, headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                done, delay, reason = retry_policy.next_step(policy, breaker, attempt, error=e)
+            except BaseException:
+                # Includes cancellation: a half-open probe must settle the breaker
+                breaker.record_failure()
+                raise
+            else:
+                done, delay, reason = retry_policy.next_step(policy, breaker, attempt, response=response)
+                if done:
+                    return response
+
+            if attempt >= policy.max_attempts:
+                raise retry_policy.RetriesExhausted(url, reason)
+            await asyncio.sleep(delay)
+
+
+async def fetch_parashot_for_book(client, book_name):
+    """Async twin of etl_pipeline.fetch_parashot_for_book."""
+    try:
+        response = await client.get(etl_pipeline.index_url(book_name))
+        response.raise_for_status()
+        return etl_pipeline.parse_parashot_index(response.json(), book_name)
+    except Exception as e:
+        print(f"Error fetching index for {book_name}: {e}")
+        return []
+
+
+async def fetch_text(client, ref, is_haftara=False):
+    """
+    Async twin of etl_pipeline.fetch_text: the standard, Yemenite and
+    Targum requests are issued in parallel.
+    """
+    url_std, url_yem, url_onk, url_def = etl_pipeline.text_urls(ref, is_haftara)
+
+    data_std = None
+    data_yem = None
+    data_onk = None
+
+    try:
+        resp_std, resp_yem, resp_onk = await asyncio.gather(
+            client.get(url_std), client.get(url_yem), client.get(url_onk)
+        )
+
+        if resp_std.status_code == 200:
+            data_std = resp_std.json()
+        else:
+            # Fallback to default if specific version fails
+            print(f"  Fallback for Standard: {ref}")
+            resp_def = await client.get(url_def)
+            resp_def.raise_for_status()
+            data_std = resp_def.json()
+
+        if resp_yem.status_code == 200:
+            data_yem = resp_yem.json()
+            # Check if empty (sometimes API returns success but empty content for missing version)
+            if not data_yem.get('he'):
+                data_yem = None
+
+        if resp_onk.status_code == 200:
+            data_onk = resp_onk.json()
+
+        return data_std, data_yem, data_onk
+    except retry_policy.RetriesExhausted as e:
+        e.ref = ref
+        raise
+    except Exception as e:
+        print(f"Error fetching text for {ref}: {e}")
+        return None, None, None
+
+
+async def fetch_parasha_sources(client, parasha):
+    """Async twin of etl_pipeline.fetch_sources (fetches run concurrently)."""
+    plan = etl_pipeline.plan_parasha(parasha)
+    keys = [(ref, False) for ref in plan['fetch_ranges']]
+    keys += [(ref, True) for ref in plan['haftara_refs'] if ref]
+
+    results = await asyncio.gather(
+        *(fetch_text(client, ref, is_haftara) for ref, is_haftara in keys),
+        return_exceptions=True
+    )
+    return dict(zip(keys, results))
+
+
+async def process_parasha(client, executor, pool, parasha):
+    """The etl_pipeline stages, with the fetch stage done on the event loop."""
+    sources = await fetch_parasha_sources(client, parasha)
+
+    loop = asyncio.get_running_loop()
+    try:
+        # Failed fetches stay in `sources` as exceptions; prepare_parasha
+        # re-raises them.
+        job = await loop.run_in_executor(
+            executor, functools.partial(etl_pipeline.prepare_parasha, parasha, sources=sources)
+        )
+    except retry_policy.RetriesExhausted as e:
+        etl_pipeline.give_up(parasha, e)
+        return False
+    if job is None:
+        return True
+
+    output_data, memory, spans = await loop.run_in_executor(
+        pool or executor, functools.partial(
+            etl_pipeline.measured_transform, parasha, job['plan'], sources,
+            **etl_pipeline.transform_options(parasha)
+        )
+    )
+    etl_pipeline.record_peak_rss(parasha, memory)
+    etl_trace.merge(spans)
+    return await loop.run_in_executor(executor, etl_pipeline.write_parasha, job, output_data)
+
+
+async def run_async(rate, max_in_flight, select=None, transform_workers=etl_pipeline.TRANSFORM_WORKERS):
+    async with AsyncSefariaClient(rate, max_in_flight) as client:
+        # All books at once; the shared limiter decides the actual pace.
+        indexes = await asyncio.gather(
+            *(fetch_parashot_for_book(client, book['english']) for book in etl_pipeline.BOOKS)
+        )
+
+        manifest = []
+        parashot = []
+        for book, parashot_list in zip(etl_pipeline.BOOKS, indexes):
+            print(f"--- Queued Book: {book['english']} ({len(parashot_list)} parashot) ---")
+            manifest.append({
+                "book": book['english'],
+                "hebrew": book['hebrew'],
+                "parashot": parashot_list
+            })
+            parashot.extend(p for p in parashot_list if select is None or select(p))
+
+        pool = etl_pipeline.transform_pool(transform_workers)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=WRITER_THREADS) as executor:
+                tasks = [asyncio.ensure_future(process_parasha(client, executor, pool, p)) for p in parashot]
+                for p, task in zip(parashot, tasks):
+                    try:
+                        await task
+                    except Exception:
+                        pass
+                    etl_pipeline.report_result(p, task)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        print(f"Async engine: {client.requests} requests sent; dedup: {describe(client.flights.stats())}")
+    return manifest
+
+
+def run(rate, max_in_flight, select=None, transform_workers=etl_pipeline.TRANSFORM_WORKERS):
+    """
+    Async engine entry point. Returns the manifest (list of book entries).
+    `select(parasha)` limits which parashot are rebuilt; all stay in the manifest.
+    """
+    if aiohttp is None:
+        raise SystemExit("The async engine requires aiohttp: pip install aiohttp")
+    return asyncio.run(run_async(rate, max_in_flight, select, transform_workers))
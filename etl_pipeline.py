@@ -1,11 +1,32 @@
 import sys
-import requests
 import json
 import os
-import re
+import shutil
 import time
-import html
+import inspect
+import argparse
+import queue
+import threading
+import multiprocessing
 import concurrent.futures
+import sefaria_client
+import sefaria_cache
+import retry_policy
+import build_state
+import hebrew_normalizer
+import parasha_schema
+import precompress
+import peak_memory
+import etl_trace
+import data_release
+import asset_manifest
+import hebrew_calendar
+import haftara_parser
+import verse_store
+import sefaria_refs
+import singleflight
+from retry_policy import RetriesExhausted
+from sefaria_refs import RefRange
 
 sys.stdout.reconfigure(line_buffering=True)
 
@@ -14,10 +35,34 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "public", "data")
 PARASHOT_DIR = os.path.join(DATA_DIR, "parashot")
 MANIFEST_FILE = os.path.join(DATA_DIR, "manifest.json")
-SEFARIA_API_BASE = "https://www.sefaria.org/api"
+# Offline reading calendar, written next to the manifest (see hebrew_calendar)
+SCHEDULE_FILE = os.path.join(DATA_DIR, hebrew_calendar.SCHEDULE_FILE)
+# Builds are staged here and swapped into DATA_DIR when complete (see data_release)
+RELEASES_DIR = data_release.RELEASES_DIR
+# Overridable (SEFARIA_API_BASE or --api-base), e.g. to point at sefaria_fixtures
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+# Max workers = 3 to be safe with Sefaria API limits.
+# Also sizes the HTTP connection pool (see sefaria_client).
+MAX_WORKERS = 3
+# Processes for the CPU-bound transform stage (0 = transform in the fetch threads)
+TRANSFORM_WORKERS = os.cpu_count() or 1
+# Bound of the fetch -> transform and transform -> write queues
+STAGE_QUEUE_SIZE = 8
 
-# Ensure directories exist
-os.makedirs(PARASHOT_DIR, exist_ok=True)
+# Parashot whose fetches failed even after retries (replay with --replay-dead-letters)
+DEAD_LETTER_FILE = os.path.join(BASE_DIR, ".cache", "dead_letter.json")
+# Per-parasha input/upstream hashes for incremental builds (see build_state)
+BUILD_STATE_FILE = build_state.DEFAULT_STATE_FILE
+BUILD_STATE = None
+FORCE_REBUILD = False
+# Output format of the parasha files (see parasha_schema)
+OUTPUT_SCHEMA = parasha_schema.SCHEMA_VERSION
+# Also write columnar .tvs stores here (see verse_store); None = off
+VERSE_STORE_DIR = None
+# --trace output file (None = tracing off), and the parasha --profile runs under cProfile
+TRACE_FILE = None
+PROFILE_PARASHA = None
+PROFILE_DIR = os.path.join(BASE_DIR, "build", "profile")
 
 ALIYAH_MAP_FILE = os.path.join(BASE_DIR, "data", "aliyah_map.json")
 HAFTARA_MAP_FILE = os.path.join(BASE_DIR, "data", "haftara_map.json")
@@ -47,106 +92,80 @@ def clean_text(text):
     """
     Removes cantillation marks, vowels, and punctuation.
     Handles Parasha/Aliyah markers {פ} and {ס}.
+    Single pass over the text, see hebrew_normalizer.
     """
-    if not text: return ""
+    return hebrew_normalizer.clean_text(text)
 
-    # 1. Handle Markers (replace with unique placeholders)
-    # Pe (Petucha) -> Newline
-    # Handle {פ}, (פ), [פ] or isolated פ
-    text = re.sub(r'(?:[\{\(\[]\s*פ\s*[\}\)\]]|(?<!\S)פ(?!\S))', ' __PE_MARKER__ ', text)
-    
-    # Samekh (Setuma) -> 9 spaces
-    # Handle {ס}, (ס), [ס] or isolated ס
-    text = re.sub(r'(?:[\{\(\[]\s*ס\s*[\}\)\]]|(?<!\S)ס(?!\S))', ' __SAMEKH_MARKER__ ', text)
-
-    # 2. Pre-process separators that should become spaces
-    # Maqaf (05BE) and Hyphen (-) should separate words
-    # FIX: Do NOT separate with spaces. Keep connected for correct tokenization match with Taj.
-    # text = re.sub(r'[\-\u05BE]', ' ', text)
-
-    # 3. Remove Vowels and Cantillation (Trope)
-    # Cantillation: 0591-05AF
-    # Vowels: 05B0-05BD, 05BF, 05C1-05C2, 05C4-05C5, 05C7
-    # Paseq: 05C0 (vertical bar) - added to removal
-    text = re.sub(r'[\u0591-\u05AF\u05B0-\u05BD\u05BF\u05C0\u05C1-\u05C2\u05C4-\u05C5\u05C7]', '', text)
-
-    # 4. Remove Punctuation
-    # Explicit list: :, ., ׃ (Sof Pasuq 05C3)
-    # Hyphen/Maqaf already handled above as spaces
-    text = re.sub(r'[:\.\u05C3]', '', text)
-    
-    # 5. Remove remaining brackets
-    text = re.sub(r'[(){}\[\]]', '', text)
-    
-    # 6. Normalize Spaces
-    text = ' '.join(text.split())
-    
-    # 7. Restore Markers
-    # Remove surrounding spaces for newline to avoid trailing whitespace
-    text = text.replace(' __PE_MARKER__ ', '\n')
-    text = text.replace('__PE_MARKER__', '\n')
-    
-    # For Samekh, we want the 9 spaces.
-    text = text.replace(' __SAMEKH_MARKER__ ', '         ')
-    text = text.replace('__SAMEKH_MARKER__', '         ')
-    
-    return text
+def index_url(book_name):
+    # Using Sefaria Index API to get the structure of the book/alt structs
+    return f"{SEFARIA_API_BASE}/v2/index/{book_name}"
+
+def parse_parashot_index(data, book_name):
+    """Extracts the list of Parashot from a Sefaria index response."""
+    # Sefaria structure for Parashot is usually under 'alts' -> 'Parasha' -> 'nodes'
+    if 'alts' in data and 'Parasha' in data['alts']:
+        nodes = data['alts']['Parasha']['nodes']
+        parashot = []
+        for node in nodes:
+            whole_ref = node.get('wholeRef')
+            # Grab the Aliyot refs if available, otherwise fallback to wholeRef as a single chunk
+            aliyah_refs = node.get('refs', [whole_ref])
+            
+            if not whole_ref and not aliyah_refs:
+                print(f"Skipping node {node.get('title')} - no ref found")
+                continue
+            
+            # Use whole_ref as the main ref for the Parasha
+            main_ref = whole_ref if whole_ref else aliyah_refs[0]
+
+            # Extract correct names
+            parasha_entry = {
+                "ref": main_ref,
+                "aliyot": aliyah_refs
+            }
+            
+            for t in node['titles']:
+                if t['lang'] == 'en':
+                    parasha_entry['name'] = t['text']
+                    parasha_entry['id'] = t['text'].lower().replace(" ", "-")
+                elif t['lang'] == 'he':
+                    parasha_entry['hebrew'] = t['text']
+            
+            # Fallback if no Hebrew found
+            if 'hebrew' not in parasha_entry:
+                parasha_entry['hebrew'] = parasha_entry['name']
+
+            parashot.append(parasha_entry)
+        return parashot
+    else:
+        print(f"No Parasha structure found for {book_name}")
+        return []
+
+def traced_get(url):
+    """sefaria_client.get, timed as an "http" span and counted in the fetched bytes."""
+    with etl_trace.span("http", url=url) as s:
+        response = sefaria_client.get(url, timeout=30)
+        if etl_trace.enabled():
+            size = len(response.content)
+            s.args.update(status=response.status_code, bytes=size,
+                          cached=getattr(response, 'from_cache', False))
+            etl_trace.count(etl_trace.BYTES_FETCHED, size)
+    return response
 
 def fetch_parashot_for_book(book_name):
     """Fetches list of Parashot for a given book from Sefaria."""
-    # Using Sefaria Index API to get the structure of the book/alt structs
-    url = f"{SEFARIA_API_BASE}/v2/index/{book_name}"
     try:
-        response = requests.get(url, timeout=30)
+        with etl_trace.span("fetch_index", book=book_name):
+            response = traced_get(index_url(book_name))
         response.raise_for_status()
-        data = response.json()
-        
-        # Sefaria structure for Parashot is usually under 'alts' -> 'Parasha' -> 'nodes'
-        if 'alts' in data and 'Parasha' in data['alts']:
-            nodes = data['alts']['Parasha']['nodes']
-            parashot = []
-            for node in nodes:
-                whole_ref = node.get('wholeRef')
-                # Grab the Aliyot refs if available, otherwise fallback to wholeRef as a single chunk
-                aliyah_refs = node.get('refs', [whole_ref])
-                
-                if not whole_ref and not aliyah_refs:
-                    print(f"Skipping node {node.get('title')} - no ref found")
-                    continue
-                
-                # Use whole_ref as the main ref for the Parasha
-                main_ref = whole_ref if whole_ref else aliyah_refs[0]
-
-                # Extract correct names
-                parasha_entry = {
-                    "ref": main_ref,
-                    "aliyot": aliyah_refs
-                }
-                
-                for t in node['titles']:
-                    if t['lang'] == 'en':
-                        parasha_entry['name'] = t['text']
-                        parasha_entry['id'] = t['text'].lower().replace(" ", "-")
-                    elif t['lang'] == 'he':
-                        parasha_entry['hebrew'] = t['text']
-                
-                # Fallback if no Hebrew found
-                if 'hebrew' not in parasha_entry:
-                    parasha_entry['hebrew'] = parasha_entry['name']
-
-                parashot.append(parasha_entry)
-            return parashot
-        else:
-            print(f"No Parasha structure found for {book_name}")
-            return []
-            
+        return parse_parashot_index(response.json(), book_name)
     except Exception as e:
         print(f"Error fetching index for {book_name}: {e}")
         return []
 
-def fetch_text(ref, is_haftara=False):
-    """Fetches Hebrew (Standard & Yemenite) and Onkelos/Jonathan text for a given ref."""
-    
+def text_urls(ref, is_haftara=False):
+    """Returns the (standard, yemenite, targum, default version) text URLs for a ref."""
+
     # 1. Fetch Standard Hebrew (Tanach with Ta'amei Hamikra)
     url_std = f"{SEFARIA_API_BASE}/texts/{ref}?context=0&commentary=0&versionTitle=Tanach with Ta'amei Hamikra"
     
@@ -156,15 +175,27 @@ def fetch_text(ref, is_haftara=False):
     # 3. Fetch Targum
     # If Haftarah (Prophets), use Targum Jonathan. If Torah, use Onkelos.
     # Note: Sefaria might name it "Targum Jonathan on [Book]" or just "Targum Jonathan".
-    # Reliable check: First word of Ref is the Book.
-    book = ref.split()[0]
-    
-    if is_haftara or book not in ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]:
+    book = RefRange.parse(ref).book
+
+    if is_haftara or not sefaria_refs.is_torah(book):
         # Prophets
         url_onk = f"{SEFARIA_API_BASE}/texts/Targum_Jonathan_on_{ref.replace(' ', '_')}?context=0&commentary=0"
     else:
         # Torah
         url_onk = f"{SEFARIA_API_BASE}/texts/Onkelos_{ref.replace(' ', '_')}?context=0&commentary=0"
+
+    # 4. Default version, used if the Standard version is unavailable
+    url_def = f"{SEFARIA_API_BASE}/texts/{ref}?context=0&commentary=0"
+
+    return url_std, url_yem, url_onk, url_def
+
+def fetch_text(ref, is_haftara=False):
+    """Fetches Hebrew (Standard & Yemenite) and Onkelos/Jonathan text for a given ref."""
+    with etl_trace.span("fetch_text", ref=ref, haftara=is_haftara):
+        return _fetch_text(ref, is_haftara)
+
+def _fetch_text(ref, is_haftara):
+    url_std, url_yem, url_onk, url_def = text_urls(ref, is_haftara)
     
     data_std = None
     data_yem = None
@@ -172,18 +203,18 @@ def fetch_text(ref, is_haftara=False):
 
     try:
         # Fetch Standard
-        resp_std = requests.get(url_std, timeout=30)
+        resp_std = traced_get(url_std)
         if resp_std.status_code == 200:
             data_std = resp_std.json()
         else:
             # Fallback to default if specific version fails
             print(f"  Fallback for Standard: {ref}")
-            resp_def = requests.get(f"{SEFARIA_API_BASE}/texts/{ref}?context=0&commentary=0", timeout=30)
+            resp_def = traced_get(url_def)
             resp_def.raise_for_status()
             data_std = resp_def.json()
 
         # Fetch Yemenite
-        resp_yem = requests.get(url_yem, timeout=30)
+        resp_yem = traced_get(url_yem)
         if resp_yem.status_code == 200:
             data_yem = resp_yem.json()
             # Check if empty (sometimes API returns success but empty content for missing version)
@@ -191,25 +222,23 @@ def fetch_text(ref, is_haftara=False):
                 data_yem = None
         
         # Fetch Onkelos
-        resp_onk = requests.get(url_onk, timeout=30)
+        resp_onk = traced_get(url_onk)
         if resp_onk.status_code == 200:
             data_onk = resp_onk.json()
         
         return data_std, data_yem, data_onk
+    except RetriesExhausted as e:
+        # Transient failure that outlived the retries: let process_parasha
+        # dead-letter the whole parasha instead of writing it with gaps.
+        e.ref = ref
+        raise
     except Exception as e:
         print(f"Error fetching text for {ref}: {e}")
         return None, None, None
 
 def clean_html_and_spaces(text):
-    if not text: return ""
-    # Decode HTML entities (e.g. &thinsp; -> space)
-    text = html.unescape(text)
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Normalize unicode spaces to standard space
-    text = text.replace('\xa0', ' ').replace('\u2009', ' ')
-    # Collapse multiple spaces
-    return ' '.join(text.split())
+    # Decode HTML entities, remove tags, collapse all (unicode) spaces
+    return hebrew_normalizer.clean_html_and_spaces(text)
 
 def extract_verses_with_meta(he_data, start_chapter, start_verse):
     """
@@ -253,9 +282,52 @@ def extract_verses_with_meta(he_data, start_chapter, start_verse):
             
     return results
 
-def fetch_aliyah_data(aliyah_refs, is_haftara=False):
+def flatten_text(text_list):
+    """Flattens Sefaria's nested 'he' lists into a flat list of strings."""
+    flat = []
+    if isinstance(text_list, str): return [text_list]
+    for item in text_list:
+        if isinstance(item, list): flat.extend(flatten_text(item))
+        else: flat.append(item)
+    return flat
+
+def make_verse(verse_num, chapter, verse, std_text, yem_text, onk_text, is_haftara=False):
+    """Cleans the raw texts of one verse and builds its output object."""
+    with etl_trace.span("clean"):
+        clean_std = clean_html_and_spaces(std_text)
+        clean_yem = clean_html_and_spaces(yem_text)
+        clean_onk = clean_html_and_spaces(onk_text)
+
+        # Skip cleaning for Haftara (we don't need Tikun/Clean text)
+        simple_std = "" if is_haftara else clean_text(clean_std)
+        simple_yem = "" if is_haftara else clean_text(clean_yem)
+    
+    verse_obj = {
+        "verse_num": verse_num,
+        "chapter": chapter,
+        "verse": verse,
+        "versions": {
+            "standard": {
+                "text_full": clean_std,
+                "text_clean": simple_std
+            },
+            "yemenite": {
+                "text_full": clean_yem,
+                "text_clean": simple_yem
+            }
+        },
+        "targum": clean_onk
+    }
+    # Tikun-to-Taj alignment, here in the worker processes rather than in
+    # the single writer thread (parasha_schema only copies it)
+    with etl_trace.span("align"):
+        verse_obj["tokens"], verse_obj["bounds"] = parasha_schema.row_alignment(parasha_schema.verse_row(verse_obj))
+    return verse_obj
+
+def fetch_aliyah_data(aliyah_refs, is_haftara=False, fetch=fetch_text):
     """
     Fetches and processes data for a given list of Aliyah references.
+    `fetch` has fetch_text's signature (the async engine passes prefetched data).
     Returns: (aliyot_data, all_verses_flat)
     """
     aliyot_data = []
@@ -264,7 +336,7 @@ def fetch_aliyah_data(aliyah_refs, is_haftara=False):
 
     for idx, aliyah_ref in enumerate(aliyah_refs):
         # Fetch text for this specific aliyah range
-        std_data, yem_data, onk_data = fetch_text(aliyah_ref, is_haftara=is_haftara)
+        std_data, yem_data, onk_data = fetch(aliyah_ref, is_haftara=is_haftara)
         
         if not std_data or not std_data.get('he'):
             print(f"  Warning: No Standard data for aliyah {aliyah_ref}")
@@ -279,21 +351,13 @@ def fetch_aliyah_data(aliyah_refs, is_haftara=False):
         start_verse = sections[1]
         
         # Flatten Standard with Metadata
-        std_with_meta = extract_verses_with_meta(std_data['he'], start_chapter, start_verse)
-        
-        # Helper to flatten text lists
-        def flatten(text_list):
-            flat = []
-            if isinstance(text_list, str): return [text_list]
-            for item in text_list:
-                if isinstance(item, list): flat.extend(flatten(item))
-                else: flat.append(item)
-            return flat
+        with etl_trace.span("extract_verses", ref=aliyah_ref):
+            std_with_meta = extract_verses_with_meta(std_data['he'], start_chapter, start_verse)
 
         # Prepare Yemenite flat list
         yem_flat = []
         if yem_data and yem_data.get('he'):
-            yem_flat = flatten(yem_data['he'])
+            yem_flat = flatten_text(yem_data['he'])
         
         # Fallback if Yemenite missing/mismatch
         if not yem_flat or len(yem_flat) != len(std_with_meta):
@@ -304,7 +368,7 @@ def fetch_aliyah_data(aliyah_refs, is_haftara=False):
         # Onkelos
         onk_flat = []
         if onk_data and 'he' in onk_data:
-            onk_flat = flatten(onk_data['he'])
+            onk_flat = flatten_text(onk_data['he'])
         
         if len(onk_flat) < len(std_with_meta):
             onk_flat.extend([""] * (len(std_with_meta) - len(onk_flat)))
@@ -312,35 +376,10 @@ def fetch_aliyah_data(aliyah_refs, is_haftara=False):
         aliyah_verses = []
         for i, std_item in enumerate(std_with_meta):
             global_verse_count += 1
-            
-            std_text = std_item['text']
-            verse_ch = std_item['chapter']
-            verse_v = std_item['verse']
-            
-            clean_std = clean_html_and_spaces(std_text)
-            clean_yem = clean_html_and_spaces(yem_flat[i])
-            clean_onk = clean_html_and_spaces(onk_flat[i])
-            
-            # Skip cleaning for Haftara (we don't need Tikun/Clean text)
-            simple_std = "" if is_haftara else clean_text(clean_std)
-            simple_yem = "" if is_haftara else clean_text(clean_yem)
-            
-            verse_obj = {
-                "verse_num": global_verse_count,
-                "chapter": verse_ch,
-                "verse": verse_v,
-                "versions": {
-                    "standard": {
-                        "text_full": clean_std,
-                        "text_clean": simple_std
-                    },
-                    "yemenite": {
-                        "text_full": clean_yem,
-                        "text_clean": simple_yem
-                    }
-                },
-                "targum": clean_onk
-            }
+            verse_obj = make_verse(
+                global_verse_count, std_item['chapter'], std_item['verse'],
+                std_item['text'], yem_flat[i], onk_flat[i], is_haftara=is_haftara
+            )
             aliyah_verses.append(verse_obj)
             all_verses_flat.append(verse_obj)
         
@@ -349,49 +388,481 @@ def fetch_aliyah_data(aliyah_refs, is_haftara=False):
             "range": aliyah_ref,
             "verses": aliyah_verses
         })
-        time.sleep(0.1)
         
     return aliyot_data, all_verses_flat
 
-def process_parasha(parasha):
-    """Fetches data, processes it, and saves to JSON."""
-    print(f"Processing {parasha['name']} ({parasha['ref']})...")
+# --- Range Planning (Torah readings) ---
+# A parasha's aliyot, its Yemenite override aliyot and the Maftir all live in a
+# handful of consecutive chapters. Instead of one std/yem/targum request trio
+# per aliyah, we fetch whole chapter spans once and slice aliyot locally.
+
+def parse_ref(ref):
+    """
+    Splits 'Book C:V-C:V' (also 'Book C:V-V', 'Book C-C', 'Book C') into
+    (book, start_chapter, start_verse, end_chapter, end_verse), as a RefRange.
+    A verse of None means "whole chapter".
+    """
+    return RefRange.parse(ref)
+
+def plan_fetch_ranges(refs):
+    """
+    Merges refs into the smallest set of contiguous chapter spans,
+    e.g. Korach's aliyot + its Yemenite override -> ['Numbers 16-20'].
+    """
+    return [str(span) for span in sefaria_refs.merge(parse_ref(ref).chapters() for ref in refs)]
+
+def split_chapters(he_data):
+    """Normalizes a chapter-level 'he' payload to a list of per-chapter verse lists."""
+    if not he_data:
+        return []
+    if isinstance(he_data, str):
+        return [[he_data]]
+    if isinstance(he_data[0], str):
+        return [he_data]
+    return [flatten_text(chapter) for chapter in he_data]
+
+def fetch_verse_table(fetch_refs, fetch=fetch_text):
+    """
+    Fetches each chapter span once (standard, Yemenite, Targum) and returns
+    an in-memory verse table: dict (chapter, verse) -> raw texts, in reading order.
+    """
+    table = {}
+    for fetch_ref in fetch_refs:
+        start_ch = parse_ref(fetch_ref).start_chapter
+        std_data, yem_data, onk_data = fetch(fetch_ref)
+
+        if not std_data or not std_data.get('he'):
+            print(f"  Warning: No Standard data for {fetch_ref}")
+            continue
+
+        std_chapters = split_chapters(std_data['he'])
+        yem_chapters = split_chapters(yem_data['he']) if yem_data and yem_data.get('he') else []
+        onk_chapters = split_chapters(onk_data['he']) if onk_data and onk_data.get('he') else []
+
+        for offset, std_verses in enumerate(std_chapters):
+            chapter = start_ch + offset
+
+            # Fallback to Standard if Yemenite missing/mismatched for this chapter
+            yem_verses = yem_chapters[offset] if offset < len(yem_chapters) else []
+            if len(yem_verses) != len(std_verses):
+                if yem_verses:
+                    print(f"  Warning: Yemenite/Standard length mismatch for chapter {chapter} ({len(yem_verses)} vs {len(std_verses)}). Using Standard.")
+                yem_verses = std_verses
+
+            onk_verses = list(onk_chapters[offset]) if offset < len(onk_chapters) else []
+            if len(onk_verses) < len(std_verses):
+                onk_verses.extend([""] * (len(std_verses) - len(onk_verses)))
+
+            for i, std_text in enumerate(std_verses):
+                table[(chapter, i + 1)] = {
+                    "standard": std_text,
+                    "yemenite": yem_verses[i],
+                    "targum": onk_verses[i]
+                }
+    return table
+
+def build_aliyot(aliyah_refs, verse_table):
+    """
+    Cuts aliyot out of a verse table (see fetch_verse_table).
+    Returns: (aliyot_data, all_verses_flat), same shape as fetch_aliyah_data.
+    """
+    aliyot_data = []
+    all_verses_flat = []
+    global_verse_count = 0
+
+    for idx, aliyah_ref in enumerate(aliyah_refs):
+        aliyah_range = parse_ref(aliyah_ref)
+        first, last = aliyah_range.start, aliyah_range.end
+
+        if first not in verse_table or (aliyah_range.end_verse and last not in verse_table):
+            print(f"  Warning: No Standard data for aliyah {aliyah_ref}")
+            continue
+
+        aliyah_verses = []
+        for key, row in verse_table.items():
+            if not first <= key <= last:
+                continue
+            # Clean each verse once, even if it is shared by the standard
+            # aliyot and the Yemenite override aliyot.
+            if "verse" not in row:
+                row["verse"] = make_verse(0, key[0], key[1], row["standard"], row["yemenite"], row["targum"])
+            global_verse_count += 1
+            verse_obj = dict(row["verse"], verse_num=global_verse_count)
+            aliyah_verses.append(verse_obj)
+            all_verses_flat.append(verse_obj)
+
+        aliyot_data.append({
+            "num": idx + 1,
+            "range": aliyah_ref,
+            "verses": aliyah_verses
+        })
+
+    return aliyot_data, all_verses_flat
+
+def lookup_override(parasha):
+    """Returns (normalized parasha id, Yemenite override entry or None)."""
+    # Normalize ID to lowercase for lookup
+    p_id = parasha['id'].lower().replace("parashat ", "").replace("parshat ", "").replace(" ", "-")
     
-    # 1. Standard Processing
+    override = ALIYAH_OVERRIDES.get(p_id)
+    if not override:
+        simplified_id = p_id.split("-")[-1] 
+        override = ALIYAH_OVERRIDES.get(simplified_id)
+    return p_id, override
+
+def lookup_haftara_refs(parasha, p_id):
+    """
+    Returns the cleaned (standard, yemenite) Haftarah refs for a parasha.
+    The Yemenite ref is None when it is the same reading as the standard one.
+    """
+    haftara_entry = HAFTARA_MAP.get(parasha['id']) or HAFTARA_MAP.get(p_id)
+    if not haftara_entry:
+        return None, None
+
+    std_haftara_ref = haftara_entry.get('standard')
+    yem_haftara_ref = haftara_entry.get('yemenite')
+    
+    def clean(ref):
+        # Footnote markers like [73] and en-dashes come from the wiki source;
+        # notes like "Check manually" are not refs and must not reach the API.
+        try:
+            return sefaria_refs.clean_ref(ref)
+        except ValueError as e:
+            print(f"  Skipping Haftarah ref for {parasha['id']}: {e}")
+            return None
+
+    if std_haftara_ref:
+        std_haftara_ref = clean(std_haftara_ref)
+
+    if yem_haftara_ref and yem_haftara_ref != std_haftara_ref:
+        yem_haftara_ref = clean(yem_haftara_ref)
+    else:
+        yem_haftara_ref = None
+
+    return std_haftara_ref, yem_haftara_ref
+
+def plan_parasha(parasha):
+    """
+    Works out everything a parasha needs from the API.
+    Returns dict(p_id, override, ref_list, yem_ref_list, fetch_ranges, haftara_refs)
+    """
+    p_id, override = lookup_override(parasha)
+    yem_ref_list = override.get('aliyot') if override else None
+
     ref_list = parasha.get('aliyot')
     if not ref_list:
         ref_list = [parasha['ref']]
-        
-    aliyot_data, all_verses_flat = fetch_aliyah_data(ref_list)
+
+    # One fetch per contiguous chapter span covers the aliyot, the Maftir and
+    # the Yemenite override aliyot.
+    return {
+        "p_id": p_id,
+        "override": override,
+        "ref_list": ref_list,
+        "yem_ref_list": yem_ref_list,
+        "fetch_ranges": plan_fetch_ranges(ref_list + (yem_ref_list or [])),
+        "haftara_refs": lookup_haftara_refs(parasha, p_id)
+    }
+
+def parasha_output_path(parasha):
+    return os.path.join(PARASHOT_DIR, f"{parasha['id']}.json")
+
+def derived_outputs(parasha):
+    """Files written next to the parasha JSON; a missing one forces a rebuild."""
+    outputs = [os.path.join(parasha_schema.shard_dir(parasha_output_path(parasha)), parasha_schema.SHARD_INDEX)]
+    if VERSE_STORE_DIR:
+        outputs.append(verse_store.store_path(parasha['id'], VERSE_STORE_DIR))
+    return outputs
+
+def fetch_sources(plan, fetch=fetch_text):
+    """Fetches every text a parasha needs. Returns dict (ref, is_haftara) -> triple."""
+    keys = [(ref, False) for ref in plan['fetch_ranges']]
+    keys += [(ref, True) for ref in plan['haftara_refs'] if ref]
+    return {(ref, is_haftara): fetch(ref, is_haftara=is_haftara) for ref, is_haftara in keys}
+
+def transform_version():
+    """Hash of the code that turns Sefaria payloads into output JSON."""
+    return build_state.stable_hash([inspect.getsource(fn) for fn in TRANSFORM_FUNCTIONS])
+
+def input_hash(parasha, plan):
+    """Hash of everything a parasha's output depends on, apart from upstream text."""
+    return build_state.stable_hash({
+        "parasha": parasha,
+        "override": plan['override'],
+        "haftara": HAFTARA_MAP.get(parasha['id']) or HAFTARA_MAP.get(plan['p_id']),
+        "transform": TRANSFORM_VERSION,
+        "schema": OUTPUT_SCHEMA
+    })
+
+# --- Stages ---
+# fetch (I/O, threads) -> transform (CPU, worker processes) -> write (one thread).
+# process_parasha runs all three in the calling thread; run_stages connects
+# them with bounded queues.
+
+def prepare_parasha(parasha, fetch=fetch_text, sources=None):
+    """
+    Fetch stage: plans the parasha and fetches its texts (`sources` from
+    fetch_sources may be passed in by the async engine). Returns the job for
+    the transform stage, or None when BUILD_STATE says the output is up to date.
+    Raises RetriesExhausted if a fetch failed even after retries.
+    """
+    plan = plan_parasha(parasha)
+    if sources is None:
+        with etl_trace.span("fetch_parasha", parasha=parasha['id']):
+            sources = fetch_sources(plan, fetch)
+    for result in sources.values():
+        if isinstance(result, BaseException):
+            raise result
+
+    inputs = input_hash(parasha, plan)
+    upstream = build_state.stable_hash(sorted(sources.items(), key=lambda item: item[0]))
+    output_path = parasha_output_path(parasha)
+    if (BUILD_STATE and not FORCE_REBUILD and all(os.path.exists(p) for p in derived_outputs(parasha))
+            and BUILD_STATE.is_up_to_date(parasha['id'], inputs, upstream, output_path)):
+        print(f"Up to date: {parasha['name']}")
+        return None
+    return {"parasha": parasha, "plan": plan, "sources": sources, "inputs": inputs, "upstream": upstream}
+
+def transform_parasha(parasha, plan, sources):
+    """
+    Transform stage: flattening, cleaning, Maftir generation. Only uses its
+    arguments, so it can run in a worker process. Returns the output dict,
+    or None when there was no text.
+    """
+    def fetch_prefetched(ref, is_haftara=False):
+        return sources.get((ref, is_haftara), (None, None, None))
+
+    return assemble_parasha(parasha, plan, fetch_prefetched)
+
+def measured_transform(parasha, plan, sources, trace=False, profile_path=None):
+    """
+    transform_parasha plus (peak RSS, growth over the RSS at the start) in
+    bytes. Exact in a worker process; in a thread it is the whole process's
+    peak over that time.
+    Third value: with `trace` in a worker process, the etl_trace spans it
+    recorded (for etl_trace.merge in the parent), else None. With
+    `profile_path`, the transform runs under cProfile (see etl_trace.profiled).
+    """
+    in_worker = trace and multiprocessing.parent_process() is not None
+    if in_worker:
+        etl_trace.enable()
+    peak_memory.reset_peak()
+    before = peak_memory.current_rss()
+    with etl_trace.profiled(profile_path, parasha['id']), etl_trace.span("transform", parasha=parasha['id']):
+        output_data = transform_parasha(parasha, plan, sources)
+    peak = peak_memory.peak_rss()
+    memory = (peak, peak - before if peak is not None and before is not None else None)
+    return output_data, memory, etl_trace.drain() if in_worker else None
+
+def transform_options(parasha):
+    """Keyword arguments of measured_transform for this run's --trace / --profile."""
+    profile_path = None
+    if PROFILE_PARASHA == parasha['id']:
+        profile_path = os.path.join(PROFILE_DIR, f"{parasha['id']}.prof")
+    return {"trace": etl_trace.enabled(), "profile_path": profile_path}
+
+def write_parasha(job, output_data):
+    """Writer stage: the parasha JSON, its shards, the verse store and the build state."""
+    if output_data is None:
+        return False
+    parasha = job['parasha']
+    with etl_trace.span("write", parasha=parasha['id']) as s:
+        # Streamed to a temp file and renamed, so readers never see a partial file
+        filepath = parasha_schema.write_file(output_data, parasha_output_path(parasha), OUTPUT_SCHEMA)
+
+        # Per-aliyah shards + index, so the app can load one reading at a time
+        directory = parasha_schema.shard_dir(filepath)
+        shards = parasha_schema.write_shards(output_data, directory)
+        if VERSE_STORE_DIR:
+            verse_store.write_store(output_data, verse_store.store_path(parasha['id'], VERSE_STORE_DIR))
+        if etl_trace.enabled():
+            written = os.path.getsize(filepath) + sum(os.path.getsize(os.path.join(directory, name)) for name in shards)
+            s.args["bytes"] = written
+            etl_trace.count(etl_trace.BYTES_WRITTEN, written)
+
+    if BUILD_STATE:
+        BUILD_STATE.record(parasha['id'], job['inputs'], job['upstream'], filepath)
+    return True
+
+# (peak RSS, growth) in bytes of each parasha's transform, for the run summary
+_peak_rss = {}
+
+def record_peak_rss(parasha, measurement):
+    if measurement[0] is not None:
+        _peak_rss[parasha['id']] = measurement
+
+def print_peak_rss(top=5):
+    if _peak_rss:
+        ranked = sorted(_peak_rss.items(), key=lambda item: (item[1][0], item[1][1] or 0), reverse=True)
+        print(f"Peak RSS per parasha (transform, {len(ranked)} parashot, largest first):")
+        for parasha_id, (peak, growth) in ranked[:top]:
+            extra = f" (+{peak_memory.format_bytes(growth)})" if growth is not None else ""
+            print(f"  {parasha_id:<32}{peak_memory.format_bytes(peak)}{extra}")
+    process_peak = peak_memory.peak_rss()
+    if process_peak:
+        print(f"Peak RSS of the ETL process: {peak_memory.format_bytes(process_peak)}")
+
+def print_trace_summary(top=5):
+    print("Stage timings (--trace):")
+    etl_trace.print_summary()
+    for name, key in (("fetch_parasha", "fetch"), ("transform", "transform")):
+        ranked = etl_trace.slowest(name, "parasha", top)
+        if ranked:
+            print(f"Slowest parashot ({key}): " + ", ".join(f"{pid} {ms:.0f} ms" for pid, ms in ranked))
+    events = etl_trace.write_chrome_trace(TRACE_FILE)
+    print(f"Trace: {events} events -> {TRACE_FILE} (open in chrome://tracing or ui.perfetto.dev)")
+
+def give_up(parasha, error):
+    print(f"  Giving up on {parasha['name']}: {error}")
+    record_dead_letter(parasha, error)
+
+def process_parasha(parasha, fetch=fetch_text, sources=None):
+    """
+    Fetches data, processes it, and saves to JSON, all in the calling thread.
+    Skips the rebuild when BUILD_STATE says the output is up to date.
+    If a fetch fails even after retries, nothing is written: the existing file
+    stays in place and the parasha goes to the dead-letter list.
+    """
+    try:
+        job = prepare_parasha(parasha, fetch, sources)
+    except RetriesExhausted as e:
+        give_up(parasha, e)
+        return False
+    if job is None:
+        return True
+    output_data, memory, _ = measured_transform(parasha, job['plan'], job['sources'], **transform_options(parasha))
+    record_peak_rss(parasha, memory)
+    return write_parasha(job, output_data)
+
+def transform_pool(workers=TRANSFORM_WORKERS):
+    """Process pool for the transform stage, or None for workers=0."""
+    if not workers:
+        return None
+    # spawn, not fork: the fetch threads are already running when the
+    # first worker starts, and forking a threaded process can deadlock.
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+def run_stages(fetch_executor, parashot, transform_workers=TRANSFORM_WORKERS, queue_size=STAGE_QUEUE_SIZE):
+    """
+    Runs the parashot through the three stages. Fetches run on
+    `fetch_executor`; a full queue blocks the stage feeding it, so a slow
+    transform or writer holds back fetching instead of piling up payloads.
+    Returns one Future per parasha, resolved with process_parasha's result.
+    """
+    outcomes = [concurrent.futures.Future() for _ in parashot]
+    fetched = queue.Queue(maxsize=queue_size)
+    transformed = queue.Queue(maxsize=queue_size)
+    pool = transform_pool(transform_workers)
+
+    def fetch_stage(parasha, outcome):
+        try:
+            job = prepare_parasha(parasha)
+        except RetriesExhausted as e:
+            give_up(parasha, e)
+            outcome.set_result(False)
+        except Exception as e:
+            outcome.set_exception(e)
+        else:
+            if job is None:
+                outcome.set_result(True)
+            else:
+                fetched.put((job, outcome))
+
+    def transform_stage():
+        while True:
+            item = fetched.get()
+            if item is None:
+                return
+            job, outcome = item
+            args = (job['parasha'], job['plan'], job['sources'])
+            options = transform_options(job['parasha'])
+            try:
+                if pool:
+                    output_data, memory, spans = pool.submit(measured_transform, *args, **options).result()
+                else:
+                    output_data, memory, spans = measured_transform(*args, **options)
+            except Exception as e:
+                outcome.set_exception(e)
+                continue
+            record_peak_rss(job['parasha'], memory)
+            etl_trace.merge(spans)
+            # The writer only needs the hashes; drop the payloads early
+            job = dict(job, sources=None)
+            transformed.put((job, output_data, outcome))
+
+    def write_stage():
+        while True:
+            item = transformed.get()
+            if item is None:
+                return
+            job, output_data, outcome = item
+            try:
+                outcome.set_result(write_parasha(job, output_data))
+            except Exception as e:
+                outcome.set_exception(e)
+
+    transformers = [threading.Thread(target=transform_stage, daemon=True)
+                    for _ in range(max(1, transform_workers))]
+    writer = threading.Thread(target=write_stage, daemon=True)
+    for thread in transformers + [writer]:
+        thread.start()
+
+    try:
+        fetches = [fetch_executor.submit(fetch_stage, p, outcome) for p, outcome in zip(parashot, outcomes)]
+        concurrent.futures.wait(fetches)
+        for _ in transformers:
+            fetched.put(None)
+        for thread in transformers:
+            thread.join()
+        transformed.put(None)
+        writer.join()
+    finally:
+        if pool:
+            pool.shutdown()
+    return outcomes
+
+def make_maftir(last_aliyah, book_name):
+    """Maftir (num 8): the last 3 verses of the 7th aliyah, or None if it is shorter."""
+    with etl_trace.span("maftir"):
+        maftir_verses = last_aliyah['verses'][-3:]
+        if len(maftir_verses) < 3:
+            return None
+        first, last = maftir_verses[0], maftir_verses[-1]
+        maftir_range = RefRange(book_name, first['chapter'], first['verse'], last['chapter'], last['verse'])
+        return {
+            "num": 8,
+            "range": str(maftir_range),
+            "verses": maftir_verses
+        }
+
+def assemble_parasha(parasha, plan, fetch):
+    """Builds the parasha output dict (schema 1) from fetched texts; None if there are none."""
+    print(f"Processing {parasha['name']} ({parasha['ref']})...")
+    
+    override = plan['override']
+    yem_ref_list = plan['yem_ref_list']
+
+    # 1. Standard Processing
+    ref_list = plan['ref_list']
+    book_name = parse_ref(parasha['ref']).book
+    with etl_trace.span("verse_table", refs=plan['fetch_ranges']):
+        verse_table = fetch_verse_table(plan['fetch_ranges'], fetch=fetch)
+
+    with etl_trace.span("build_aliyot", parasha=parasha['id']):
+        aliyot_data, all_verses_flat = build_aliyot(ref_list, verse_table)
 
     # --- MAFTIR LOGIC (Standard) ---
     if len(aliyot_data) >= 7:
-        last_aliyah = aliyot_data[6]
-        last_verses = last_aliyah['verses']
-        
-        if len(last_verses) >= 3:
-            maftir_verses = last_verses[-3:]
-            
-            start_v = maftir_verses[0]
-            end_v = maftir_verses[-1]
-            book_name = parasha['ref'].split()[0] 
-            
-            if start_v['chapter'] == end_v['chapter']:
-                maftir_range = f"{book_name} {start_v['chapter']}:{start_v['verse']}-{end_v['verse']}"
-            else:
-                maftir_range = f"{book_name} {start_v['chapter']}:{start_v['verse']}-{end_v['chapter']}:{end_v['verse']}"
-            
-            maftir_data = {
-                "num": 8, 
-                "range": maftir_range,
-                "verses": maftir_verses 
-            }
+        maftir_data = make_maftir(aliyot_data[6], book_name)
+        if maftir_data:
             aliyot_data.insert(7, maftir_data)
-            print(f"  Generated Maftir (Standard): {maftir_range}")
+            print(f"  Generated Maftir (Standard): {maftir_data['range']}")
 
     if not all_verses_flat:
-        return False
-        
+        return None
+
     output_data = {
         "id": parasha['id'],
         "name": parasha['name'],
@@ -401,133 +872,380 @@ def process_parasha(parasha):
         "verses": all_verses_flat
     }
     
-    # 2. Check for Yemenite Override
-    # Normalize ID to lowercase for lookup
-    p_id = parasha['id'].lower().replace("parashat ", "").replace("parshat ", "").replace(" ", "-")
-    
-    override = ALIYAH_OVERRIDES.get(p_id)
-    if not override:
-        simplified_id = p_id.split("-")[-1] 
-        override = ALIYAH_OVERRIDES.get(simplified_id)
-
+    # 2. Apply Yemenite Override
     if override:
-        print(f"  Applying Yemenite Override for {parasha['name']}...")
-        yem_ref_list = override.get('aliyot')
-        if yem_ref_list:
-            yem_aliyot_data, _ = fetch_aliyah_data(yem_ref_list)
-            
-            # --- MAFTIR LOGIC (Yemenite) ---
-            if len(yem_aliyot_data) >= 7:
-                last_aliyah = yem_aliyot_data[-1] 
-                last_verses = last_aliyah['verses']
-                if len(last_verses) >= 3:
-                    maftir_verses = last_verses[-3:]
-                    start_v = maftir_verses[0]
-                    end_v = maftir_verses[-1]
-                    book_name = parasha['ref'].split()[0] 
-                    
-                    if start_v['chapter'] == end_v['chapter']:
-                        maftir_range = f"{book_name} {start_v['chapter']}:{start_v['verse']}-{end_v['verse']}"
-                    else:
-                        maftir_range = f"{book_name} {start_v['chapter']}:{start_v['verse']}-{end_v['chapter']}:{end_v['verse']}"
-                    
-                    maftir_data = {
-                        "num": 8, 
-                        "range": maftir_range,
-                        "verses": maftir_verses 
-                    }
-                    yem_aliyot_data.append(maftir_data)
-                    print(f"  Generated Maftir (Yemenite): {maftir_range}")
-
-            output_data["aliyot_yemenite"] = yem_aliyot_data
-            output_data["ref_yemenite"] = override.get('ref')
-            output_data["is_override"] = True
+        with etl_trace.span("override", parasha=parasha['id']):
+            print(f"  Applying Yemenite Override for {parasha['name']}...")
+            if yem_ref_list:
+                yem_aliyot_data, _ = build_aliyot(yem_ref_list, verse_table)
+
+                # --- MAFTIR LOGIC (Yemenite) ---
+                if len(yem_aliyot_data) >= 7:
+                    maftir_data = make_maftir(yem_aliyot_data[-1], book_name)
+                    if maftir_data:
+                        yem_aliyot_data.append(maftir_data)
+                        print(f"  Generated Maftir (Yemenite): {maftir_data['range']}")
+
+                output_data["aliyot_yemenite"] = yem_aliyot_data
+                output_data["ref_yemenite"] = override.get('ref')
+                output_data["is_override"] = True
 
     # 3. Add Haftarah
-    # Lookup in map
-    haftara_entry = HAFTARA_MAP.get(parasha['id']) or HAFTARA_MAP.get(p_id)
-    
-    if haftara_entry:
-        std_haftara_ref = haftara_entry.get('standard')
-        yem_haftara_ref = haftara_entry.get('yemenite')
-        
-        # Clean refs (remove extra chars if any, like [73])
-        if std_haftara_ref:
-            std_haftara_ref = re.sub(r'\[\d+\]', '', std_haftara_ref).strip()
-            # Replace en-dash with hyphen for Sefaria API compatibility if needed
-            std_haftara_ref = std_haftara_ref.replace('–', '-').replace('—', '-') 
-            
-            print(f"  Fetching Haftarah (Standard): {std_haftara_ref}")
-            # Use same logic as Aliyah (it's essentially an aliyah)
-            # Wrap in list because fetch_aliyah_data expects a list of refs (like 7 aliyot)
-            # but Haftara is one block.
-            haftara_data_list, _ = fetch_aliyah_data([std_haftara_ref], is_haftara=True)
-            if haftara_data_list:
-                output_data["haftara"] = haftara_data_list[0]
-                # Fix num/range if needed
-                output_data["haftara"]["num"] = 8 # Convention? Or just leave as 1 relative to haftara list?
-                # Actually, Trainer.tsx expects it as a single Aliyah object, not array.
-                # fetch_aliyah_data returns [Aliyah, Aliyah...]. We take [0].
-        
-        if yem_haftara_ref and yem_haftara_ref != std_haftara_ref:
-            yem_haftara_ref = re.sub(r'\[\d+\]', '', yem_haftara_ref).strip()
-            yem_haftara_ref = yem_haftara_ref.replace('–', '-').replace('—', '-')
-            
-            print(f"  Fetching Haftarah (Yemenite): {yem_haftara_ref}")
-            yem_haftara_data_list, _ = fetch_aliyah_data([yem_haftara_ref], is_haftara=True)
-            if yem_haftara_data_list:
-                output_data["haftara_yemenite"] = yem_haftara_data_list[0]
-                output_data["haftara_yemenite"]["num"] = 8
-
-    filename = f"{parasha['id']}.json"
-    filepath = os.path.join(PARASHOT_DIR, filename)
+    std_haftara_ref, yem_haftara_ref = plan['haftara_refs']
+
+    if std_haftara_ref:
+        print(f"  Fetching Haftarah (Standard): {std_haftara_ref}")
+        # Use same logic as Aliyah (it's essentially an aliyah)
+        # Wrap in list because fetch_aliyah_data expects a list of refs (like 7 aliyot)
+        # but Haftara is one block.
+        with etl_trace.span("haftara", ref=std_haftara_ref):
+            haftara_data_list, _ = fetch_aliyah_data([std_haftara_ref], is_haftara=True, fetch=fetch)
+        if haftara_data_list:
+            output_data["haftara"] = haftara_data_list[0]
+            # Fix num/range if needed
+            output_data["haftara"]["num"] = 8 # Convention? Or just leave as 1 relative to haftara list?
+            # Actually, Trainer.tsx expects it as a single Aliyah object, not array.
+            # fetch_aliyah_data returns [Aliyah, Aliyah...]. We take [0].
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
-        
-    return True
+    if yem_haftara_ref:
+        print(f"  Fetching Haftarah (Yemenite): {yem_haftara_ref}")
+        with etl_trace.span("haftara", ref=yem_haftara_ref):
+            yem_haftara_data_list, _ = fetch_aliyah_data([yem_haftara_ref], is_haftara=True, fetch=fetch)
+        if yem_haftara_data_list:
+            output_data["haftara_yemenite"] = yem_haftara_data_list[0]
+            output_data["haftara_yemenite"]["num"] = 8
+
+    return output_data
+
+# Bump-free cache invalidation: editing any of these rebuilds every parasha.
+TRANSFORM_FUNCTIONS = [
+    hebrew_normalizer, clean_text, clean_html_and_spaces, extract_verses_with_meta, make_verse,
+    fetch_aliyah_data, split_chapters, fetch_verse_table, build_aliyot, make_maftir, assemble_parasha,
+    parasha_schema, verse_store
+]
+TRANSFORM_VERSION = transform_version()
+
+# --- Dead Letters ---
+
+_dead_letters = []
+_dead_letters_lock = threading.Lock()
+
+def record_dead_letter(parasha, error):
+    with _dead_letters_lock:
+        _dead_letters.append({
+            "id": parasha['id'],
+            "name": parasha['name'],
+            "ref": error.ref,
+            "url": error.url,
+            "reason": error.reason,
+            "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+
+def load_dead_letters():
+    if not os.path.exists(DEAD_LETTER_FILE):
+        return []
+    with open(DEAD_LETTER_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_dead_letters(previous, processed_ids):
+    """
+    Keeps earlier entries for parashot this run did not touch, plus this
+    run's failures. Removes the file once nothing is left to replay.
+    """
+    with _dead_letters_lock:
+        entries = [d for d in previous if d['id'] not in processed_ids] + _dead_letters
+    if not entries:
+        if os.path.exists(DEAD_LETTER_FILE):
+            os.remove(DEAD_LETTER_FILE)
+        return entries
+    os.makedirs(os.path.dirname(DEAD_LETTER_FILE), exist_ok=True)
+    with open(DEAD_LETTER_FILE, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    return entries
 
 # --- Main Execution ---
 
-def main():
-    manifest = []
-    
-    # Use ThreadPoolExecutor for concurrent processing
-    # Max workers = 3 to be safe with Sefaria API limits
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        for book in BOOKS:
-            print(f"--- Processing Book: {book['english']} ---")
-            parashot_list = fetch_parashot_for_book(book['english'])
-            
-            book_entry = {
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate static Parasha JSON files from the Sefaria API.")
+    parser.add_argument("--api-base", default=SEFARIA_API_BASE,
+                        help="Sefaria API root, e.g. a sefaria_fixtures server (default: %(default)s)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve every request from the response cache; never touch the network")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the on-disk response cache")
+    parser.add_argument("--cache-dir", default=sefaria_cache.DEFAULT_CACHE_DIR,
+                        help="Response cache directory (default: %(default)s)")
+    parser.add_argument("--cache-ttl", type=float, default=sefaria_cache.DEFAULT_TTL / 3600,
+                        help="Hours before a cached response is revalidated (default: %(default)s)")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="Fetch engine: thread pool, or asyncio (requires aiohttp)")
+    parser.add_argument("--rate", type=float, default=sefaria_client.DEFAULT_RATE,
+                        help="Max requests/sec sent to Sefaria, 0 for unlimited (default: %(default)s)")
+    parser.add_argument("--max-in-flight", type=int, default=sefaria_client.DEFAULT_MAX_IN_FLIGHT,
+                        help="Max concurrent requests to Sefaria (default: %(default)s)")
+    parser.add_argument("--max-attempts", type=int, default=retry_policy.DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per request before it is dead-lettered (default: %(default)s)")
+    parser.add_argument("--only", action="append", metavar="PARASHA_ID",
+                        help="Only rebuild this parasha (repeatable)")
+    parser.add_argument("--book", action="append", metavar="NAME",
+                        help="Only rebuild parashot of this book, e.g. Numbers (repeatable)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even parashot whose inputs are unchanged")
+    parser.add_argument("--schema", type=int, choices=[1, 2], default=parasha_schema.SCHEMA_VERSION,
+                        help="Output format: 1 = nested verse objects, 2 = deduplicated verse table (default: %(default)s)")
+    parser.add_argument("--verse-store", nargs="?", const=verse_store.STORE_DIR, metavar="DIR",
+                        help=f"Also write columnar .tvs verse stores (default dir: {os.path.relpath(verse_store.STORE_DIR, BASE_DIR)})")
+    parser.add_argument("--corpus-db", nargs="?", const=os.path.join(BASE_DIR, "build", "corpus.db"), metavar="PATH",
+                        help="Also build the SQLite corpus database (default path: build/corpus.db)")
+    parser.add_argument("--search-index", nargs="?", const=os.path.join(BASE_DIR, "build", "search_index.bin"), metavar="PATH",
+                        help="Also build the full-text search index (default path: build/search_index.bin)")
+    parser.add_argument("--transform-workers", type=int, default=TRANSFORM_WORKERS, metavar="N",
+                        help="Processes for cleaning/assembling parashot (0 = in the fetch threads, default: %(default)s)")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Do not write the .json.gz / .json.br siblings")
+    parser.add_argument("--byte-budget", type=int, default=precompress.DEFAULT_BUDGET_BYTES,
+                        help="Fail the build, without publishing it, if a parasha or shard file exceeds this many bytes "
+                             "(0 = no limit, default: %(default)s)")
+    parser.add_argument("--schedule-years", type=hebrew_calendar.parse_years, default=hebrew_calendar.DEFAULT_YEARS,
+                        metavar="FIRST-LAST",
+                        help="Hebrew years covered by the reading schedule (default: %d-%d)" % hebrew_calendar.DEFAULT_YEARS)
+    parser.add_argument("--trace", nargs="?", const=os.path.join(BASE_DIR, "build", "trace.json"), metavar="PATH",
+                        help="Time every stage, print p50/p95 per stage and write a Chrome trace (default path: build/trace.json)")
+    parser.add_argument("--profile", metavar="PARASHA_ID",
+                        help=f"Run this parasha's transform under cProfile ({os.path.relpath(PROFILE_DIR, BASE_DIR)}/<id>.prof)")
+    parser.add_argument("--replay-dead-letters", action="store_true",
+                        help=f"Only rebuild the parashot listed in {os.path.relpath(DEAD_LETTER_FILE, BASE_DIR)}")
+    return parser.parse_args(argv)
+
+def report_result(parasha, future):
+    try:
+        success = future.result()
+        if not success:
+            print(f"Failed to process {parasha['name']}")
+    except Exception as exc:
+        print(f'{parasha["name"]} generated an exception: {exc}')
+
+def run_threads(select=None, transform_workers=TRANSFORM_WORKERS):
+    """
+    Thread pool engine. Returns the manifest (list of book entries).
+    `select(parasha)` limits which parashot are rebuilt; all stay in the manifest.
+    """
+    # Each worker thread gets its own keep-alive session from sefaria_client
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Books are processed concurrently: fetch every index, then queue
+        # all parashot at once. The global rate limit keeps the API safe.
+        index_futures = [executor.submit(fetch_parashot_for_book, book['english']) for book in BOOKS]
+
+        manifest = []
+        parashot = []
+        for book, index_future in zip(BOOKS, index_futures):
+            parashot_list = index_future.result()
+            print(f"--- Queued Book: {book['english']} ({len(parashot_list)} parashot) ---")
+            manifest.append({
                 "book": book['english'],
                 "hebrew": book['hebrew'],
                 "parashot": parashot_list
-            }
-            
-            # Process Parashot in parallel for this book
-            future_to_parasha = {executor.submit(process_parasha, p): p for p in parashot_list}
-            
-            for future in concurrent.futures.as_completed(future_to_parasha):
-                p = future_to_parasha[future]
-                try:
-                    success = future.result()
-                    if not success:
-                        print(f"Failed to process {p['name']}")
-                except Exception as exc:
-                    print(f'{p["name"]} generated an exception: {exc}')
-                
-            manifest.append(book_entry)
-            
-            # Be nice to the API between books
-            time.sleep(1)
-            
-    # Save Manifest
-    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
+            })
+            parashot.extend(p for p in parashot_list if select is None or select(p))
+
+        outcomes = run_stages(executor, parashot, transform_workers)
+        for parasha, outcome in zip(parashot, outcomes):
+            report_result(parasha, outcome)
+
+    return manifest
+
+def list_parasha_files():
+    return sorted(
+        os.path.join(PARASHOT_DIR, name) for name in os.listdir(PARASHOT_DIR) if name.endswith(".json")
+    )
+
+def build_staged(args, select, previous_dead_letters):
+    """
+    Runs the engine and writes every data file into PARASHOT_DIR /
+    MANIFEST_FILE / SCHEDULE_FILE (pointed at the staged release by main).
+    Returns (dead letters, parasha files over the byte budget). Build state
+    is saved by main, once the release is published.
+    """
+    if args.engine == "async":
+        import etl_async
+        manifest = etl_async.run(rate=args.rate, max_in_flight=args.max_in_flight, select=select,
+                                 transform_workers=args.transform_workers)
+    else:
+        manifest = run_threads(select=select, transform_workers=args.transform_workers)
+
+    processed_ids = {p['id'] for book in manifest for p in book['parashot'] if select is None or select(p)}
+    dead_letters = save_dead_letters(previous_dead_letters, processed_ids)
+
+    # Save Manifest (unless a book index could not be fetched). Replaced, not
+    # rewritten: the staged file is a hard link to the live one.
+    if all(book['parashot'] for book in manifest):
+        tmp_path = f"{MANIFEST_FILE}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, MANIFEST_FILE)
+        schedule = hebrew_calendar.write_schedule(SCHEDULE_FILE, hebrew_calendar.manifest_ids(manifest),
+                                                  *args.schedule_years)
+        print(f"Schedule: {len(schedule['years'])} years ({args.schedule_years[0]}-{args.schedule_years[1]}) "
+              f"-> {os.path.basename(SCHEDULE_FILE)}")
+    else:
+        print("Warning: some book indexes failed; manifest and schedule not updated")
+
+    parasha_files = list_parasha_files()
+    shard_files = sorted(
+        os.path.join(directory, name)
+        for directory in (parasha_schema.shard_dir(path) for path in parasha_files) if os.path.isdir(directory)
+        for name in os.listdir(directory) if name.endswith(".json")
+    )
+
+    # Precompressed siblings of every output file
+    if args.no_compress:
+        size_rows = precompress.file_sizes(parasha_files)
+        shard_rows = precompress.file_sizes(shard_files)
+    else:
+        size_rows = precompress.compress_files(parasha_files)
+        precompress.print_size_table(size_rows)
+        shard_rows = precompress.compress_files(shard_files)
+        for path in (MANIFEST_FILE, SCHEDULE_FILE):
+            if os.path.exists(path):
+                precompress.compress_file(path)
+    if shard_rows:
+        print(f"Shards: {len(shard_rows)} files, largest {max(r['raw'] for r in shard_rows):,} bytes, "
+              f"{sum(r['raw'] for r in shard_rows):,} bytes in total")
+
+    # The size budget covers every file the app may load, shards included,
+    # compressed or not; main checks it before publishing
+    for row, path in zip(shard_rows, shard_files):
+        row['file'] = os.path.relpath(path, PARASHOT_DIR)
+    over_budget = precompress.over_budget(size_rows + shard_rows, args.byte_budget)
+    return dead_letters, over_budget
+
+def main(argv=None):
+    args = parse_args(argv)
+    sefaria_cache.configure(
+        cache_dir=args.cache_dir,
+        ttl=args.cache_ttl * 3600,
+        enabled=not args.no_cache,
+        offline=args.offline
+    )
+    if args.offline:
+        print("Offline mode: serving Sefaria responses from cache only")
+
+    sefaria_client.configure(MAX_WORKERS, rate=args.rate, max_in_flight=args.max_in_flight)
+    retry_policy.configure(max_attempts=args.max_attempts)
+
+    global BUILD_STATE, FORCE_REBUILD, OUTPUT_SCHEMA, VERSE_STORE_DIR, PARASHOT_DIR, MANIFEST_FILE, SCHEDULE_FILE
+    global SEFARIA_API_BASE, HAFTARA_MAP, TRACE_FILE, PROFILE_PARASHA
+    SEFARIA_API_BASE = args.api_base.rstrip('/')
+    # Before anything reads the live data: a crashed publish may have left
+    # public/data missing
+    recovered = data_release.recover(DATA_DIR, RELEASES_DIR)
+    if recovered:
+        print(f"Recovered from an interrupted build: {recovered}")
+    # Haftara refs are parsed from the wiki tables on every build; parashot
+    # whose entry changed are rebuilt (their input hash includes it)
+    if os.path.exists(haftara_parser.SOURCE_FILE) and os.path.exists(MANIFEST_FILE):
+        HAFTARA_MAP, changed = haftara_parser.regenerate(output=HAFTARA_MAP_FILE, manifest_file=MANIFEST_FILE)
+        if changed:
+            print(f"Regenerated {os.path.relpath(HAFTARA_MAP_FILE, BASE_DIR)} from "
+                  f"{os.path.relpath(haftara_parser.SOURCE_FILE, BASE_DIR)}")
+    BUILD_STATE = build_state.BuildState(BUILD_STATE_FILE)
+    FORCE_REBUILD = args.force
+    OUTPUT_SCHEMA = args.schema
+    VERSE_STORE_DIR = args.verse_store
+    TRACE_FILE = args.trace
+    PROFILE_PARASHA = args.profile
+    if TRACE_FILE:
+        etl_trace.enable()
+
+    previous_dead_letters = load_dead_letters()
+    filters = []
+    if args.replay_dead_letters:
+        replay_ids = {d['id'] for d in previous_dead_letters}
+        print(f"Replaying {len(replay_ids)} dead-lettered parashot")
+        filters.append(lambda p: p['id'] in replay_ids)
+    if args.only:
+        only_ids = set(args.only)
+        filters.append(lambda p: p['id'] in only_ids)
+    if args.book:
+        books = {b.lower() for b in args.book}
+        filters.append(lambda p: parse_ref(p['ref']).book.lower() in books)
+    select = (lambda p: all(f(p) for f in filters)) if filters else None
+
+    version, staged = data_release.stage(DATA_DIR, RELEASES_DIR)
+    print(f"Staging release {version} in {staged}")
+
+    live_paths = (PARASHOT_DIR, MANIFEST_FILE, SCHEDULE_FILE)
+    PARASHOT_DIR = os.path.join(staged, os.path.relpath(PARASHOT_DIR, DATA_DIR))
+    MANIFEST_FILE = os.path.join(staged, os.path.relpath(MANIFEST_FILE, DATA_DIR))
+    SCHEDULE_FILE = os.path.join(staged, os.path.relpath(SCHEDULE_FILE, DATA_DIR))
+    os.makedirs(PARASHOT_DIR, exist_ok=True)
+    try:
+        dead_letters, over_budget = build_staged(args, select, previous_dead_letters)
+        if over_budget:
+            # Checked before publish: an over-budget build never goes live
+            for row in over_budget:
+                print(f"Over budget: {row['file']} is {row['raw']:,} bytes (--byte-budget {args.byte_budget:,})")
+            print(f"Release {version} not published; the live data is unchanged")
+            sys.exit(1)
+        # Hashed copies for immutable caching, then assets.json to resolve them
+        assets = asset_manifest.build(staged, version)
+        if not args.no_compress:
+            precompress.compress_file(os.path.join(staged, asset_manifest.ASSETS_FILE))
+        release = data_release.finish(staged, version)
+        data_release.publish(staged, DATA_DIR, RELEASES_DIR)
+        # Only now: parashot skipped next time must be the published ones
+        BUILD_STATE.save()
+    except BaseException:
+        # Ctrl-C or a crash: the live data stays as it was
+        shutil.rmtree(staged, ignore_errors=True)
+        raise
+    finally:
+        PARASHOT_DIR, MANIFEST_FILE, SCHEDULE_FILE = live_paths
+    parasha_files = list_parasha_files()
+
+    # Queryable corpus of everything on disk, including parashot not rebuilt this run
+    if args.corpus_db or args.search_index:
+        import corpus_db
+        all_parashot = corpus_db.load_parasha_files(parasha_files)
+    if args.corpus_db:
+        counts = corpus_db.build(all_parashot, args.corpus_db)
+        print(f"Corpus DB: {counts['parashot']} parashot, {counts['verses']} verses, "
+              f"{counts['readings']} readings -> {args.corpus_db}")
+    if args.search_index:
+        import search_index
+        counts = search_index.build(all_parashot, args.search_index)
+        print(f"Search index: {counts['documents']} verses, {counts['terms']} terms, "
+              f"{counts['postings_bytes']:,} bytes of postings -> {args.search_index}")
         
+    stats = sefaria_client.connection_stats()
+    dedup = sefaria_client.dedup_stats()
+    sefaria_client.close_all()
+    cache_stats = sefaria_cache.stats()
+    evicted = sefaria_cache.prune() if sefaria_cache.is_enabled() else 0
+
     print("\n--- ETL Pipeline Complete ---")
     print(f"Manifest saved to {MANIFEST_FILE}")
+    print(f"Published release {version} ({len(release['files'])} files) to {DATA_DIR}; "
+          f"roll back with: python data_release.py rollback")
+    print(f"Assets: {len(assets['files'])} hashed files in {asset_manifest.IMMUTABLE_DIR}/, "
+          f"resolved through {asset_manifest.ASSETS_FILE}")
+    if stats['sessions']:
+        print(f"HTTP: {stats['requests']} requests over {stats['connections']} connections "
+              f"({stats['reused']} reused, {stats['sessions']} sessions)")
+    if dedup['calls']:
+        print(f"Dedup: {singleflight.describe(dedup)}")
+    print(f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+          f"{cache_stats['revalidated']} revalidated, {cache_stats['offline_misses']} offline misses, "
+          f"{evicted} evicted")
+    print_peak_rss()
+    if TRACE_FILE:
+        print_trace_summary()
+    if dead_letters:
+        print(f"Dead letters: {len(dead_letters)} parashot failed (their last published files were kept); "
+              f"rerun with --replay-dead-letters ({DEAD_LETTER_FILE})")
 
 if __name__ == "__main__":
-    main()
+    # Run the importable module, not this __main__ copy: etl_async and the
+    # transform workers import etl_pipeline, and must see the globals main() sets
+    import etl_pipeline
+    etl_pipeline.main()
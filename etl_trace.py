@@ -0,0 +1,237 @@
+"""
+Stage tracing for the ETL: timed spans, byte counters, a per-stage summary
+and Chrome trace-event export.
+
+Off by default; span() is then a shared no-op, so the instrumented code
+costs one attribute check. Enabled by `etl_pipeline.py --trace`:
+
+    python etl_pipeline.py --trace                  # build/trace.json
+    python etl_pipeline.py --trace /tmp/etl.json --profile naso
+
+Open the file in chrome://tracing or https://ui.perfetto.dev: every fetch
+thread, transform worker and the writer gets its own track. Spans recorded
+in a worker process are handed back with drain() and merge()d into the
+parent. Timestamps come from time.perf_counter_ns() (CLOCK_MONOTONIC on
+Linux), so spans of different processes line up.
+
+    with etl_trace.span("http", url=url) as s:
+        response = sefaria_client.get(url)
+        s.args["bytes"] = len(response.content)
+"""
+import os
+import io
+import json
+import math
+import time
+import pstats
+import cProfile
+import threading
+
+# Counters every summary prints, even when zero
+BYTES_FETCHED = "bytes_fetched"
+BYTES_WRITTEN = "bytes_written"
+# Rows of the cProfile listing printed after a --profile run
+PROFILE_TOP = 25
+
+_lock = threading.Lock()
+_enabled = False
+_events = []
+_counters = {}
+# (pid, tid) -> thread name, for the trace viewer's track labels
+_threads = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = _now_us()
+        thread = threading.current_thread()
+        pid, tid = os.getpid(), threading.get_native_id()
+        event = {"name": self.name, "ph": "X", "ts": self.start, "dur": end - self.start,
+                 "pid": pid, "tid": tid, "args": self.args}
+        with _lock:
+            _events.append(event)
+            _threads[(pid, tid)] = thread.name
+        return False
+
+
+class _NullSpan:
+    """What span() returns while tracing is off; writes to .args are dropped."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @property
+    def args(self):
+        return {}
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block as one event named `name`."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def count(name, amount=1):
+    """Adds `amount` to a run-wide counter (e.g. BYTES_FETCHED)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def drain():
+    """Removes and returns everything recorded so far, for merge() in another process."""
+    with _lock:
+        recorded = {"events": list(_events), "counters": dict(_counters),
+                    "threads": [[pid, tid, name] for (pid, tid), name in _threads.items()]}
+        _events.clear()
+        _counters.clear()
+        _threads.clear()
+    return recorded
+
+
+def merge(recorded):
+    """Adds what drain() returned in a worker process; None is ignored."""
+    if not recorded:
+        return
+    with _lock:
+        _events.extend(recorded["events"])
+        for name, amount in recorded["counters"].items():
+            _counters[name] = _counters.get(name, 0) + amount
+        for pid, tid, name in recorded["threads"]:
+            _threads[(pid, tid)] = name
+
+
+# --- Output ---
+
+def trace_events():
+    """The recorded spans plus process/thread name metadata, in trace-event format."""
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    main_pid = os.getpid()
+    metadata = []
+    for pid in sorted({pid for pid, _ in threads}):
+        label = "etl" if pid == main_pid else f"transform worker {pid}"
+        metadata.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}})
+    for (pid, tid), name in sorted(threads.items()):
+        metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    return metadata + sorted(events, key=lambda e: e["ts"])
+
+
+def write_chrome_trace(path):
+    """Writes the trace as Chrome trace-event JSON (chrome://tracing, Perfetto). Returns the event count."""
+    events = trace_events()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(events)
+
+
+def _percentile(sorted_values, fraction):
+    # Nearest rank
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def summary():
+    """One row per span name: count, total, p50, p95 and max duration (ms), by total descending."""
+    durations = {}
+    with _lock:
+        for event in _events:
+            durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({"stage": name, "count": len(values), "total": sum(values),
+                     "p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95), "max": values[-1]})
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+
+def slowest(name, key, top=5):
+    """The `top` longest spans named `name`, as (args[key], ms)."""
+    with _lock:
+        matching = [e for e in _events if e["name"] == name]
+    matching.sort(key=lambda e: e["dur"], reverse=True)
+    return [(e["args"].get(key), e["dur"] / 1000) for e in matching[:top]]
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def print_summary():
+    rows = summary()
+    if not rows:
+        return
+    print(f"{'Stage':<24}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for row in rows:
+        print(f"{row['stage']:<24}{row['count']:>8}{row['total'] / 1000:>10.2f}"
+              f"{row['p50']:>10.1f}{row['p95']:>10.1f}{row['max']:>10.1f}")
+    totals = counters()
+    print(f"Bytes fetched: {totals.get(BYTES_FETCHED, 0):,}   Bytes written: {totals.get(BYTES_WRITTEN, 0):,}")
+
+
+# --- Profiling ---
+
+class profiled:
+    """
+    Runs the enclosed block under cProfile when `path` is set: dumps the
+    stats there (for snakeviz / pstats) and prints the top entries by
+    cumulative time. A no-op for path=None.
+    """
+
+    def __init__(self, path, label=None):
+        self.path = path
+        self.label = label
+        self.profile = None
+
+    def __enter__(self):
+        if self.path:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is None:
+            return False
+        self.profile.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.profile.dump_stats(self.path)
+        listing = io.StringIO()
+        pstats.Stats(self.profile, stream=listing).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"Profile of {self.label or 'block'} -> {self.path}")
+        print(listing.getvalue())
+        return False
@@ -3,6 +3,8 @@ import re
 import os
 import urllib.request
 
+SEFARIA_API_BASE = os.environ.get("SEFARIA_API_BASE", "https://www.sefaria.org/api")
+
 def strip_cantillation_vowels(text):
     # Strip everything in the Nikkud/Teamim range EXCEPT 05BE (Maqaf)
     # Range 0591-05BD covers most marks. 05BF-05C7 covers the rest.
@@ -34,7 +36,7 @@ def fetch_json(url):
 def fetch_data():
     # Fetch Exodus 15 (Hebrew)
     print("Fetching Exodus 15...")
-    url_hebrew = "https://www.sefaria.org/api/texts/Exodus.15?context=0"
+    url_hebrew = f"{SEFARIA_API_BASE}/texts/Exodus.15?context=0"
     
     try:
         data_he = fetch_json(url_hebrew)
@@ -45,7 +47,7 @@ def fetch_data():
 
     # Fetch Targum Onkelos Exodus 15
     print("Fetching Targum Onkelos...")
-    url_targum = "https://www.sefaria.org/api/texts/Onkelos_Exodus.15?context=0"
+    url_targum = f"{SEFARIA_API_BASE}/texts/Onkelos_Exodus.15?context=0"
     
     try:
         data_tm = fetch_json(url_targum)
@@ -0,0 +1,348 @@
+"""
+Builds data/haftara_map.json from the Wikipedia haftara tables
+(data/wiki_haftarah.txt), in one streaming pass.
+
+The source lists, parasha by parasha, one line per custom:
+
+    - A: Isaiah 42:5–43:10
+    - S, AF, AH, AP, APZ: Isaiah 42:5–21
+    - Y: Isaiah 42:1–16
+
+Most parashot have no heading, so the parser follows the Ashkenazi (A)
+lines: a new book, or an "A" line at a pair that may be combined, starts
+the next parasha. Headings that do name a parasha ("Tazria–Metzora",
+"[Vayakhel]") resynchronize it; they are found with an Aho-Corasick
+automaton over every parasha name and alias, built once, instead of
+trying each name against each line.
+
+Outputs, both rewritten only when they change:
+
+    data/haftara_map.json          {parasha id: {"standard", "yemenite"}}, read by the ETL
+    data/haftara_traditions.json   {custom code (A, S, Y, I, AH, ...): {parasha id: ref}}
+
+    python haftara_parser.py                       # regenerate both (the ETL does this on every build)
+    python haftara_parser.py --source data/haftara_wiki_extract.txt --output /tmp/map.json
+    python haftara_parser.py bench --repeat 50     # time the parser over the wiki files
+"""
+import os
+import re
+import json
+import time
+import argparse
+from collections import deque
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FILE = os.path.join(BASE_DIR, "data", "wiki_haftarah.txt")
+MAP_FILE = os.path.join(BASE_DIR, "data", "haftara_map.json")
+TRADITIONS_FILE = os.path.join(BASE_DIR, "data", "haftara_traditions.json")
+MANIFEST_FILE = os.path.join(BASE_DIR, "public", "data", "manifest.json")
+# Sources timed by `bench` (empty or missing ones are skipped)
+BENCH_SOURCES = [
+    SOURCE_FILE,
+    os.path.join(BASE_DIR, "data", "haftara_wiki_extract.txt"),
+    os.path.join(BASE_DIR, "data", "haftara_full_raw.txt"),
+]
+UNRESOLVED = "Check manually"
+
+ENTRY_RE = re.compile(r"^-\s*([^:]+):\s*(.*)")
+HEADING_SPLIT_RE = re.compile(r" - | – ")
+CODE_RE = re.compile(r"^[A-Z]{1,3}$")
+ASIDE_RE = re.compile(r"\([^)]*\)")
+# Headings longer than this are prose, not parasha names
+MAX_HEADING_LENGTH = 100
+
+# Spellings used by the source, by parasha index (Torah order)
+ALIASES = {
+    'bereshit': 0, 'noach': 1, 'lech lekha': 2, 'vayera': 3, 'chayei sarah': 4, 'toldot': 5,
+    'vayetze': 6, 'vayishlach': 7, 'vayeshev': 8, 'miketz': 9, 'vayigash': 10, 'vayechi': 11,
+    'sh\'mot': 12, 'vaera': 13, 'bo': 14, 'beshalach': 15, 'yitro': 16, 'mishpatim': 17,
+    'terumah': 18, 'teztaveh': 19, 'tetzaveh': 19, 'ki tissa': 20, 'ki tisa': 20,
+    'vayakhel': 21, 'vayakel': 21, 'pekudei': 22, 'pikudei': 22,
+    'vayikra': 23, 'tzav': 24, 'shemini': 25, 'tazria': 26, 'metzorah': 27, 'metzora': 27,
+    'acharei mot': 28, 'kedoshim': 29, 'emor': 30, 'behar': 31, 'bechukotai': 32,
+    'bamidbar': 33, 'naso': 34, 'behaloscha': 35, 'beha\'alotcha': 35, 'shlach': 36,
+    'korach': 37, 'korah': 37, 'chukkat': 38, 'chukat': 38, 'balak': 39, 'pinchas': 40, 'pinhas': 40,
+    'matot': 41, 'mattot': 41, 'masei': 42, 'massei': 42,
+    'd\'varim': 43, 'devarim': 43, 'v\'ethanan': 44, 'vaetchanan': 44, 'ekev': 45,
+    're\'eh': 46, 'reeh': 46, 'shofetim': 47, 'shoftim': 47, 'ki teitze': 48, 'ki teitzei': 48,
+    'ki tavo': 49, 'nitzavim': 50, 'vayelekh': 51, 'haazinu': 52,
+    'v\'zot haberachah': 53, 'v\'zot ha-berachah': 53,
+    'shabbat shirah': 15, 'shabbat hazon': 43, 'shabbat nahamu': 44,
+}
+# First parasha of each pair that may be read together: there, an "A"
+# line from the same book still starts the next parasha
+PAIR_STARTS = {21, 26, 28, 31, 41, 50}
+
+
+# --- Name matching ---
+
+class NameMatcher:
+    """
+    Aho-Corasick automaton over the parasha names ({name: parasha index}).
+    find() returns the parasha of the first name, in dict order, that a
+    heading is, starts with (followed by a space) or contains in [brackets].
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.rank = {name: rank for rank, name in enumerate(names)}
+        # Trie of the "[name]" and "name " patterns: transitions, failure
+        # links, and per state the (length, rank, anywhere?) it completes
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for name, rank in self.rank.items():
+            self._add(f"[{name}]", rank, True)
+            self._add(f"{name} ", rank, False)
+        self._link()
+        self.indexes = list(names.values())
+
+    def _add(self, pattern, rank, anywhere):
+        state = 0
+        for char in pattern:
+            following = self.goto[state].get(char)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][char] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = following
+        self.output[state].append((len(pattern), rank, anywhere))
+
+    def _link(self):
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, following in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(char, 0)
+                self.output[following] = self.output[following] + self.output[self.fail[following]]
+                pending.append(following)
+
+    def find(self, text):
+        best = self.rank.get(text)
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, rank, anywhere in self.output[state]:
+                # "name " only counts at the start of the heading
+                if (anywhere or end == length) and (best is None or rank < best):
+                    best = rank
+        return None if best is None else self.indexes[best]
+
+
+# --- Parsing ---
+
+def _book(ref):
+    """'First Kings 18:1-39' -> 'First Kings'."""
+    return " ".join(word for word in ref.split(':')[0].split() if not word[0].isdigit())
+
+
+def _codes(codes):
+    """Custom codes of an entry: 'A, S (acc to Hertz, IDF), some Y' -> ['A', 'S']."""
+    found = []
+    for token in ASIDE_RE.sub("", codes).split(','):
+        words = token.split()
+        if words and CODE_RE.match(words[0]):
+            found.append(words[0])
+    return found
+
+
+class HaftaraParser:
+    """Streaming parser: feed() the source line by line, then result()."""
+
+    def __init__(self, parashot):
+        self.parashot = [{'id': p['id'], 'standard': None, 'yemenite': None} for p in parashot]
+        names = {p['name'].lower().replace('parashat ', '').replace('parshat ', ''): i
+                 for i, p in enumerate(parashot)}
+        names.update(ALIASES)
+        self.names = names
+        self.matcher = NameMatcher(names)
+        self.traditions = {}
+        self.index = 0
+
+    def heading(self, line, lower_line):
+        """The parasha a heading line names, or None."""
+        found = None
+        if ' - ' in line or ' – ' in line:
+            for part in HEADING_SPLIT_RE.split(lower_line):
+                clean = part.strip().replace('[', '').replace(']', '').replace('parashat ', '')
+                if clean in self.names:
+                    found = self.names[clean]
+        if found is None:
+            found = self.matcher.find(lower_line)
+        return found
+
+    def feed(self, line):
+        line = line.strip()
+        if not line:
+            return
+        if not line.startswith('-'):
+            if len(line) < MAX_HEADING_LENGTH:
+                found = self.heading(line, line.lower())
+                if found is not None:
+                    self.index = found
+            return
+
+        match = ENTRY_RE.match(line)
+        if not match or self.index >= len(self.parashot):
+            return
+        codes = match.group(1).strip()
+        reading = match.group(2).strip()
+        if '(' in reading:
+            reading = reading.split('(')[0].strip()
+        codes_list = [c.strip() for c in codes.split(',')]
+        # Any A-family code (A, AH, AF, APZ...) counts as Ashkenazi
+        ashkenazi = 'A' in codes
+        yemenite = 'Y' in codes_list
+
+        p = self.parashot[self.index]
+        if ashkenazi:
+            if p['standard'] is None:
+                p['standard'] = reading
+                if yemenite:
+                    p['yemenite'] = reading
+            elif (_book(p['standard']) != _book(reading)
+                  or (self.index in PAIR_STARTS and codes_list[0] == 'A')):
+                self.index += 1
+                if self.index < len(self.parashot):
+                    p = self.parashot[self.index]
+                    p['standard'] = reading
+                    if yemenite:
+                        p['yemenite'] = reading
+            # else: a variant of the same parasha's reading; the first one stays
+        elif yemenite and p['yemenite'] is None:
+            p['yemenite'] = reading
+
+        if self.index < len(self.parashot):
+            for code in _codes(codes):
+                self.traditions.setdefault(code, {}).setdefault(self.index, reading)
+
+    def result(self):
+        """{parasha id: {"standard", "yemenite"}}, with the unresolved ones marked."""
+        final_map = {}
+        for p in self.parashot:
+            standard = p['standard'].strip(' °') if p['standard'] else None
+            yemenite = p['yemenite'].strip(' °') if p['yemenite'] else None
+            standard = standard or UNRESOLVED
+            final_map[p['id']] = {"standard": standard, "yemenite": yemenite or standard}
+        return final_map
+
+    def tradition_maps(self):
+        """{custom code: {parasha id: ref}}, for the parashot each custom is listed for."""
+        return {
+            code: {self.parashot[i]['id']: reading.strip(' °') for i, reading in sorted(readings.items())}
+            for code, readings in sorted(self.traditions.items())
+        }
+
+
+def manifest_parashot(manifest_file=MANIFEST_FILE):
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return [p for book in json.load(f) for p in book['parashot']]
+
+
+def parse(lines, parashot):
+    """Runs a HaftaraParser over an iterable of lines (e.g. an open file)."""
+    parser = HaftaraParser(parashot)
+    for line in lines:
+        parser.feed(line)
+    return parser
+
+
+def _write_if_changed(path, data, **options):
+    text = json.dumps(data, **options)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def regenerate(source=SOURCE_FILE, output=MAP_FILE, traditions=TRADITIONS_FILE, manifest_file=MANIFEST_FILE):
+    """Parses `source` and rewrites the maps that changed. Returns (haftara map, changed?)."""
+    with open(source, 'r', encoding='utf-8') as f:
+        parser = parse(f, manifest_parashot(manifest_file))
+    haftara_map = parser.result()
+    changed = _write_if_changed(output, haftara_map, indent=2)
+    if traditions:
+        _write_if_changed(traditions, parser.tradition_maps(), ensure_ascii=False, indent=1)
+    return haftara_map, changed
+
+
+# --- Benchmark ---
+
+def _scan_names(names, lower_line):
+    """The linear scan NameMatcher replaces, for the benchmark's cross-check."""
+    for name, index in names.items():
+        if f"[{name}]" in lower_line or lower_line == name or lower_line.startswith(f"{name} "):
+            return index
+    return None
+
+
+def bench(sources, parashot, repeat):
+    parser = HaftaraParser(parashot)
+    for source in sources:
+        if not os.path.exists(source) or not os.path.getsize(source):
+            continue
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        headings = [line.strip().lower() for line in lines
+                    if line.strip() and not line.startswith('-') and len(line.strip()) < MAX_HEADING_LENGTH]
+        mismatches = sum(parser.matcher.find(h) != _scan_names(parser.names, h) for h in headings)
+
+        timings = {}
+        for label, run in (
+            ("parse", lambda: parse(lines, parashot).result()),
+            ("match (automaton)", lambda: [parser.matcher.find(h) for h in headings]),
+            ("match (linear scan)", lambda: [_scan_names(parser.names, h) for h in headings]),
+        ):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+
+        size = sum(len(line.encode('utf-8')) for line in lines)
+        print(f"{os.path.relpath(source, BASE_DIR)}: {len(lines)} lines, {size:,} bytes, "
+              f"{len(headings)} heading candidates ({mismatches} matcher mismatches)")
+        for label, seconds in timings.items():
+            print(f"  {label:<20} {seconds * 1000:8.2f} ms  ({len(lines) / seconds:,.0f} lines/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build data/haftara_map.json from the wiki haftara tables.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="Parasha list (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command")
+    bench_parser = commands.add_parser("bench", help="Time the parser over the wiki source files")
+    bench_parser.add_argument("sources", nargs="*", default=BENCH_SOURCES)
+    bench_parser.add_argument("--repeat", type=int, default=20, help="Runs per file; the best is shown")
+    parser.add_argument("--source", default=SOURCE_FILE, help="Wiki text to parse (default: %(default)s)")
+    parser.add_argument("--output", default=MAP_FILE, help="haftara_map.json to write (default: %(default)s)")
+    parser.add_argument("--traditions", default=TRADITIONS_FILE,
+                        help="Per-custom map to write, '' to skip (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        bench(args.sources, manifest_parashot(args.manifest), args.repeat)
+        return
+    haftara_map, changed = regenerate(args.source, args.output, args.traditions, args.manifest)
+    unresolved = sum(entry['standard'] == UNRESOLVED for entry in haftara_map.values())
+    print(f"{args.output}: {len(haftara_map)} parashot, {unresolved} unresolved"
+          f"{'' if changed else ' (unchanged)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+Offline Hebrew calendar and the weekly Torah reading schedule.
+
+Computes, without any API, what is read on every Shabbat of a range of
+Hebrew years, in Israel and in the diaspora:
+
+  * the calendar itself (molad and postponement rules, after Dershowitz &
+    Reingold, "Calendrical Calculations"); day numbers are proleptic
+    Gregorian ordinals, so datetime.date.fromordinal() converts them
+  * the holidays whose own reading displaces the parasha (Rosh Hashana, Yom
+    Kippur, Sukkot, Shemini Atzeret, Pesach, Shavuot; the diaspora keeps the
+    second days)
+  * the parasha cycle, which starts after Simchat Torah and has to meet four
+    fixed points: Tzav before Pesach in a common year, Bamidbar before
+    Shavuot, Devarim on the Shabbat before Tisha B'Av and Nitzavim before
+    Rosh Hashana. Between two of them, the pairs that may be read together
+    (Vayakhel-Pekudei, Tazria-Metzora, Acharei-Kedoshim, Behar-Bechukotai,
+    Chukat-Balak, Matot-Masei) are combined until the parashot fit the
+    Shabbatot; where Israel has a Shabbat more, it runs a week ahead until
+    the next pair. Nitzavim-Vayelech are combined when only one Shabbat is
+    left before Simchat Torah for Vayelech and Haazinu.
+  * the special haftarot: holidays, Shabbat Shuva, Chanukah, the four
+    parshiyot, Shabbat HaGadol, the three of rebuke, the seven of consolation,
+    Shabbat Rosh Chodesh and Machar Chodesh
+
+write_schedule() emits the table the app uses to open "this week's" parasha
+without a network round trip (public/data/schedule.json, written by the ETL
+next to manifest.json):
+
+    {"version": 1, "parashot": ["bereshis", ...], "haftarot": {"shekalim": "Second Kings 12:1-17", ...},
+     "years": {"5786": {"first_shabbat": "2025-09-27", "israel": [[51, "shabbat-shuva"], [52], ...],
+                        "diaspora": [...]}}}
+
+Each year lists its Shabbatot a week apart from first_shabbat. An entry is
+[reading] or [reading, haftara]: the reading is a parasha index (into
+"parashot", in Torah order), a [first, second] pair read together, or the
+key of a holiday; the haftara is a key of "haftarot", or a parasha index
+where a combined reading takes the first one's. Without a haftara, the
+reading's own applies (for a pair, the second parasha's; see haftara_map).
+
+    python hebrew_calendar.py 5786
+    python hebrew_calendar.py 5786 --israel
+    python hebrew_calendar.py --write public/data/schedule.json --years 5780-5810
+"""
+import os
+import json
+import argparse
+import datetime
+import functools
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEDULE_FILE = "schedule.json"
+SCHEDULE_VERSION = 1
+# Years the ETL writes (Sep 2019 - Sep 2050)
+DEFAULT_YEARS = (5780, 5810)
+
+# Months, numbered from Nisan as in the Torah; the year begins at Tishrei
+NISAN, IYAR, SIVAN, TAMMUZ, AV, ELUL = 1, 2, 3, 4, 5, 6
+TISHREI, HESHVAN, KISLEV, TEVET, SHEVAT, ADAR, ADAR_II = 7, 8, 9, 10, 11, 12, 13
+
+SATURDAY = 6  # ordinal % 7, 0 = Sunday
+
+# Day 1 of Tishrei, year 1 (Julian 7 October 3761 BCE), as a day number
+HEBREW_EPOCH = -1373427
+PARTS_PER_DAY = 25920
+
+PARASHA_COUNT = 54
+# Indexes into the parashot in Torah order
+TZAV, BAMIDBAR, DEVARIM, NITZAVIM, VAYELECH, HAAZINU = 24, 33, 43, 50, 51, 52
+# Pairs that may be read together, by the index of the first; between two
+# fixed points they are combined in this order until the parashot fit
+COMBINE_ORDER = [
+    26,  # Tazria-Metzora
+    31,  # Behar-Bechukotai
+    28,  # Acharei Mot-Kedoshim
+    21,  # Vayakhel-Pekudei
+    41,  # Matot-Masei
+    38,  # Chukat-Balak
+]
+# Combined readings whose haftara is the first parasha's, not the second's
+FIRST_HAFTARA_PAIRS = {28}
+
+# Special haftarot (the common Ashkenazi ranges), by key
+HAFTAROT = {
+    "rosh-hashana": "First Samuel 1:1-2:10",
+    "shabbat-shuva": "Hosea 14:2-10",
+    "yom-kippur": "Isaiah 57:14-58:14",
+    "sukkot": "Zechariah 14:1-21",
+    "sukkot-chol-hamoed": "Ezekiel 38:18-39:16",
+    "shemini-atzeret": "First Kings 8:54-66",
+    "simchat-torah": "Joshua 1:1-18",
+    "chanukah-1": "Zechariah 2:14-4:7",
+    "chanukah-2": "First Kings 7:40-50",
+    "shekalim": "Second Kings 12:1-17",
+    "zachor": "First Samuel 15:2-34",
+    "parah": "Ezekiel 36:16-38",
+    "hachodesh": "Ezekiel 45:16-46:18",
+    "shabbat-hagadol": "Malachi 3:4-24",
+    "pesach": "Joshua 5:2-6:1",
+    "pesach-chol-hamoed": "Ezekiel 37:1-14",
+    "pesach-7": "Second Samuel 22:1-51",
+    "pesach-8": "Isaiah 10:32-12:6",
+    "shavuot-2": "Habakkuk 2:20-3:19",
+    "rebuke-1": "Jeremiah 1:1-2:3",
+    "rebuke-2": "Jeremiah 2:4-28",
+    "rebuke-3": "Isaiah 1:1-27",
+    "consolation-1": "Isaiah 40:1-26",
+    "consolation-2": "Isaiah 49:14-51:3",
+    "consolation-3": "Isaiah 54:11-55:5",
+    "consolation-4": "Isaiah 51:12-52:12",
+    "consolation-5": "Isaiah 54:1-10",
+    "consolation-6": "Isaiah 60:1-22",
+    "consolation-7": "Isaiah 61:10-63:9",
+    "shabbat-rosh-chodesh": "Isaiah 66:1-24",
+    "machar-chodesh": "First Samuel 20:18-42",
+}
+
+
+# --- Calendar ---
+
+def is_leap_year(year):
+    return (7 * year + 1) % 19 < 7
+
+
+@functools.lru_cache(maxsize=None)
+def _elapsed_days(year):
+    """Days from the epoch to the molad of Tishrei, with the weekday postponement."""
+    months = (235 * year - 234) // 19
+    parts = 12084 + 13753 * months
+    days = 29 * months + parts // PARTS_PER_DAY
+    # Rosh Hashana is never on Sunday, Wednesday or Friday
+    return days + 1 if (3 * (days + 1)) % 7 < 3 else days
+
+
+def _year_length_correction(year):
+    """The other two postponements, which keep every year 353-355 or 383-385 days long."""
+    previous, current, following = _elapsed_days(year - 1), _elapsed_days(year), _elapsed_days(year + 1)
+    if following - current == 356:
+        return 2
+    if current - previous == 382:
+        return 1
+    return 0
+
+
+@functools.lru_cache(maxsize=None)
+def new_year(year):
+    """Day number of 1 Tishrei."""
+    return HEBREW_EPOCH + _elapsed_days(year) + _year_length_correction(year)
+
+
+def year_length(year):
+    return new_year(year + 1) - new_year(year)
+
+
+def month_length(year, month):
+    length = year_length(year)
+    if month in (IYAR, TAMMUZ, ELUL, TEVET, ADAR_II):
+        return 29
+    if month == ADAR and not is_leap_year(year):
+        return 29
+    if month == HESHVAN and length % 10 != 5:
+        return 29
+    if month == KISLEV and length % 10 == 3:
+        return 29
+    return 30
+
+
+def months(year):
+    """The months of a year in calendar order, Tishrei to Elul."""
+    last = ADAR_II if is_leap_year(year) else ADAR
+    return list(range(TISHREI, last + 1)) + list(range(NISAN, TISHREI))
+
+
+def to_day(year, month, day):
+    """Day number of a Hebrew date."""
+    number = new_year(year) + day - 1
+    for earlier in months(year):
+        if earlier == month:
+            return number
+        number += month_length(year, earlier)
+    raise ValueError(f"No month {month} in {year}")
+
+
+def from_day(number):
+    """(year, month, day) of a day number."""
+    year = datetime.date.fromordinal(number).year + 3760
+    while new_year(year + 1) <= number:
+        year += 1
+    while new_year(year) > number:
+        year -= 1
+    day = number - new_year(year) + 1
+    for month in months(year):
+        length = month_length(year, month)
+        if day <= length:
+            return year, month, day
+        day -= length
+    raise AssertionError(number)
+
+
+def shabbat_on_or_before(number):
+    return number - (number - SATURDAY) % 7
+
+
+def shabbat_after(number):
+    return shabbat_on_or_before(number) + 7
+
+
+def to_date(number):
+    return datetime.date.fromordinal(number)
+
+
+# --- Holidays ---
+
+def holidays(year, israel=False):
+    """{day number: key} of the days whose own reading displaces the parasha."""
+    found = {}
+
+    def mark(month, first, last, key):
+        for day in range(first, last + 1):
+            found[to_day(year, month, day)] = key
+
+    extra = 0 if israel else 1
+    mark(TISHREI, 1, 2, "rosh-hashana")
+    mark(TISHREI, 10, 10, "yom-kippur")
+    mark(TISHREI, 15, 15 + extra, "sukkot")
+    mark(TISHREI, 16 + extra, 21, "sukkot-chol-hamoed")
+    if israel:
+        mark(TISHREI, 22, 22, "simchat-torah")
+    else:
+        mark(TISHREI, 22, 22, "shemini-atzeret")
+        mark(TISHREI, 23, 23, "simchat-torah")
+    mark(NISAN, 15, 15 + extra, "pesach")
+    mark(NISAN, 16 + extra, 20, "pesach-chol-hamoed")
+    mark(NISAN, 21, 21, "pesach-7")
+    if not israel:
+        mark(NISAN, 22, 22, "pesach-8")
+    mark(SIVAN, 6, 6, "shavuot")
+    if not israel:
+        mark(SIVAN, 7, 7, "shavuot-2")
+    return found
+
+
+# --- Reading cycle ---
+
+def shabbatot(year):
+    """Day numbers of every Shabbat of a year."""
+    first = shabbat_on_or_before(new_year(year) + 6)
+    return list(range(first, new_year(year + 1), 7))
+
+
+def _fill(days, start, last):
+    """
+    Readings for `days` starting at parasha `start`, so that the last day
+    reads up to parasha `last`: combines pairs in COMBINE_ORDER while there
+    are more parashot than days. Extra days read on past `last`.
+    Returns (readings, next parasha).
+    """
+    combined = set()
+    excess = last - start + 1 - len(days)
+    for first in COMBINE_ORDER:
+        if excess <= 0:
+            break
+        if start <= first and first + 1 <= last:
+            combined.add(first)
+            excess -= 1
+    if excess > 0:
+        raise ValueError(f"Cannot fit parashot {start}-{last} into {len(days)} Shabbatot")
+    readings = []
+    parasha = start
+    for _ in days:
+        if parasha in combined:
+            readings.append([parasha, parasha + 1])
+            parasha += 2
+        else:
+            readings.append(parasha)
+            parasha += 1
+    return readings, parasha
+
+
+def _tishrei_days(year, israel):
+    """The Shabbatot left for Vayelech and Haazinu: after Rosh Hashana, before Simchat Torah."""
+    closed = holidays(year, israel)
+    end = to_day(year, TISHREI, 22)
+    return [day for day in shabbatot(year) if day <= end and day not in closed]
+
+
+def readings(year, israel=False):
+    """[(day number, reading)] for every Shabbat of a year (see the module docstring)."""
+    closed = holidays(year, israel)
+    schedule = {day: closed[day] for day in shabbatot(year) if day in closed}
+
+    # The end of the previous cycle
+    tishrei = _tishrei_days(year, israel)
+    if len(tishrei) not in (1, 2):
+        raise AssertionError(f"{len(tishrei)} Shabbatot before Simchat Torah in {year}")
+    for day, parasha in zip(tishrei, [VAYELECH, HAAZINU][-len(tishrei):]):
+        schedule[day] = parasha
+
+    simchat_torah = max(day for day, key in closed.items() if key == "simchat-torah")
+    free = [day for day in shabbatot(year) if day > simchat_torah and day not in closed]
+    fixed_points = [
+        (shabbat_on_or_before(to_day(year, SIVAN, 6) - 1), BAMIDBAR),
+        (shabbat_on_or_before(to_day(year, AV, 9)), DEVARIM),
+        (free[-1], NITZAVIM),
+    ]
+    if not is_leap_year(year):
+        fixed_points.insert(0, (shabbat_on_or_before(to_day(year, NISAN, 15) - 1), TZAV))
+
+    parasha = 0
+    for point, last in fixed_points:
+        days = [day for day in free if day <= point]
+        free = free[len(days):]
+        chunk, parasha = _fill(days, parasha, last)
+        schedule.update(zip(days, chunk))
+    if parasha != NITZAVIM + 1:
+        raise AssertionError(f"{year} ends at parasha {parasha}")
+    if len(_tishrei_days(year + 1, israel)) == 1:
+        # Vayelech has no Shabbat of its own next Tishrei
+        schedule[point] = [NITZAVIM, VAYELECH]
+    return sorted(schedule.items())
+
+
+def _special_days(year):
+    """{day number: haftara key} of the Shabbatot with a special haftara, by precedence."""
+    special = {}
+
+    def claim(day, key):
+        special.setdefault(day, key)
+
+    leap = is_leap_year(year)
+    adar = ADAR_II if leap else ADAR
+    # Four parshiyot and Shabbat HaGadol
+    claim(shabbat_on_or_before(to_day(year, adar, 1)), "shekalim")
+    claim(shabbat_on_or_before(to_day(year, adar, 13)), "zachor")
+    hachodesh = shabbat_on_or_before(to_day(year, NISAN, 1))
+    claim(hachodesh, "hachodesh")
+    claim(hachodesh - 7, "parah")
+    claim(shabbat_on_or_before(to_day(year, NISAN, 14)), "shabbat-hagadol")
+    # Chanukah: 25 Kislev for eight days
+    chanukah = to_day(year, KISLEV, 25)
+    first = shabbat_on_or_before(chanukah + 6)
+    claim(first, "chanukah-1")
+    if first + 7 <= chanukah + 7:
+        claim(first + 7, "chanukah-2")
+    # The three weeks and the seven weeks after Tisha B'Av
+    chazon = shabbat_on_or_before(to_day(year, AV, 9))
+    for number in (1, 2, 3):
+        claim(chazon - 7 * (3 - number), f"rebuke-{number}")
+    # Rosh Chodesh Elul outranks the consolation that falls on it
+    for day in shabbatot(year):
+        if from_day(day)[1:] in ((ELUL, 1), (AV, 30)):
+            claim(day, "shabbat-rosh-chodesh")
+    nachamu = shabbat_after(to_day(year, AV, 9))
+    for number in range(1, 8):
+        claim(nachamu + 7 * (number - 1), f"consolation-{number}")
+    claim(shabbat_after(to_day(year, TISHREI, 2)), "shabbat-shuva")
+    for day in shabbatot(year):
+        _, month, date = from_day(day)
+        if date in (1, 30) and month != TISHREI:
+            claim(day, "shabbat-rosh-chodesh")
+        elif date == 29 and month != ELUL:
+            claim(day, "machar-chodesh")
+    return special
+
+
+def schedule_entries(year, israel=False):
+    """The year's entries in the schedule.json format, one per Shabbat."""
+    special = _special_days(year)
+    entries = []
+    for day, reading in readings(year, israel):
+        if isinstance(reading, str):
+            entries.append([reading])
+        elif day in special:
+            entries.append([reading, special[day]])
+        elif isinstance(reading, list) and reading[0] in FIRST_HAFTARA_PAIRS:
+            entries.append([reading, reading[0]])
+        else:
+            entries.append([reading])
+    return entries
+
+
+def build_schedule(parasha_ids, first_year, last_year):
+    """schedule.json content for the Hebrew years first_year..last_year."""
+    if len(parasha_ids) != PARASHA_COUNT:
+        raise ValueError(f"Expected {PARASHA_COUNT} parashot, got {len(parasha_ids)}")
+    years = {}
+    for year in range(first_year, last_year + 1):
+        years[str(year)] = {
+            "first_shabbat": to_date(shabbatot(year)[0]).isoformat(),
+            "israel": schedule_entries(year, israel=True),
+            "diaspora": schedule_entries(year, israel=False),
+        }
+    return {"version": SCHEDULE_VERSION, "parashot": list(parasha_ids), "haftarot": HAFTAROT, "years": years}
+
+
+def manifest_ids(manifest):
+    """Parasha ids of a manifest.json in Torah order."""
+    return [parasha['id'] for book in manifest for parasha in book['parashot']]
+
+
+def write_schedule(path, parasha_ids, first_year=DEFAULT_YEARS[0], last_year=DEFAULT_YEARS[1]):
+    schedule = build_schedule(parasha_ids, first_year, last_year)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(schedule, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return schedule
+
+
+def parse_years(text):
+    """'5786' or '5780-5810' -> (first, last)."""
+    first, _, last = text.partition("-")
+    first, last = int(first), int(last or first)
+    if last < first:
+        raise argparse.ArgumentTypeError(f"Empty year range {text}")
+    return first, last
+
+
+def describe(reading, parasha_ids):
+    if isinstance(reading, str):
+        return reading
+    if isinstance(reading, list):
+        return "-".join(parasha_ids[p] for p in reading)
+    return parasha_ids[reading]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the weekly Torah reading schedule offline.")
+    parser.add_argument("year", nargs="?", type=parse_years, help="Hebrew year or range to print, e.g. 5786")
+    parser.add_argument("--israel", action="store_true", help="Print the Israel schedule (default: diaspora)")
+    parser.add_argument("--manifest", default=os.path.join(BASE_DIR, "public", "data", "manifest.json"),
+                        help="manifest.json to take the parasha ids from (default: %(default)s)")
+    parser.add_argument("--write", metavar="PATH", help=f"Write the {SCHEDULE_FILE} table to PATH")
+    parser.add_argument("--years", type=parse_years, default=DEFAULT_YEARS, metavar="FIRST-LAST",
+                        help="Years to write (default: %d-%d)" % DEFAULT_YEARS)
+    args = parser.parse_args(argv)
+
+    with open(args.manifest, 'r', encoding='utf-8') as f:
+        parasha_ids = manifest_ids(json.load(f))
+    if args.write:
+        schedule = write_schedule(args.write, parasha_ids, *args.years)
+        print(f"{args.write}: {len(schedule['years'])} years, {os.path.getsize(args.write):,} bytes")
+    if args.year:
+        for year in range(args.year[0], args.year[1] + 1):
+            print(f"--- {year} ({'Israel' if args.israel else 'diaspora'}) ---")
+            for day, entry in zip(shabbatot(year), schedule_entries(year, args.israel)):
+                haftara = entry[1] if len(entry) > 1 else ""
+                if isinstance(haftara, int):
+                    haftara = f"({parasha_ids[haftara]})"
+                print(f"{to_date(day).isoformat()}  {describe(entry[0], parasha_ids):<45} {haftara}")
+    elif not args.write:
+        parser.error("give a year to print or --write")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Fast Hebrew text normalization for the ETL.
+
+Produces exactly the same output as the original regex chains in
+etl_pipeline (clean_text / clean_html_and_spaces): one str.translate
+deletion table, and the Petucha/Setuma markers found while the text is
+split into words (the regex marker scan only runs on the verses with
+brackets). About 3x the speed of the original chain on the committed
+verses; `python test_clean.py` measures it.
+"""
+import re
+import html
+
+# --- Deleted characters ---
+# Cantillation: 0591-05AF
+# Vowels: 05B0-05BD, 05BF, 05C1-05C2, 05C4-05C5, 05C7
+# Paseq: 05C0
+# Punctuation: ':', '.', Sof Pasuq (05C3)
+# Brackets left over from {פ} / {ס} style markers
+# Maqaf (05BE) is kept so Tikun words line up with the Taj tokens.
+# A list indexed by code point up to the end of the Hebrew block: cheaper
+# per character than a dict (or a regex class) for str.translate. Code
+# points past the list are kept unchanged.
+DELETED = {*range(0x0591, 0x05BE), *range(0x05BF, 0x05C6), 0x05C7, *map(ord, ':.(){}[]')}
+DELETE_TABLE = [None if code in DELETED else code for code in range(0x0600)]
+
+# --- Markers ---
+# Pe (Petucha) -> newline, Samekh (Setuma) -> 9 spaces.
+# Written as {פ}, (פ), [פ] or as an isolated letter.
+# Internal sentinels stand in for the markers while the text is stripped;
+# neither is whitespace nor in DELETE_TABLE.
+PE = '\x00'
+SAMEKH = '\x01'
+_SENTINEL = {'פ': f' {PE} ', 'ס': f' {SAMEKH} '}
+SETUMA_GAP = '         '
+
+# Group 1: bracketed marker. Group 2: candidate isolated letter. The
+# candidate pattern is deliberately loose (a neighbouring bracket also
+# counts); _replace_markers applies the exact isolation rules.
+MARKER_RE = re.compile(r'[\{\(\[]\s*([פס])\s*[\}\)\]]|(?<![^\s\}\)\]])([פס])(?![^\s\{\(\[])')
+PE_BRACKET_RE = re.compile(r'[\{\(\[]\s*פ\s*[\}\)\]]')
+
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _replace_markers(text):
+    """
+    Swaps markers for sentinels in one scan.
+
+    Mirrors the original two sequential passes (all Pe markers first, then
+    Samekh markers on the result): an isolated Samekh also counts as
+    isolated when it touches a bracketed Pe, because that Pe had already
+    been replaced by a space-padded placeholder.
+    """
+    pieces = []
+    pos = 0
+    pe_end = -1
+    length = len(text)
+
+    for match in MARKER_RE.finditer(text):
+        start, end = match.span()
+        if match.group(1):
+            letter = match.group(1)
+            if letter == 'פ':
+                pe_end = end
+        else:
+            letter = match.group(2)
+            left = start == 0 or text[start - 1].isspace()
+            right = end == length or text[end].isspace()
+            if letter == 'פ':
+                if not (left and right):
+                    continue
+            else:
+                if not (left or pe_end == start):
+                    continue
+                if not (right or PE_BRACKET_RE.match(text, end)):
+                    continue
+        pieces.append(text[pos:start])
+        pieces.append(_SENTINEL[letter])
+        pos = end
+
+    if not pieces:
+        return text
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+
+_MARKER_WORDS = {'פ': PE, 'ס': SAMEKH}
+
+
+def clean_text(text):
+    """
+    Removes cantillation marks, vowels, and punctuation.
+    Handles Parasha/Aliyah markers {פ} and {ס}.
+    """
+    if not text:
+        return ""
+
+    if '{' in text or '(' in text or '[' in text:
+        text = _replace_markers(text)
+    elif 'פ' in text or 'ס' in text:
+        # Without brackets a marker is a whole word
+        words = text.split()
+        if 'פ' in words or 'ס' in words:
+            text = ' '.join([_MARKER_WORDS.get(word, word) for word in words])
+    text = ' '.join(text.translate(DELETE_TABLE).split())
+
+    # Restore markers, swallowing the spaces around them (Pe first, as before)
+    if PE in text:
+        text = text.replace(f' {PE} ', '\n').replace(PE, '\n')
+    if SAMEKH in text:
+        text = text.replace(f' {SAMEKH} ', SETUMA_GAP).replace(SAMEKH, SETUMA_GAP)
+    return text
+
+
+# --- Word alignment ---
+# The Tikun text as tokens: a word is the index of the text_full word
+# (split on spaces) it was cleaned from, a Setuma or Petucha a negative
+# code. Its words are text_clean's, in order. A text_full word can yield
+# no Tikun word (a lone Paseq) or two (a word with a bracketed marker).
+SETUMA_TOKEN = -1
+PETUCHA_TOKEN = -2
+_MARKER_TOKENS = {PE: PETUCHA_TOKEN, SAMEKH: SETUMA_TOKEN}
+
+
+def align_words(text_full, text_clean):
+    """Tokens of `text_clean` (= clean_text(text_full), or "" for none) against `text_full`."""
+    if not text_clean:
+        return []
+    tokens = []
+    for index, word in enumerate(text_full.split(' ')):
+        # Same marker rules as clean_text; the sentinels come back space-padded
+        for piece in _replace_markers(word).split():
+            marker = _MARKER_TOKENS.get(piece)
+            if marker is not None:
+                tokens.append(marker)
+            elif piece.translate(DELETE_TABLE):
+                tokens.append(index)
+    return tokens
+
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def word_bounds(text_full, text_clean, tokens):
+    """
+    Where each word token's text is, so the app can slice instead of split:
+    per word (clean start, clean length, full start, full length), starts
+    relative to the end of the previous word in the same text. Flat list.
+    """
+    full_starts = []
+    position = 0
+    for word in text_full.split(' '):
+        full_starts.append((position, len(word)))
+        position += len(word) + 1
+
+    bounds = []
+    clean_end = full_end = 0
+    words = (token for token in tokens if token >= 0)
+    for match, token in zip(_WORD_RE.finditer(text_clean), words):
+        full_start, full_length = full_starts[token]
+        bounds += [match.start() - clean_end, match.end() - match.start(), full_start - full_end, full_length]
+        clean_end, full_end = match.end(), full_start + full_length
+    return bounds
+
+
+def clean_html_and_spaces(text):
+    """Decodes HTML entities, strips tags and collapses all whitespace."""
+    if not text:
+        return ""
+    if '&' in text:
+        text = html.unescape(text)
+    if '<' in text:
+        text = TAG_RE.sub('', text)
+    # str.split() already treats NBSP (00A0) and thin space (2009) as spaces
+    return ' '.join(text.split())
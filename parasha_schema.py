@@ -0,0 +1,425 @@
+"""
+On-disk formats of public/data/parashot/<id>.json.
+
+Schema 1 (legacy): every aliyah holds full verse objects, the same verses
+are repeated in the top-level `verses`, Maftir repeats the last three
+verses again and `aliyot_yemenite` repeats the overridden ones.
+
+Schema 2: every distinct verse is stored once, as a row of `verse_table`
+(see VERSE_FIELDS). Aliyot, Maftir, the Yemenite aliyot, the haftarot and
+the top-level verse list only refer to it through `spans`, half-open
+[start, end) index ranges, plus the `verse_num` of their first verse.
+`verse_tokens` runs parallel to `verse_table`: per row the Tikun tokens of
+the standard text, then of the Yemenite one when the row has its own pair
+(see hebrew_normalizer.align_words). A one-to-one alignment, the common
+case, is stored as just its word count. `verse_bounds`, in the same shape,
+holds where each token's word is in text_clean and text_full
+(hebrew_normalizer.word_bounds). Written as compact JSON.
+
+decode() turns either schema into the schema 1 shape, which is what the
+app works with (src/utils/parashaSchema.ts is the TypeScript twin).
+
+Shards: write_shards() also splits a parasha into <id>/index.json (names,
+ranges, verse counts) plus one small file per aliyah / haftara holding
+just its verse rows (and their `tokens` and `bounds`), so the app can load only the
+reading on screen.
+
+    python parasha_schema.py --schema 2 public/data/parashot/*.json
+    python parasha_schema.py --shards public/data/parashot/*.json
+"""
+import os
+import json
+import argparse
+import itertools
+import hebrew_normalizer
+
+SCHEMA_VERSION = 2
+
+# The Yemenite pair is left out of a row when it equals the standard one.
+VERSE_FIELDS = [
+    "chapter", "verse", "standard_full", "standard_clean", "targum",
+    "yemenite_full", "yemenite_clean"
+]
+
+ALIYAH_LISTS = ("aliyot", "aliyot_yemenite")
+SINGLE_ALIYOT = ("haftara", "haftara_yemenite")
+
+
+# --- Encoding ---
+
+def verse_row(verse):
+    standard = verse['versions']['standard']
+    yemenite = verse['versions']['yemenite']
+    row = (
+        verse['chapter'], verse['verse'],
+        standard['text_full'], standard['text_clean'], verse['targum']
+    )
+    if yemenite != standard:
+        row += (yemenite['text_full'], yemenite['text_clean'])
+    return row
+
+
+def compact_tokens(tokens):
+    """A one-to-one alignment [0, 1, ..., n - 1] is stored as n."""
+    return len(tokens) if tokens == list(range(len(tokens))) else tokens
+
+
+def row_alignment(row):
+    """
+    (tokens, bounds) of a verse row, each a list with an entry for the
+    standard pair, then the Yemenite one if the row has its own.
+    """
+    pairs = [(row[2], row[3])] + ([(row[5], row[6])] if len(row) > 5 else [])
+    tokens, bounds = [], []
+    for full, clean in pairs:
+        aligned = hebrew_normalizer.align_words(full, clean)
+        tokens.append(compact_tokens(aligned))
+        bounds.append(hebrew_normalizer.word_bounds(full, clean, aligned))
+    return tokens, bounds
+
+
+def verse_alignment(verse):
+    """
+    row_alignment of a verse object. The ETL computes it in its transform
+    stage (make_verse stores `tokens` and `bounds`), so the writer only copies it.
+    """
+    if 'tokens' in verse:
+        return verse['tokens'], verse['bounds']
+    return row_alignment(verse_row(verse))
+
+
+def without_tokens(data):
+    """A schema 1 dict minus the precomputed `tokens` and `bounds` of its verses (not part of schema 1)."""
+    def strip(verses):
+        return [{key: value for key, value in verse.items() if key not in ('tokens', 'bounds')} for verse in verses]
+
+    stripped = {}
+    for key, value in data.items():
+        if key in ALIYAH_LISTS:
+            stripped[key] = [dict(aliyah, verses=strip(aliyah['verses'])) for aliyah in value]
+        elif key in SINGLE_ALIYOT:
+            stripped[key] = dict(value, verses=strip(value['verses']))
+        elif key == 'verses':
+            stripped[key] = strip(value)
+        else:
+            stripped[key] = value
+    return stripped
+
+
+class VerseTable:
+    """Collects distinct verse rows, in first-seen order."""
+
+    def __init__(self):
+        self.rows = []
+        self.tokens = []
+        self.bounds = []
+        self.index = {}
+
+    def add(self, verse):
+        row = verse_row(verse)
+        position = self.index.get(row)
+        if position is None:
+            position = self.index[row] = len(self.rows)
+            self.rows.append(row)
+            tokens, bounds = verse_alignment(verse)
+            self.tokens.append(tokens)
+            self.bounds.append(bounds)
+        return position
+
+    def spans(self, verses):
+        """Verse objects -> (first verse_num, [[start, end], ...])."""
+        spans = []
+        for position in (self.add(v) for v in verses):
+            if spans and spans[-1][1] == position:
+                spans[-1][1] += 1
+            else:
+                spans.append([position, position + 1])
+
+        first_num = verses[0]['verse_num'] if verses else 1
+        for offset, verse in enumerate(verses):
+            if verse['verse_num'] != first_num + offset:
+                raise ValueError(f"Verse numbers are not consecutive at {verse['chapter']}:{verse['verse']}")
+        return first_num, spans
+
+
+def encode_aliyah(table, aliyah):
+    verse_num, spans = table.spans(aliyah['verses'])
+    encoded = {key: value for key, value in aliyah.items() if key != 'verses'}
+    encoded['verse_num'] = verse_num
+    encoded['spans'] = spans
+    return encoded
+
+
+# Schema 2 keys whose encode_items() value is an iterator, filled in as it is read
+STREAMED_KEYS = ALIYAH_LISTS + ("verse_table", "verse_tokens", "verse_bounds")
+
+
+def encode_items(data):
+    """
+    Schema 1 parasha dict -> the (key, value) pairs of its schema 2 dict, in
+    order. STREAMED_KEYS values are iterators: aliyot are encoded and verse
+    rows listed as they are read, so each value must be consumed before the
+    next pair is requested.
+    """
+    table = VerseTable()
+    yield "schema", SCHEMA_VERSION
+
+    for key, value in data.items():
+        if key in ALIYAH_LISTS:
+            yield key, (encode_aliyah(table, aliyah) for aliyah in value)
+        elif key in SINGLE_ALIYOT:
+            yield key, encode_aliyah(table, value)
+        elif key == 'verses':
+            verse_num, spans = table.spans(value)
+            yield key, {"verse_num": verse_num, "spans": spans}
+        else:
+            yield key, value
+
+    yield 'verse_fields', VERSE_FIELDS
+    yield 'verse_table', map(list, table.rows)
+    yield 'verse_tokens', iter(table.tokens)
+    yield 'verse_bounds', iter(table.bounds)
+
+
+def encode(data):
+    """Schema 1 parasha dict -> schema 2 dict."""
+    return {key: list(value) if key in STREAMED_KEYS else value for key, value in encode_items(data)}
+
+
+# --- Decoding ---
+
+def make_verse_object(verse_num, row):
+    chapter, verse, std_full, std_clean, targum = row[:5]
+    yem_full, yem_clean = row[5:7] if len(row) > 5 else (std_full, std_clean)
+    return {
+        "verse_num": verse_num,
+        "chapter": chapter,
+        "verse": verse,
+        "versions": {
+            "standard": {"text_full": std_full, "text_clean": std_clean},
+            "yemenite": {"text_full": yem_full, "text_clean": yem_clean}
+        },
+        "targum": targum
+    }
+
+
+def expand_spans(rows, verse_num, spans):
+    verses = []
+    for start, end in spans:
+        for row in rows[start:end]:
+            verses.append(make_verse_object(verse_num + len(verses), row))
+    return verses
+
+
+def decode_aliyah(rows, aliyah):
+    decoded = {key: value for key, value in aliyah.items() if key not in ('verse_num', 'spans')}
+    decoded['verses'] = expand_spans(rows, aliyah['verse_num'], aliyah['spans'])
+    return decoded
+
+
+def decode(data):
+    """Any schema -> schema 1 dict. Schema 1 input is returned as is."""
+    if data.get('schema') != SCHEMA_VERSION:
+        return data
+
+    rows = data['verse_table']
+    decoded = {}
+    for key, value in data.items():
+        if key in ('schema', 'verse_fields', 'verse_table', 'verse_tokens', 'verse_bounds'):
+            continue
+        if key in ALIYAH_LISTS:
+            decoded[key] = [decode_aliyah(rows, aliyah) for aliyah in value]
+        elif key in SINGLE_ALIYOT:
+            decoded[key] = decode_aliyah(rows, value)
+        elif key == 'verses':
+            decoded[key] = expand_spans(rows, value['verse_num'], value['spans'])
+        else:
+            decoded[key] = value
+    return decoded
+
+
+# --- Shards ---
+
+SHARD_INDEX = "index.json"
+
+
+def shard_dir(parasha_path):
+    """public/data/parashot/<id>.json -> public/data/parashot/<id>/"""
+    return os.path.splitext(parasha_path)[0]
+
+
+def build_shards(data):
+    """
+    Schema 1 parasha dict -> (index, {filename: shard}). Readings with
+    identical content (e.g. an unchanged Yemenite haftara) share one file.
+    """
+    shards = {}
+    names_by_content = {}
+
+    def add(key, aliyah, name):
+        verses = aliyah['verses']
+        shard = {key: value for key, value in aliyah.items() if key != 'verses'}
+        shard['verse_num'] = verses[0]['verse_num'] if verses else 1
+        shard['verse_fields'] = VERSE_FIELDS
+        shard['verses'] = [list(verse_row(v)) for v in verses]
+        alignments = [verse_alignment(v) for v in verses]
+        shard['tokens'] = [tokens for tokens, _ in alignments]
+        shard['bounds'] = [bounds for _, bounds in alignments]
+
+        content = json.dumps(shard, ensure_ascii=False, sort_keys=True)
+        filename = names_by_content.get(content)
+        if filename is None:
+            filename = names_by_content[content] = f"{name}.json"
+            shards[filename] = shard
+
+        entry = {key: value for key, value in aliyah.items() if key != 'verses'}
+        entry['verse_count'] = len(verses)
+        entry['shard'] = filename
+        return entry
+
+    index = {"schema": SCHEMA_VERSION}
+    for key, value in data.items():
+        if key in ALIYAH_LISTS:
+            index[key] = [add(key, aliyah, f"{key}-{n}") for n, aliyah in enumerate(value, 1)]
+        elif key in SINGLE_ALIYOT:
+            index[key] = add(key, value, key)
+        elif key != 'verses':
+            index[key] = value
+    return index, shards
+
+
+def write_shards(data, directory):
+    """Writes index.json and the shard files into `directory`, dropping stale shards."""
+    index, shards = build_shards(data)
+    shards[SHARD_INDEX] = index
+    os.makedirs(directory, exist_ok=True)
+
+    for filename, content in shards.items():
+        path = os.path.join(directory, filename)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    for filename in os.listdir(directory):
+        base = filename.split('.json')[0] + '.json'
+        if base not in shards:
+            os.remove(os.path.join(directory, filename))
+    return sorted(shards)
+
+
+# --- Files ---
+
+# Elements of a streamed schema 2 value written per chunk
+STREAM_BATCH = 128
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def iter_chunks(data, schema=SCHEMA_VERSION):
+    """
+    The file for a schema 1 parasha dict as text chunks. In schema 2 the
+    aliyah lists and verse table are taken from encode_items() STREAM_BATCH
+    elements at a time, so neither the file nor a schema 2 copy of the
+    parasha is ever built whole; only the verse rows (needed to deduplicate)
+    are. Joined, the chunks equal json.dump's output.
+    """
+    if schema == 1:
+        yield from json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(without_tokens(data))
+        return
+
+    yield '{'
+    for position, (key, value) in enumerate(encode_items(data)):
+        yield f"{',' if position else ''}{_compact(key)}:"
+        if key in STREAMED_KEYS:
+            yield '['
+            separator = ''
+            batch = list(itertools.islice(value, STREAM_BATCH))
+            while batch:
+                # A compact list minus its brackets is its items joined by ','
+                yield separator + _compact(batch)[1:-1]
+                separator = ','
+                batch = list(itertools.islice(value, STREAM_BATCH))
+            yield ']'
+        else:
+            yield _compact(value)
+    yield '}'
+
+
+def dump(data, f, schema=SCHEMA_VERSION):
+    """Writes a schema 1 parasha dict to `f` in the requested schema."""
+    for chunk in iter_chunks(data, schema):
+        f.write(chunk)
+
+
+def write_file(data, path, schema=SCHEMA_VERSION):
+    """dump() into a temp file next to `path`, renamed into place once complete."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            dump(data, f, schema)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def load(f):
+    """Reads a parasha file of any schema, returned in the schema 1 shape."""
+    return decode(json.load(f))
+
+
+def convert_file(filepath, schema):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    # Files from the first ETL version (no aliyot) are left alone
+    if not isinstance(data.get('aliyot'), list):
+        print(f"  Skipped (unsupported format): {filepath}")
+        return len(raw.encode('utf-8')), len(raw.encode('utf-8'))
+
+    decoded = decode(data)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        dump(decoded, f, schema)
+    with open(tmp_path, 'r', encoding='utf-8') as f:
+        if decode(json.load(f)) != decoded:
+            raise ValueError(f"Round trip mismatch for {filepath}")
+
+    os.replace(tmp_path, filepath)
+    return len(raw.encode('utf-8')), os.path.getsize(filepath)
+
+
+def shard_file(filepath):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = load(f)
+    if not isinstance(data.get('aliyot'), list):
+        print(f"  Skipped (unsupported format): {filepath}")
+        return 0
+    return len(write_shards(data, shard_dir(filepath)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert parasha JSON files between schemas, in place.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--schema", type=int, choices=[1, 2], default=SCHEMA_VERSION)
+    parser.add_argument("--shards", action="store_true",
+                        help="Write the per-aliyah shard directories instead of converting")
+    args = parser.parse_args(argv)
+
+    if args.shards:
+        count = sum(shard_file(filepath) for filepath in args.files)
+        print(f"{len(args.files)} files: {count} shard files written")
+        return
+
+    total_before = total_after = 0
+    for filepath in args.files:
+        before, after = convert_file(filepath, args.schema)
+        total_before += before
+        total_after += after
+    print(f"{len(args.files)} files: {total_before:,} -> {total_after:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Peak resident set size (RSS) of the current process, for the ETL run summary.
+
+On Linux the high-water mark can be reset (/proc/self/clear_refs), so a
+worker process can measure the peak of each parasha it transforms.
+Elsewhere peak_rss() falls back to the process-lifetime peak (getrusage).
+"""
+import sys
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def reset_peak():
+    """Restarts the peak measurement; False where the platform cannot."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _status_bytes(field):
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss():
+    """Current RSS in bytes (Linux only, else None)."""
+    return _status_bytes("VmRSS:")
+
+
+def peak_rss():
+    """Peak RSS in bytes since the last reset_peak() (or process start); None if unknown."""
+    peak = _status_bytes("VmHWM:")
+    if peak is not None:
+        return peak
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
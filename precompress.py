@@ -0,0 +1,128 @@
+"""
+Precompressed siblings for the static data files.
+
+Next to every <name>.json this writes <name>.json.gz (gzip -9) and, when the
+optional `brotli` package is installed, <name>.json.br (quality 11), so the
+host can serve them as-is instead of compressing on the fly.
+
+    python precompress.py public/data/parashot/*.json public/data/manifest.json
+"""
+import os
+import sys
+import gzip
+import argparse
+import tempfile
+import concurrent.futures
+
+try:
+    import brotli
+except ImportError:  # optional dependency: pip install brotli
+    brotli = None
+
+# Largest compact JSON a single parasha may take (bytes, uncompressed)
+DEFAULT_BUDGET_BYTES = 192 * 1024
+COMPRESS_WORKERS = os.cpu_count() or 2
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output byte-identical across runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+
+ENCODINGS = [(".gz", gzip_bytes)]
+if brotli is not None:
+    ENCODINGS.append((".br", brotli_bytes))
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def compress_file(path):
+    """
+    (Re)writes the compressed siblings of `path` that are missing or older
+    than it. Returns {"file", "raw", "gzip", "brotli"} sizes in bytes
+    (brotli is None without the brotli package).
+    """
+    sizes = {"file": os.path.basename(path), "raw": os.path.getsize(path), "gzip": None, "brotli": None}
+    source_mtime = os.path.getmtime(path)
+    data = None
+
+    for suffix, compress in ENCODINGS:
+        target = path + suffix
+        if not os.path.exists(target) or os.path.getmtime(target) < source_mtime:
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            _write_atomic(target, compress(data))
+        sizes["gzip" if suffix == ".gz" else "brotli"] = os.path.getsize(target)
+    return sizes
+
+
+def compress_files(paths, workers=COMPRESS_WORKERS):
+    """Compresses every file in parallel. Returns the size rows in input order."""
+    # zlib and brotli release the GIL while compressing, so threads suffice
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(compress_file, paths))
+
+
+def _percent(part, whole):
+    return f"{part / whole:6.1%}" if part is not None and whole else "     -"
+
+
+def print_size_table(rows):
+    print(f"\n{'file':<32}{'raw':>10}{'gzip':>10}{'':>7}{'brotli':>10}{'':>7}")
+    for row in rows:
+        print(f"{row['file']:<32}{row['raw']:>10,}"
+              f"{row['gzip'] or 0:>10,} {_percent(row['gzip'], row['raw'])}"
+              f"{row['brotli'] or 0:>10,} {_percent(row['brotli'], row['raw'])}")
+
+    raw = sum(r['raw'] for r in rows)
+    gz = sum(r['gzip'] or 0 for r in rows)
+    br = sum(r['brotli'] or 0 for r in rows) if brotli is not None else None
+    print(f"{'total':<32}{raw:>10,}{gz:>10,} {_percent(gz, raw)}{br or 0:>10,} {_percent(br, raw)}")
+    if brotli is None:
+        print("(brotli not installed: no .br files written; pip install brotli)")
+
+
+def file_sizes(paths):
+    """Size rows like compress_files', without compressing (gzip / brotli None)."""
+    return [{"file": os.path.basename(path), "raw": os.path.getsize(path), "gzip": None, "brotli": None}
+            for path in paths]
+
+
+def over_budget(rows, budget=DEFAULT_BUDGET_BYTES):
+    """Rows whose uncompressed size exceeds `budget` bytes (0 disables the check)."""
+    if not budget:
+        return []
+    return [row for row in rows if row['raw'] > budget]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings for JSON data files.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET_BYTES,
+                        help="Fail if a file is larger than this many bytes (0 = no limit, default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    rows = compress_files(args.files)
+    print_size_table(rows)
+    too_big = over_budget(rows, args.budget)
+    for row in too_big:
+        print(f"Over budget: {row['file']} is {row['raw']:,} bytes (budget {args.budget:,})")
+    return 1 if too_big else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# --- Configuration ---
+# Statuses worth another try: rate limiting and transient server trouble.
+# Everything else (200, 404, ...) is a final answer.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+# Never wait longer than this, even if the server asks for it via Retry-After
+RETRY_AFTER_CAP = 120.0
+
+# Per-host circuit breaker: after this many consecutive failures the host is
+# left alone for BREAKER_RESET_TIMEOUT seconds, then a single probe decides.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0
+# How often callers re-check while a half-open probe is in flight
+BREAKER_PROBE_POLL = 0.5
+# Total seconds one request may spend waiting on an open / half-open breaker.
+# These waits do not use up attempts; past this the request gives up.
+DEFAULT_BREAKER_DEADLINE = 4 * BREAKER_RESET_TIMEOUT
+
+
+class RetriesExhausted(Exception):
+    """Raised when a request still fails after every allowed attempt."""
+
+    def __init__(self, url, reason, ref=None):
+        super().__init__(f"{reason} after retries: {url}")
+        self.url = url
+        self.reason = reason
+        self.ref = ref
+
+
+class RetryPolicy:
+    """Capped exponential backoff with jitter, honouring Retry-After."""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 breaker_deadline=DEFAULT_BREAKER_DEADLINE):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_deadline = breaker_deadline
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait after failed attempt number `attempt` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # "Equal jitter": always wait at least half the ceiling so a burst of
+        # workers failing together does not retry in lock-step.
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, RETRY_AFTER_CAP))
+        return delay
+
+
+def parse_retry_after(value):
+    """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Closed -> (threshold consecutive failures) -> open -> (reset timeout)
+    -> half-open: one probe request; success closes, failure re-opens.
+    """
+
+    def __init__(self, host, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait_time(self):
+        """0 if a request may go out now, else seconds to hold off."""
+        with self.lock:
+            if self.state == "closed":
+                return 0.0
+            if self.state == "open":
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    return remaining
+                # Let exactly one probe through
+                self.state = "half-open"
+                return 0.0
+            return BREAKER_PROBE_POLL
+
+    def record_success(self):
+        with self.lock:
+            if self.state != "closed":
+                print(f"  Circuit closed for {self.host}")
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"  Circuit open for {self.host} ({self.failures} consecutive failures)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    host = urlsplit(url).netloc.lower()
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def configure(max_attempts=None):
+    global DEFAULT_POLICY
+    if max_attempts is not None:
+        DEFAULT_POLICY = RetryPolicy(max_attempts=max_attempts)
+
+
+def next_step(policy, breaker, attempt, response=None, error=None):
+    """
+    Shared decision logic for the sync and async clients, called after an
+    attempt. Returns (done, delay, reason).
+    """
+    if error is None and response.status_code not in RETRYABLE_STATUSES:
+        # The host answered; 4xx answers are final but not the host's fault
+        breaker.record_success()
+        return True, 0.0, None
+
+    breaker.record_failure()
+    if error is not None:
+        return False, policy.backoff(attempt), str(error)
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    return False, policy.backoff(attempt, retry_after), f"HTTP {response.status_code}"
+
+
+def breaker_wait(policy, breaker, url, waited):
+    """
+    Seconds to hold off before the next attempt (0 = send it now), given
+    `waited` seconds already spent on the breaker by this request. Raises
+    RetriesExhausted once that would go past policy.breaker_deadline.
+    """
+    wait = breaker.wait_time()
+    if wait <= 0:
+        return 0.0
+    if waited >= policy.breaker_deadline:
+        raise RetriesExhausted(url, f"circuit open for {breaker.host}")
+    return min(wait, policy.breaker_deadline - waited)
+
+
+def call_with_retry(attempt_fn, url, retry_on=(), policy=None):
+    """
+    Runs `attempt_fn()` (one HTTP request returning a response) until it
+    yields a non-retryable answer. Raises RetriesExhausted otherwise.
+    Only requests actually sent count as attempts; time spent waiting on
+    the circuit breaker is bounded by policy.breaker_deadline instead.
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = breaker_for(url)
+    attempt = 0
+    waited = 0.0
+
+    while True:
+        wait = breaker_wait(policy, breaker, url, waited)
+        if wait > 0:
+            time.sleep(wait)
+            waited += wait
+            continue
+
+        attempt += 1
+        try:
+            response = attempt_fn()
+        except retry_on as e:
+            done, delay, reason = next_step(policy, breaker, attempt, error=e)
+        except BaseException:
+            # Not retried, but it still counts against the host: were this
+            # the half-open probe, the breaker would otherwise never settle
+            breaker.record_failure()
+            raise
+        else:
+            done, delay, reason = next_step(policy, breaker, attempt, response=response)
+            if done:
+                return response
+
+        if attempt >= policy.max_attempts:
+            raise RetriesExhausted(url, reason)
+        time.sleep(delay)
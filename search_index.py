@@ -0,0 +1,391 @@
+"""
+Positional inverted index over the Torah text, for word and phrase search.
+
+Fields:
+  standard  text_clean (Tikun text) of the standard version
+  yemenite  text_clean of the Yemenite version (Yemenite aliyah breaks)
+  targum    Targum Onkelos with niqqud, trope and punctuation stripped
+
+Tokens are split on spaces and maqaf, so "משה" also finds "אל־משה".
+Queries go through the same normalization, so they may carry niqqud.
+Hits report the word offset the app uses: the index of the
+whitespace-separated word of the verse text (as TorahView splits it), so
+both halves of "אל־משה" are at the same offset.
+
+On disk: magic "TSI2" | u32 header length | header JSON | postings blob.
+The header holds the document table (one document per verse of a
+parasha) and, per field, term -> [offset, length] into the blob and the
+documents whose token positions and word offsets differ. A posting list
+is varint-encoded:
+    doc_count, then per document: doc delta, position count, position deltas
+
+    python search_index.py build public/data/parashot/*.json
+    python search_index.py query "ויאמר משה"
+    python search_index.py bench                # repeated full-corpus lookups
+"""
+import os
+import re
+import json
+import time
+import bisect
+import struct
+import argparse
+import functools
+from collections import namedtuple
+import hebrew_normalizer
+from corpus_db import load_parasha_files
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, "build", "search_index.bin")
+
+MAGIC = b"TSI2"
+FIELDS = ("standard", "yemenite", "targum")
+# Decoded posting lists kept in memory per index
+POSTINGS_CACHE_SIZE = 4096
+
+# Whitespace and maqaf separate words; Setuma/Petucha gaps are whitespace too
+TOKEN_SPLIT_RE = re.compile(r'[\s־]+')
+# Timed by `bench`: frequent words, a rare one, a maqaf-joined one, phrases
+# Cold runs per query in `bench` (caches emptied before each; the best counts)
+BENCH_COLD_REPEAT = 20
+BENCH_QUERIES = ["משה", "יהוה", "ויאמר", "אל", "בצלאל", "אל־משה", "ויאמר משה", "וידבר יהוה אל משה לאמר"]
+
+Hit = namedtuple("Hit", "parasha aliyah chapter verse offset")
+# A varint of two or more bytes
+MULTI_BYTE_RE = re.compile(rb'[\x80-\xff]+[\x00-\x7f]')
+
+
+def tokenize(text):
+    """Strips niqqud, trope and punctuation and splits into words."""
+    if not text:
+        return []
+    return [token for token in TOKEN_SPLIT_RE.split(text.translate(hebrew_normalizer.DELETE_TABLE)) if token]
+
+
+def tokenize_words(text):
+    """
+    tokenize(text), plus the shifts mapping token positions to word
+    offsets: a flat [position, shift, ...] list, from each position on
+    word offset = position - shift. Empty when the two agree.
+    """
+    tokens = []
+    shifts = []
+    shift = 0
+    for offset, word in enumerate((text or "").split()):
+        for piece in tokenize(word):
+            position = len(tokens)
+            if position - offset != shift:
+                shift = position - offset
+                shifts += [position, shift]
+            tokens.append(piece)
+    return tokens, shifts
+
+
+# --- Varints ---
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(data, start, end):
+    chunk = bytes(data[start:end])
+    # Nearly every value fits one byte: copy those runs, decode the rest
+    if chunk.isascii():
+        return list(chunk)
+    values = []
+    position = 0
+    for match in MULTI_BYTE_RE.finditer(chunk):
+        values += chunk[position:match.start()]
+        value = shift = 0
+        for byte in match.group():
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        values.append(value)
+        position = match.end()
+    values += chunk[position:]
+    return values
+
+
+def encode_postings(postings):
+    """[(doc_id, [positions...]), ...] sorted by doc_id -> bytes."""
+    out = bytearray()
+    encode_varint(len(postings), out)
+    previous_doc = 0
+    for doc_id, positions in postings:
+        encode_varint(doc_id - previous_doc, out)
+        previous_doc = doc_id
+        encode_varint(len(positions), out)
+        previous_position = 0
+        for position in positions:
+            encode_varint(position - previous_position, out)
+            previous_position = position
+    return bytes(out)
+
+
+def decode_postings(values):
+    """Inverse of encode_postings, from the decoded varints -> {doc_id: [positions]}."""
+    postings = {}
+    doc_id = 0
+    i = 1
+    for _ in range(values[0]):
+        doc_id += values[i]
+        count = values[i + 1]
+        i += 2
+        position = 0
+        positions = []
+        for delta in values[i:i + count]:
+            position += delta
+            positions.append(position)
+        i += count
+        postings[doc_id] = positions
+    return postings
+
+
+# --- Building ---
+
+def collect_documents(parashot):
+    """
+    One document per verse of each parasha (Maftir repeats are skipped).
+    Returns (documents, texts) where documents[i] = [parasha, aliyah,
+    yemenite aliyah, chapter, verse] and texts[field][i] is the text.
+    """
+    documents = []
+    texts = {field: [] for field in FIELDS}
+
+    for data in parashot:
+        yemenite_aliyah = {}
+        for reading in data.get('aliyot_yemenite') or data['aliyot']:
+            for verse in reading['verses']:
+                yemenite_aliyah.setdefault((verse['chapter'], verse['verse']), reading['num'])
+
+        seen = set()
+        for reading in data['aliyot']:
+            for verse in reading['verses']:
+                key = (verse['chapter'], verse['verse'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                documents.append([data['id'], reading['num'], yemenite_aliyah.get(key, reading['num'])] + list(key))
+                texts['standard'].append(verse['versions']['standard']['text_clean'])
+                texts['yemenite'].append(verse['versions']['yemenite']['text_clean'])
+                texts['targum'].append(verse['targum'])
+    return documents, texts
+
+
+def build(parashot, path=DEFAULT_INDEX_PATH):
+    documents, texts = collect_documents(parashot)
+
+    blob = bytearray()
+    terms = {}
+    shifts = {}
+    for field in FIELDS:
+        inverted = {}
+        field_shifts = shifts[field] = {}
+        for doc_id, text in enumerate(texts[field]):
+            tokens, doc_shifts = tokenize_words(text)
+            if doc_shifts:
+                field_shifts[doc_id] = doc_shifts
+            for position, token in enumerate(tokens):
+                inverted.setdefault(token, {}).setdefault(doc_id, []).append(position)
+
+        field_terms = terms[field] = {}
+        for token in sorted(inverted):
+            encoded = encode_postings(sorted(inverted[token].items()))
+            field_terms[token] = [len(blob), len(encoded)]
+            blob += encoded
+
+    header = json.dumps(
+        {"fields": list(FIELDS), "documents": documents, "terms": terms, "shifts": shifts},
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return {
+        "documents": len(documents),
+        "terms": sum(len(t) for t in terms.values()),
+        "postings_bytes": len(blob)
+    }
+
+
+# --- Querying ---
+
+class SearchIndex:
+    """
+        index = SearchIndex.load()
+        index.search("משה")                      # every occurrence of a word
+        index.search("ויאמר משה", field="targum") # phrase, in the Targum
+    """
+
+    def __init__(self, header, blob):
+        self.documents = header['documents']
+        self.terms = header['terms']
+        self.blob = blob
+        # field -> {doc_id: ([positions], [shifts])}, see tokenize_words
+        self.shifts = {field: {int(doc_id): (flat[0::2], flat[1::2]) for doc_id, flat in docs.items()}
+                       for field, docs in header['shifts'].items()}
+        self._postings = functools.lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._load_postings)
+        self._word_hits = functools.lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._load_word_hits)
+        self._phrase_hits = functools.lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._load_phrase_hits)
+        standard = [(d[0], d[1], d[3], d[4]) for d in self.documents]
+        yemenite = [(d[0], d[2], d[3], d[4]) for d in self.documents]
+        self._locations = {"standard": standard, "yemenite": yemenite, "targum": standard}
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a search index: {path}")
+        (header_length,) = struct.unpack_from('<I', data, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(data[start:start + header_length])
+        return cls(header, memoryview(data)[start + header_length:])
+
+    def _load_postings(self, field, token):
+        entry = self.terms[field].get(token)
+        if entry is None:
+            return {}
+        offset, length = entry
+        return decode_postings(decode_varints(self.blob, offset, offset + length))
+
+    def _word_offset(self, field, doc_id, position):
+        shifts = self.shifts[field].get(doc_id)
+        if shifts is None:
+            return position
+        at = bisect.bisect_right(shifts[0], position)
+        return position - shifts[1][at - 1] if at else position
+
+    def _load_word_hits(self, field, token):
+        locations = self._locations[field]
+        shifts = self.shifts[field]
+        hits = []
+        # Posting lists are stored in document order
+        for doc_id, positions in self._postings(field, token).items():
+            location = locations[doc_id]
+            if doc_id in shifts:
+                positions = [self._word_offset(field, doc_id, position) for position in positions]
+            hits += [Hit._make((*location, position)) for position in positions]
+        return tuple(hits)
+
+    def postings(self, token, field="standard"):
+        """{doc_id: [positions]} of one normalized token."""
+        return self._postings(field, token)
+
+    def search(self, query, field="standard"):
+        """
+        Every occurrence of the word / phrase `query` in `field`, as Hits
+        (parasha, aliyah, chapter, verse, word offset), in corpus order.
+        The word offset counts whitespace-separated words of the verse.
+        """
+        if field not in self.terms:
+            raise ValueError(f"Unknown field: {field} (one of {', '.join(self.terms)})")
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        if len(tokens) == 1:
+            return list(self._word_hits(field, tokens[0]))
+        return list(self._phrase_hits(field, tuple(tokens)))
+
+    def _load_phrase_hits(self, field, tokens):
+        lists = [self._postings(field, token) for token in tokens]
+        locations = self._locations[field]
+        first = lists[0]
+
+        # Intersect starting from the rarest term
+        rarest = min(lists, key=len)
+        doc_ids = sorted(set(rarest).intersection(*lists))
+        hits = []
+        for doc_id in doc_ids:
+            following = [postings[doc_id] for postings in lists[1:]]
+            for start in first[doc_id]:
+                if all(start + i in positions for i, positions in enumerate(following, 1)):
+                    hits.append(Hit(*locations[doc_id], self._word_offset(field, doc_id, start)))
+        return tuple(hits)
+
+
+# --- Benchmark ---
+
+def _best_time(run, repeat, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(index, queries, field="standard", repeat=1000, cold_repeat=BENCH_COLD_REPEAT):
+    """
+    Times each query over the whole corpus, best of several runs each way:
+    cold, with every cache emptied first (postings decoded, hits built),
+    and cached, a repeated query answered from the result caches.
+    """
+    def clear():
+        index._postings.cache_clear()
+        index._word_hits.cache_clear()
+        index._phrase_hits.cache_clear()
+
+    print(f"{'query':<28}{'hits':>7}{'cold ms':>10}{'cached µs':>11}")
+    under = 0
+    for query in queries:
+        hits = index.search(query, field)
+        cold = _best_time(lambda: index.search(query, field), cold_repeat, clear)
+        cached = _best_time(lambda: index.search(query, field), repeat)
+        under += cold < 0.001
+        print(f"{query:<28}{len(hits):>7}{cold * 1000:>10.3f}{cached * 1e6:>11.1f}")
+    print(f"Cold under 1 ms: {under} of {len(queries)} queries "
+          f"(cold cost grows with the hits: ~1 µs each to build; cached = result cache hit)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index path (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Build from parasha JSON files")
+    build_parser.add_argument("files", nargs="+")
+    query_parser = commands.add_parser("query", help="Print every occurrence of a word or phrase")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--field", choices=FIELDS, default="standard")
+    bench_parser = commands.add_parser("bench", help="Time repeated lookups over the whole corpus")
+    bench_parser.add_argument("queries", nargs="*", default=BENCH_QUERIES)
+    bench_parser.add_argument("--field", choices=FIELDS, default="standard")
+    bench_parser.add_argument("--repeat", type=int, default=1000, help="Warm lookups per query; the best is shown")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        counts = build(load_parasha_files(args.files), args.index)
+        print(f"Search index: {counts['documents']} verses, {counts['terms']} terms, "
+              f"{counts['postings_bytes']:,} bytes of postings -> {args.index}")
+        return
+
+    start = time.perf_counter()
+    index = SearchIndex.load(args.index)
+    if args.command == "bench":
+        print(f"Index loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        bench(index, args.queries, args.field, args.repeat)
+        return
+
+    start = time.perf_counter()
+    hits = index.search(args.query, args.field)
+    elapsed = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        print(f"{hit.parasha} aliyah {hit.aliyah}  {hit.chapter}:{hit.verse}  word {hit.offset}")
+    print(f"{len(hits)} hits in {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
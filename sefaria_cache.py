@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "sefaria")
+# Entries younger than the TTL are served without touching the network.
+# Older entries are revalidated (ETag / Last-Modified) when next requested.
+DEFAULT_TTL = 7 * 24 * 3600
+# Eviction: entries unused for this long are dropped, and the least recently
+# used entries go first once the cache grows past MAX_BYTES.
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Sefaria answers 404 for a missing version (e.g. no Yemenite text for a
+# book). Those answers are stable, so they are cached just like a 200.
+CACHEABLE_STATUSES = {200, 404}
+
+# HTTP's answer to "only-if-cached" when there is nothing cached.
+OFFLINE_MISS_STATUS = 504
+
+_config = {
+    "dir": DEFAULT_CACHE_DIR,
+    "ttl": DEFAULT_TTL,
+    "enabled": True,
+    "offline": False
+}
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "offline_misses": 0}
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response, backed by a cache entry."""
+
+    def __init__(self, url, status_code, body, headers=None, from_cache=True):
+        self.url = url
+        self.status_code = status_code
+        self.text = body
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"{self.status_code} for cached url: {self.url}")
+
+
+def configure(cache_dir=None, ttl=None, enabled=None, offline=None):
+    if cache_dir is not None:
+        _config["dir"] = cache_dir
+    if ttl is not None:
+        _config["ttl"] = ttl
+    if enabled is not None:
+        _config["enabled"] = enabled
+    if offline is not None:
+        _config["offline"] = offline
+
+
+def is_enabled():
+    return _config["enabled"] or _config["offline"]
+
+
+def is_offline():
+    return _config["offline"]
+
+
+def normalize_url(url):
+    """
+    Canonical form of an API URL: spaces and underscores are interchangeable
+    in Sefaria refs, and query parameter order does not matter.
+    """
+    parts = urlsplit(url)
+    path = unquote(parts.path).replace(' ', '_')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+def _entry_path(url):
+    key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+    return os.path.join(_config["dir"], key[:2], f"{key}.json")
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def load(url):
+    """Returns the cache entry dict for url, or None."""
+    path = _entry_path(url)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # mtime doubles as the LRU clock for eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+
+def is_fresh(entry):
+    return time.time() - entry.get("fetched_at", 0) < _config["ttl"]
+
+
+def revalidation_headers(entry):
+    """Conditional request headers for a stale entry."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def to_response(entry):
+    return CachedResponse(entry["url"], entry["status"], entry["body"])
+
+
+def _write(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def store(url, status, body, headers):
+    """Saves a response if its status is cacheable. Returns the entry or None."""
+    if status not in CACHEABLE_STATUSES:
+        return None
+    entry = {
+        "url": url,
+        "status": status,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+        "sha256": hashlib.sha256(body.encode('utf-8')).hexdigest(),
+        "body": body
+    }
+    _write(_entry_path(url), entry)
+    _count("stored")
+    return entry
+
+
+def refresh(url, entry, headers):
+    """Marks a stale entry as fresh again after a 304 Not Modified."""
+    entry["fetched_at"] = time.time()
+    entry["etag"] = headers.get("ETag") or entry.get("etag")
+    entry["last_modified"] = headers.get("Last-Modified") or entry.get("last_modified")
+    _write(_entry_path(url), entry)
+    _count("revalidated")
+    return entry
+
+
+def lookup(url):
+    """
+    First half of a cache-aware GET.
+    Returns (response, entry): `response` is set when the cache can answer
+    without the network; otherwise `entry` is the stale entry (or None) to
+    revalidate against and pass to record().
+    """
+    if not is_enabled():
+        return None, None
+
+    entry = load(url)
+    if entry and (is_fresh(entry) or is_offline()):
+        _count("hits")
+        return to_response(entry), entry
+
+    if is_offline():
+        _count("offline_misses")
+        return CachedResponse(url, OFFLINE_MISS_STATUS, "", from_cache=False), None
+
+    _count("misses")
+    return None, entry
+
+
+def record(url, entry, status, body, headers, response=None):
+    """
+    Second half of a cache-aware GET: stores the network answer and
+    returns the response the caller should use.
+    """
+    if status == 304 and entry:
+        return to_response(refresh(url, entry, headers))
+    if is_enabled():
+        store(url, status, body, headers)
+    return response if response is not None else CachedResponse(url, status, body, dict(headers), from_cache=False)
+
+
+def fetch(url, send):
+    """
+    Cache-aware GET. `send(url, headers)` performs the real request and
+    returns a requests.Response.
+    """
+    cached, entry = lookup(url)
+    if cached is not None:
+        return cached
+
+    response = send(url, revalidation_headers(entry))
+    # JSON bodies are UTF-8; avoid requests' charset sniffing on .text
+    body = response.content.decode('utf-8', errors='replace')
+    return record(url, entry, response.status_code, body, response.headers, response)
+
+
+def prune(max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Evicts entries older than max_age, then least-recently-used entries
+    until the cache fits in max_bytes. Returns the number of files removed.
+    """
+    cache_dir = _config["dir"]
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    now = time.time()
+    files = []
+    removed = 0
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # Leftover temp files from an interrupted write
+            if name.endswith('.tmp') or now - st.st_mtime > max_age:
+                os.remove(path)
+                removed += 1
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+    return removed
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,149 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import sefaria_cache
+import retry_policy
+from rate_limit import TokenBucket
+from singleflight import SingleFlight
+
+# --- Configuration ---
+# One keep-alive Session per worker thread. The adapter pool is sized to the
+# ETL's worker count so concurrent requests to sefaria.org never have to open
+# (and then throw away) extra connections.
+DEFAULT_POOL_SIZE = 3
+# Global request budget towards the API (replaces fixed sleeps between
+# requests). Only requests that actually go out over the network count.
+DEFAULT_RATE = 8.0
+DEFAULT_MAX_IN_FLIGHT = 6
+# Characters of response bodies the in-run memo may hold (least recently
+# used answers go first), so it does not lift the ETL's memory ceiling
+MEMO_MAX_CHARS = 16 * 1024 * 1024
+
+_local = threading.local()
+_lock = threading.Lock()
+_sessions = []
+_pool_size = DEFAULT_POOL_SIZE
+_bucket = TokenBucket(DEFAULT_RATE)
+_in_flight = threading.BoundedSemaphore(DEFAULT_MAX_IN_FLIGHT)
+
+
+def memo_entry(response):
+    """What the in-run memo keeps of a stable (200/404) answer: status and body, no headers."""
+    if response.status_code not in sefaria_cache.CACHEABLE_STATUSES:
+        return None
+    return sefaria_cache.CachedResponse(response.url, response.status_code,
+                                        response.content.decode('utf-8', errors='replace'))
+
+
+def memo_weight(entry):
+    return len(entry.text)
+
+
+# Identical URLs asked for during one run (shared haftarot, overlapping
+# override aliyot) share one request, and stable answers are memoized
+# until close_all(). Keyed like the disk cache.
+_flights = SingleFlight(memoize=memo_entry, weigh=memo_weight, max_weight=MEMO_MAX_CHARS)
+
+
+def configure(pool_size, rate=None, max_in_flight=None):
+    """
+    Sets the connection pool size used for sessions created from now on,
+    and optionally the global rate limit (requests/sec, max in flight).
+    """
+    global _pool_size, _bucket, _in_flight
+    with _lock:
+        _pool_size = max(1, int(pool_size))
+        if rate is not None:
+            _bucket = TokenBucket(rate)
+        if max_in_flight is not None:
+            _in_flight = threading.BoundedSemaphore(max(1, int(max_in_flight)))
+
+
+def get_session():
+    """Returns the calling thread's Session, creating it on first use."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        with _lock:
+            adapter = HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size)
+            _sessions.append(session)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def get(url, timeout=30):
+    """
+    Drop-in replacement for requests.get() that reuses pooled connections,
+    retries transient failures and goes through the on-disk response cache
+    (see sefaria_cache). Repeats of a URL within the run share its response.
+    Raises retry_policy.RetriesExhausted.
+    """
+    def send(request_url, headers):
+        def attempt():
+            with _in_flight:
+                _bucket.acquire()
+                return get_session().get(request_url, headers=headers, timeout=timeout)
+
+        # Transient failures (429/5xx, dropped connections) are retried with
+        # backoff; see retry_policy for the circuit breaker.
+        return retry_policy.call_with_retry(
+            attempt, request_url, retry_on=(requests.ConnectionError, requests.Timeout)
+        )
+
+    return _flights.do(sefaria_cache.normalize_url(url), lambda: sefaria_cache.fetch(url, send))
+
+
+def dedup_stats():
+    """SingleFlight.stats() of the requests made through get() this run."""
+    return _flights.stats()
+
+
+def _iter_connection_pools(session):
+    for adapter in session.adapters.values():
+        pools = getattr(adapter.poolmanager, 'pools', None)
+        if pools is None:
+            continue
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                yield pool
+
+
+def connection_stats():
+    """
+    Aggregates urllib3 pool counters over every session.
+    Returns dict(sessions=..., requests=..., connections=..., reused=...)
+    """
+    with _lock:
+        sessions = list(_sessions)
+
+    total_requests = 0
+    total_connections = 0
+    seen = set()
+    for session in sessions:
+        for pool in _iter_connection_pools(session):
+            if id(pool) in seen:
+                continue
+            seen.add(id(pool))
+            total_requests += getattr(pool, 'num_requests', 0)
+            total_connections += getattr(pool, 'num_connections', 0)
+
+    return {
+        "sessions": len(sessions),
+        "requests": total_requests,
+        "connections": total_connections,
+        "reused": max(0, total_requests - total_connections)
+    }
+
+
+def close_all():
+    """Closes every session (and its pooled sockets) and forgets the run's memoized responses."""
+    _flights.clear()
+    with _lock:
+        sessions = list(_sessions)
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+    _local.__dict__.pop('session', None)
@@ -0,0 +1,269 @@
+"""
+Offline stand-in for the Sefaria API: replays recorded responses, with
+optional injected latency, errors and rate limiting, so the ETL can be
+tested and benchmarked without sefaria.org.
+
+Fixtures are recorded responses keyed by path and query (the host is
+ignored, and refs match with spaces or underscores, as in sefaria_cache).
+Get them by importing the ETL's response cache, or by recording through
+the server:
+
+    python sefaria_fixtures.py import-cache
+    python sefaria_fixtures.py serve --record https://www.sefaria.org
+    python sefaria_fixtures.py serve --latency 80 --jitter 40 --error-rate 0.05 --throttle-rate 0.02
+
+and point the ETL (or any debug_sefaria*.py script) at it:
+
+    SEFARIA_API_BASE=http://127.0.0.1:8765/api python etl_pipeline.py --no-cache --force
+
+Requests without a fixture get a 404 (and are counted as misses) unless
+--record is given. GET /_fixtures/stats returns the server's counters.
+In-process, for benchmarks and tests:
+
+    server = sefaria_fixtures.start(latency=0.05)
+    etl_pipeline.main(["--api-base", server.api_base, "--no-cache", "--force"])
+    server.stats(); server.shutdown()
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, urlunsplit
+import sefaria_cache
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE_DIR = os.path.join(BASE_DIR, ".cache", "fixtures")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Path prefix of the API, as in etl_pipeline.SEFARIA_API_BASE
+API_PREFIX = "/api"
+STATS_PATH = "/_fixtures/stats"
+# Seconds a throttled client is asked to wait
+DEFAULT_RETRY_AFTER = 1
+RECORD_TIMEOUT = 30
+
+
+def fixture_key(url):
+    """Host-independent form of a URL: normalized path and query."""
+    parts = urlsplit(sefaria_cache.normalize_url(url))
+    return urlunsplit(('', '', parts.path, parts.query, ''))
+
+
+def _fixture_path(fixture_dir, key):
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return os.path.join(fixture_dir, digest[:2], f"{digest}.json")
+
+
+def load_fixture(fixture_dir, url):
+    try:
+        with open(_fixture_path(fixture_dir, fixture_key(url)), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_fixture(fixture_dir, url, status, body, etag=None, last_modified=None):
+    key = fixture_key(url)
+    path = _fixture_path(fixture_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fixture = {"key": key, "status": status, "etag": etag, "last_modified": last_modified, "body": body}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return fixture
+
+
+def import_cache(cache_dir=sefaria_cache.DEFAULT_CACHE_DIR, fixture_dir=DEFAULT_FIXTURE_DIR):
+    """Copies every cached Sefaria response into fixtures. Returns the count."""
+    imported = 0
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            save_fixture(fixture_dir, entry['url'], entry['status'], entry['body'],
+                         entry.get('etag'), entry.get('last_modified'))
+            imported += 1
+    return imported
+
+
+# --- Server ---
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixture_dir=DEFAULT_FIXTURE_DIR, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=DEFAULT_RETRY_AFTER,
+                 record=None, seed=None, verbose=False):
+        super().__init__(address, FixtureHandler)
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.record = record.rstrip('/') if record else None
+        self.verbose = verbose
+        # One seeded generator: a run with the same seed injects the same
+        # number of faults (which request gets one depends on thread timing)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "served": 0, "not_modified": 0, "misses": 0,
+                         "recorded": 0, "errors": 0, "throttled": 0}
+
+    @property
+    def api_base(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def roll(self):
+        with self.lock:
+            return self.random.random(), self.random.random()
+
+    def delay(self):
+        with self.lock:
+            spread = self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + spread)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def fetch_upstream(self, path):
+        import requests
+        response = requests.get(self.record + path, timeout=RECORD_TIMEOUT)
+        if response.status_code not in sefaria_cache.CACHEABLE_STATUSES:
+            return {"status": response.status_code, "etag": None, "last_modified": None,
+                    "body": response.content.decode('utf-8', errors='replace')}
+        self.count("recorded")
+        return save_fixture(self.fixture_dir, path, response.status_code,
+                            response.content.decode('utf-8', errors='replace'),
+                            response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            if value is not None:
+                self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == STATS_PATH:
+            return self.send_body(200, json.dumps(server.stats()))
+        server.count("requests")
+
+        wait = server.delay()
+        if wait:
+            time.sleep(wait)
+        throttle_roll, error_roll = server.roll()
+        if throttle_roll < server.throttle_rate:
+            server.count("throttled")
+            return self.send_body(429, '{"error": "Too many requests"}', {"Retry-After": str(server.retry_after)})
+        if error_roll < server.error_rate:
+            server.count("errors")
+            return self.send_body(503, '{"error": "Service unavailable"}')
+
+        fixture = load_fixture(server.fixture_dir, self.path)
+        if fixture is None and server.record:
+            fixture = server.fetch_upstream(self.path)
+        if fixture is None:
+            server.count("misses")
+            print(f"No fixture for {fixture_key(self.path)}")
+            return self.send_body(404, json.dumps({"error": f"No fixture for {self.path}"}))
+
+        headers = {"ETag": fixture.get('etag'), "Last-Modified": fixture.get('last_modified')}
+        if fixture.get('etag') and self.headers.get("If-None-Match") == fixture['etag']:
+            server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", fixture['etag'])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        server.count("served")
+        self.send_body(fixture['status'], fixture['body'], headers)
+
+
+def start(host=DEFAULT_HOST, port=0, **options):
+    """Starts a FixtureServer in a daemon thread (port 0 = any free port) and returns it."""
+    server = FixtureServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="sefaria-fixtures", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded Sefaria API responses for offline ETL runs.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Fixture directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the stand-in server")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--latency", type=float, default=0.0, metavar="MS",
+                              help="Added delay per request, in milliseconds")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, metavar="MS",
+                              help="Random +/- spread of the delay, in milliseconds")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0,
+                              help="Fraction of requests answered with 503")
+    serve_parser.add_argument("--throttle-rate", type=float, default=0.0,
+                              help="Fraction of requests answered with 429")
+    serve_parser.add_argument("--retry-after", type=int, default=DEFAULT_RETRY_AFTER,
+                              help="Retry-After seconds sent with a 429 (default: %(default)s)")
+    serve_parser.add_argument("--record", metavar="ORIGIN",
+                              help="Fetch and save missing fixtures from this origin, e.g. https://www.sefaria.org")
+    serve_parser.add_argument("--seed", type=int, help="Seed for the injected faults and jitter")
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request")
+
+    import_parser = commands.add_parser("import-cache", help="Turn the ETL response cache into fixtures")
+    import_parser.add_argument("--cache-dir", default=sefaria_cache.DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "import-cache":
+        count = import_cache(args.cache_dir, args.fixtures)
+        print(f"Imported {count} responses from {args.cache_dir} into {args.fixtures}")
+        return
+
+    server = FixtureServer(
+        (args.host, args.port), fixture_dir=args.fixtures,
+        latency=args.latency / 1000, jitter=args.jitter / 1000,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        record=args.record, seed=args.seed, verbose=args.verbose
+    )
+    print(f"Serving {args.fixtures} at {server.api_base} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Parsed Sefaria refs and range algebra.
+
+A RefRange is 'Book C:V-C:V' as a tuple (book, start_chapter, start_verse,
+end_chapter, end_verse); a verse of None means "whole chapter", so
+'Numbers 16-18' is ('Numbers', 16, None, 18, None). Books may be several
+words ('Second Kings', 'Song of Songs') and ranges may use en/em dashes.
+
+    r = RefRange.parse("Numbers 16:1-17:15")
+    r.contains(RefRange.parse("Numbers 16:20-35"))   # True
+    str(r.intersection(RefRange.parse("Numbers 17")))  # 'Numbers 17:1-15'
+    merge(["Numbers 16:1-13", "Numbers 16:14-17:15"])  # [RefRange('Numbers 16:1-17:15')]
+
+Verse counts follow the Hebrew (Masoretic) numbering Sefaria serves.
+"""
+import re
+import functools
+from collections import namedtuple
+
+TORAH_BOOKS = ("Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy")
+
+# Verses per chapter, precomputed from the generated parashot
+CHAPTER_LENGTHS = {
+    "Genesis": (
+        31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18, 34, 24, 20, 67, 34,
+        35, 46, 22, 35, 43, 54, 33, 20, 31, 29, 43, 36, 30, 23, 23, 57, 38, 34, 34, 28, 34, 31, 22, 33, 26
+    ),
+    "Exodus": (
+        22, 25, 22, 31, 23, 30, 29, 28, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 23,
+        37, 30, 33, 18, 40, 37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38
+    ),
+    "Leviticus": (
+        17, 16, 17, 35, 26, 23, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27, 24, 33, 44, 23, 55, 46, 34
+    ),
+    "Numbers": (
+        54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 35, 28, 32,
+        22, 29, 35, 41, 30, 25, 18, 65, 23, 31, 39, 17, 54, 42, 56, 29, 34, 13
+    ),
+    "Deuteronomy": (
+        46, 37, 29, 49, 30, 25, 26, 20, 29, 22, 32, 31, 19, 29, 23, 22, 20,
+        22, 21, 20, 23, 29, 26, 22, 19, 19, 26, 69, 28, 20, 30, 52, 29, 12
+    ),
+}
+
+# Stands in for the last verse of a chapter whose length is not in the table
+END_OF_CHAPTER = 1 << 16
+
+REF_PATTERN = re.compile(
+    r"^(?P<book>[A-Za-z][A-Za-z' ]*?) (?P<ch>\d+)(?::(?P<v>\d+))?"
+    r"(?:\s*[-–—]\s*(?:(?P<end_ch>\d+):)?(?P<end>\d+))?$"
+)
+# Footnote markers ('[73]') and stray separators in hand-maintained ref lists
+FOOTNOTE_RE = re.compile(r'\[\d+\]')
+DASH_RE = re.compile(r'\s*[–—]\s*')
+
+
+def is_torah(book):
+    return book in TORAH_BOOKS
+
+
+def chapter_length(book, chapter):
+    """Verses in a chapter, or None when the book is not in CHAPTER_LENGTHS."""
+    lengths = CHAPTER_LENGTHS.get(book)
+    if lengths is None:
+        return None
+    if not 1 <= chapter <= len(lengths):
+        raise ValueError(f"{book} has no chapter {chapter}")
+    return lengths[chapter - 1]
+
+
+class RefRange(namedtuple("RefRange", "book start_chapter start_verse end_chapter end_verse")):
+    __slots__ = ()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def parse(ref):
+        """
+        'Book C:V-C:V', 'Book C:V-V', 'Book C:V', 'Book C-C' or 'Book C'.
+        Raises ValueError for anything else, and for chapters or verses that
+        do not exist in a book with known chapter lengths.
+        """
+        match = REF_PATTERN.match(ref.strip())
+        if not match:
+            raise ValueError(f"Unrecognized ref: {ref}")
+        book = match.group('book')
+        start_ch = int(match.group('ch'))
+        start_v = int(match.group('v')) if match.group('v') else None
+        end = int(match.group('end')) if match.group('end') else None
+
+        if start_v is None:
+            if match.group('end_ch'):
+                raise ValueError(f"Unrecognized ref: {ref}")
+            # Chapter range: 'Book C' or 'Book C-C'
+            parsed = RefRange(book, start_ch, None, end or start_ch, None)
+        elif match.group('end_ch'):
+            parsed = RefRange(book, start_ch, start_v, int(match.group('end_ch')), end)
+        else:
+            parsed = RefRange(book, start_ch, start_v, start_ch, end or start_v)
+        parsed.validate(ref)
+        return parsed
+
+    def validate(self, ref=None):
+        if self.start > self.end or min(self.start_chapter, self.end_chapter) < 1 or self.start[1] < 1:
+            raise ValueError(f"Empty or inverted ref: {ref or self}")
+        if self.book in CHAPTER_LENGTHS:
+            for chapter, verse in (self.start, self.end):
+                if verse > chapter_length(self.book, chapter):
+                    raise ValueError(f"{self.book} {chapter} has no verse {verse}: {ref or self}")
+
+    @property
+    def start(self):
+        """First verse as (chapter, verse)."""
+        return (self.start_chapter, self.start_verse or 1)
+
+    @property
+    def end(self):
+        """Last verse as (chapter, verse); END_OF_CHAPTER when its length is unknown."""
+        if self.end_verse is not None:
+            return (self.end_chapter, self.end_verse)
+        return (self.end_chapter, chapter_length(self.book, self.end_chapter) or END_OF_CHAPTER)
+
+    def __str__(self):
+        book, start_ch, start_v, end_ch, end_v = self
+        if start_v is None and end_v is None:
+            return f"{book} {start_ch}" if start_ch == end_ch else f"{book} {start_ch}-{end_ch}"
+        (start_ch, start_v), (end_ch, end_v) = self.start, self.end
+        if end_v == END_OF_CHAPTER:
+            raise ValueError(f"Cannot write a verse range ending at an unknown chapter end: {self!r}")
+        if start_ch != end_ch:
+            return f"{book} {start_ch}:{start_v}-{end_ch}:{end_v}"
+        return f"{book} {start_ch}:{start_v}" if start_v == end_v else f"{book} {start_ch}:{start_v}-{end_v}"
+
+    def chapters(self):
+        """The whole chapters this range touches."""
+        return RefRange(self.book, self.start_chapter, None, self.end_chapter, None)
+
+    def verses(self):
+        """(chapter, verse) of every verse in order; needs the book's chapter lengths."""
+        if self.book not in CHAPTER_LENGTHS:
+            raise ValueError(f"No chapter lengths for {self.book}")
+        (start_ch, start_v), (end_ch, end_v) = self.start, self.end
+        for chapter in range(start_ch, end_ch + 1):
+            first = start_v if chapter == start_ch else 1
+            last = end_v if chapter == end_ch else chapter_length(self.book, chapter)
+            for verse in range(first, last + 1):
+                yield (chapter, verse)
+
+    def verse_count(self):
+        return sum(1 for _ in self.verses())
+
+    def contains(self, other):
+        return self.book == other.book and self.start <= other.start and other.end <= self.end
+
+    def overlaps(self, other):
+        return self.book == other.book and self.start <= other.end and other.start <= self.end
+
+    def touches(self, other):
+        """Overlapping or directly adjacent, i.e. their union is one range."""
+        if self.book != other.book:
+            return False
+        first, second = sorted((self, other), key=lambda r: r.start)
+        return second.start <= _next_verse(first.book, first.end)
+
+    def intersection(self, other):
+        """The common verses as a RefRange, or None."""
+        if not self.overlaps(other):
+            return None
+        start_ref = max(self, other, key=lambda r: r.start)
+        end_ref = min(self, other, key=lambda r: r.end)
+        return RefRange(self.book, start_ref.start_chapter, start_ref.start_verse,
+                        end_ref.end_chapter, end_ref.end_verse)
+
+    def union(self, other):
+        """Both ranges as one RefRange; ValueError if there is a gap between them."""
+        if not self.touches(other):
+            raise ValueError(f"{self} and {other} are not contiguous")
+        start_ref = min(self, other, key=lambda r: r.start)
+        end_ref = max(self, other, key=lambda r: r.end)
+        return RefRange(self.book, start_ref.start_chapter, start_ref.start_verse,
+                        end_ref.end_chapter, end_ref.end_verse)
+
+
+def _next_verse(book, point):
+    chapter, verse = point
+    if verse >= (chapter_length(book, chapter) or END_OF_CHAPTER):
+        return (chapter + 1, 1)
+    return (chapter, verse + 1)
+
+
+def parse_ref(ref):
+    """RefRange.parse(ref); unpacks as (book, start_ch, start_v, end_ch, end_v)."""
+    return RefRange.parse(ref)
+
+
+def merge(refs):
+    """
+    Smallest list of ranges covering `refs` (strings or RefRanges): books in
+    order of first appearance, ranges in order within a book.
+    """
+    by_book = {}
+    for ref in refs:
+        parsed = RefRange.parse(ref) if isinstance(ref, str) else ref
+        by_book.setdefault(parsed.book, []).append(parsed)
+
+    merged = []
+    for ranges in by_book.values():
+        current = None
+        for parsed in sorted(ranges, key=lambda r: (r.start, r.end)):
+            if current is not None and current.touches(parsed):
+                current = current.union(parsed)
+            else:
+                if current is not None:
+                    merged.append(current)
+                current = parsed
+        merged.append(current)
+    return merged
+
+
+def clean_ref(ref):
+    """
+    Normalizes a hand-maintained ref ('Ezekiel 34:1–15[73]', 'Hosea 12:13-14:9;')
+    to the plain form Sefaria accepts. Raises ValueError if it is not a single
+    range (e.g. 'Check manually', '4-24', 'Isaiah 6:1-13 & 9:5-6').
+    """
+    cleaned = DASH_RE.sub('-', FOOTNOTE_RE.sub('', ref)).strip().rstrip(';,.').strip()
+    RefRange.parse(cleaned)
+    return cleaned
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """
+    Deduplicates identical calls within one ETL run. Concurrent callers
+    with the same key share one in-flight call (the others wait for its
+    result or exception). `memoize(result)` returns what to keep of a
+    result for later callers (None = nothing); kept values stay until
+    clear(), least recently used first out once their total `weigh()`
+    passes `max_weight`. Like TokenBucket, usable from threads (do) and
+    asyncio tasks (do_async).
+    """
+
+    def __init__(self, memoize=None, weigh=None, max_weight=None):
+        self.memoize = memoize or (lambda result: result)
+        self.weigh = weigh or (lambda value: 1)
+        self.max_weight = max_weight
+        self.lock = threading.Lock()
+        self.memo = OrderedDict()
+        self.weight = 0
+        self.calls = {}
+        self.tasks = {}
+        self.counters = {"calls": 0, "memo_hits": 0, "coalesced": 0, "evicted": 0}
+
+    def _remember(self, key, result):
+        value = self.memoize(result)
+        if value is None:
+            return
+        self.memo[key] = value
+        self.weight += self.weigh(value)
+        while self.max_weight is not None and self.weight > self.max_weight and self.memo:
+            _, evicted = self.memo.popitem(last=False)
+            self.weight -= self.weigh(evicted)
+            self.counters["evicted"] += 1
+
+    def _lookup(self, key):
+        value = self.memo.get(key)
+        if value is not None:
+            self.memo.move_to_end(key)
+            self.counters["memo_hits"] += 1
+        return value
+
+    def do(self, key, fn):
+        """Returns fn(), or the result of the identical call in flight or memoized."""
+        with self.lock:
+            self.counters["calls"] += 1
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                if call.error is None:
+                    self._remember(key, call.result)
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, coro_fn):
+        """Async twin of do(): `coro_fn()` returns the coroutine to run once."""
+        with self.lock:
+            self.counters["calls"] += 1
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            task = self.tasks.get(key)
+            if task is None:
+                task = self.tasks[key] = asyncio.ensure_future(coro_fn())
+                task.add_done_callback(lambda done: self._finish_task(key, done))
+            else:
+                self.counters["coalesced"] += 1
+        # Shielded: a cancelled caller must not cancel the shared request
+        return await asyncio.shield(task)
+
+    def _finish_task(self, key, task):
+        with self.lock:
+            self.tasks.pop(key, None)
+            if not task.cancelled() and task.exception() is None:
+                self._remember(key, task.result())
+
+    def stats(self):
+        """Counters plus `ratio`: the share of calls answered without a call of their own."""
+        with self.lock:
+            stats = dict(self.counters)
+        saved = stats["memo_hits"] + stats["coalesced"]
+        stats["ratio"] = saved / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    def clear(self):
+        """Forgets the memo and resets the counters (the end of a run)."""
+        with self.lock:
+            self.memo.clear()
+            self.weight = 0
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def describe(stats):
+    """One line for the run summary."""
+    return (f"{stats['calls']} requests, {stats['memo_hits']} from the run memo, "
+            f"{stats['coalesced']} joined an identical request in flight "
+            f"({stats['ratio']:.1%} deduplicated)"
+            + (f", {stats['evicted']} evicted from the memo" if stats.get("evicted") else ""))
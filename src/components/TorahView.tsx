@@ -3,6 +3,10 @@ import type { Aliyah } from '../types';
 import HintTooltip from './HintTooltip';
 import { useSettings } from '../contexts/SettingsContext';
 import { toHebrewNumeral } from '../utils/hebrewNumerals';
+import { PETUCHA_TOKEN, SETUMA_TOKEN } from '../utils/parashaSchema';
+
+// Width of a Setuma gap, as written by hebrew_normalizer.clean_text
+const SETUMA_GAP = ' '.repeat(9);
 
 interface TorahViewProps {
   aliyah: Aliyah;
@@ -20,26 +24,58 @@ interface Token {
 export default function TorahView({ aliyah, aliyahName }: TorahViewProps) {
   const { nusach, stamFont } = useSettings();
 
-  // Flatten words and spaces for single Aliyah
+  // Flatten words and spaces for single Aliyah, from the build-time Tikun
+  // tokens and word bounds (schema 1 data without them is split on whitespace)
   const tokens: Token[] = useMemo(() => {
     const flat: Token[] = [];
     
     aliyah.verses.forEach((verse) => {
-      const textClean = verse.versions?.[nusach]?.text_clean || verse.text_clean;
-      const textFull = verse.versions?.[nusach]?.text_full || verse.text_full;
+      const version = verse.versions?.[nusach];
+      const textClean = version?.text_clean || verse.text_clean;
+      const textFull = version?.text_full || verse.text_full;
       
-      // Split keeping delimiters to preserve whitespace/newlines
       // Guard against empty string (Haftarah clean text might be empty)
       if (!textClean) return;
 
+      const verseInfo = verse.chapter && verse.verse ? { chapter: verse.chapter, verse: verse.verse } : undefined;
+
+      const verseTokens = version?.tokens;
+      const bounds = version?.bounds;
+      if (verseTokens && bounds) {
+        let wordIdx = 0;
+        verseTokens.forEach((token, tIdx) => {
+          if (token === SETUMA_TOKEN || token === PETUCHA_TOKEN) {
+            flat.push({
+              id: `${verse.verse_num}-${tIdx}-space`,
+              type: 'space',
+              text: token === SETUMA_TOKEN ? SETUMA_GAP : '\n'
+            });
+            return;
+          }
+          if (wordIdx > 0 && verseTokens[tIdx - 1] >= 0) {
+            flat.push({ id: `${verse.verse_num}-${tIdx}-space`, type: 'space', text: ' ' });
+          }
+          const at = 4 * wordIdx++;
+          const word = textClean.slice(bounds[at], bounds[at + 1]);
+          flat.push({
+            id: `${verse.verse_num}-${tIdx}`,
+            type: 'word',
+            text: word,
+            hint: textFull.slice(bounds[at + 2], bounds[at + 3]) || word,
+            // Only attach verse info to the first word of the verse
+            verseInfo: tIdx === 0 ? verseInfo : undefined
+          });
+        });
+        return;
+      }
+
+      // Split keeping delimiters to preserve whitespace/newlines
       const cleanSegments = textClean.split(/(\s+)/);
       const fullSegments = textFull.split(/(\s+)/);
       
       cleanSegments.forEach((segment, sIdx) => {
         if (!segment) return;
 
-        const isStartOfVerse = sIdx === 0 && verse.chapter && verse.verse;
-
         // Check if it's purely whitespace
         if (/^\s+$/.test(segment)) {
             flat.push({
@@ -55,7 +91,7 @@ export default function TorahView({ aliyah, aliyahName }: TorahViewProps) {
               text: segment,
               hint: fullSegments[sIdx] || segment,
               // Only attach verse info to the first word of the verse
-              verseInfo: isStartOfVerse && sIdx === 0 ? { chapter: verse.chapter!, verse: verse.verse! } : undefined
+              verseInfo: sIdx === 0 ? verseInfo : undefined
             });
         }
       });
@@ -6,12 +6,12 @@ import CombinedView from './CombinedView';
 import { useTorahData } from '../hooks/useTorahData';
 import { useSettings } from '../contexts/SettingsContext';
 import { type Book, type Parasha } from '../types';
+import { fetchData } from '../utils/assetManifest';
 
 const ALIYAH_NAMES = ["ראשון", "שני", "שלישי", "רביעי", "חמישי", "שישי", "שביעי", "מפטיר", "הפטרה"];
 
 const Trainer: React.FC = () => {
   const { parashaId } = useParams<{ parashaId: string }>();
-  const { data, loading, error } = useTorahData(parashaId || '');
   const { nusach, setNusach, stamFont, setStamFont } = useSettings();
   
   // View State
@@ -21,9 +21,11 @@ const Trainer: React.FC = () => {
   
   const [allParashot, setAllParashot] = useState<Parasha[]>([]);
   const [currentAliyahIndex, setCurrentAliyahIndex] = useState(0);
+  // Loads only the shard of the current aliyah (and prefetches its neighbours)
+  const { data, loading, error } = useTorahData(parashaId || '', nusach, currentAliyahIndex);
 
   useEffect(() => {
-    fetch('/data/manifest.json')
+    fetchData('manifest.json')
       .then(res => res.json())
       .then((books: Book[]) => {
         const flattened = books.flatMap(b => b.parashot);
@@ -72,32 +74,17 @@ const Trainer: React.FC = () => {
   }
 
   // Determine active Aliyot array based on Nusach
-  // Logic: Combine Torah Aliyot + Haftarah
+  // Logic: Combine Torah Aliyot + Haftarah. A missing Maftir (source with
+  // only 7 aliyot) is already generated by useTorahData.
   const torahAliyot = (nusach === 'yemenite' && data?.aliyot_yemenite)
     ? data.aliyot_yemenite
     : (data?.aliyot || []);
 
-  // SAFETY NET: Ensure Maftir exists (index 7) if missing in source
-  // If torahAliyot has only 7 items (indices 0-6), duplicate the last 3 verses of the 7th as Maftir.
-  let finalTorahAliyot = [...torahAliyot];
-  if (finalTorahAliyot.length === 7) {
-      const seventh = finalTorahAliyot[6];
-      if (seventh && seventh.verses.length >= 3) {
-          const maftirVerses = seventh.verses.slice(-3);
-          const maftirAliyah = {
-              num: 8,
-              range: "Maftir (Generated)",
-              verses: maftirVerses
-          };
-          finalTorahAliyot.push(maftirAliyah);
-      }
-  }
-
   const haftaraAliyah = (nusach === 'yemenite' && data?.haftara_yemenite)
     ? data.haftara_yemenite
     : data?.haftara;
 
-  const aliyotList = haftaraAliyah ? [...finalTorahAliyot, haftaraAliyah] : finalTorahAliyot;
+  const aliyotList = haftaraAliyah ? [...torahAliyot, haftaraAliyah] : torahAliyot;
 
   const currentAliyah = aliyotList[currentAliyahIndex];
   // Guard against undefined if switching mid-stream
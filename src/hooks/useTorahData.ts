@@ -1,5 +1,10 @@
-import { useState, useEffect } from 'react';
-import type { Aliyah, VerseData } from '../types';
+import { useState, useEffect, useMemo } from 'react';
+import type { Nusach, Verse, VerseData } from '../types';
+import {
+  decodeParasha, decodeShard, getReadings, withGeneratedMaftir, withGeneratedMaftirVerses,
+  type ParashaIndex, type ReadingIndexEntry
+} from '../utils/parashaSchema';
+import { fetchData } from '../utils/assetManifest';
 
 export interface UseTorahDataResult {
   data: VerseData | null;
@@ -7,60 +12,150 @@ export interface UseTorahDataResult {
   error: string | null;
 }
 
-export function useTorahData(parashaId: string): UseTorahDataResult {
-  const [data, setData] = useState<VerseData | null>(null);
-  const [loading, setLoading] = useState<boolean>(true);
+// Shards are immutable per build: keep them for the session, shared by
+// every hook instance, so prefetched and revisited readings are instant.
+const shardCache = new Map<string, Promise<Verse[]>>();
+
+function loadShard(path: string): Promise<Verse[]> {
+  let promise = shardCache.get(path);
+  if (!promise) {
+    promise = fetchJson(path).then(decodeShard);
+    // Let a failed shard be retried on the next visit
+    promise.catch(() => shardCache.delete(path));
+    shardCache.set(path, promise);
+  }
+  return promise;
+}
+
+// Paths are relative to /data and resolved to hashed URLs by fetchData
+function shardPath(parashaId: string, entry: ReadingIndexEntry) {
+  return `parashot/${parashaId}/${entry.shard}`;
+}
+
+async function fetchJson(path: string) {
+  const response = await fetchData(path);
+  if (!response.ok) {
+    throw new Error(`Failed to load /data/${path}`);
+  }
+  return response.json();
+}
+
+/**
+ * Loads a parasha reading by reading: the small per-parasha index first, then
+ * only the shard of the selected aliyah (`aliyahIndex` in the reading list of
+ * `nusach`), prefetching its neighbours in the background. Readings that are
+ * not loaded yet have no verses. Falls back to the whole
+ * /data/parashot/<id>.json when the parasha has no shards. Every file is
+ * fetched through the content-hashed names in /data/assets.json.
+ * A source with only seven aliyot gets a generated Maftir (the seventh's
+ * last verses), so `aliyahIndex` counts the same readings as the page.
+ */
+export function useTorahData(parashaId: string, nusach: Nusach = 'standard', aliyahIndex = 0): UseTorahDataResult {
+  const [index, setIndex] = useState<ParashaIndex | null>(null);
+  const [fullData, setFullData] = useState<VerseData | null>(null);
+  // Loaded shards of this parasha, by path
+  const [shards, setShards] = useState<Record<string, Verse[]>>({});
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    async function fetchData() {
-      setLoading(true);
+    let cancelled = false;
+
+    async function loadParasha() {
+      setIndex(null);
+      setFullData(null);
+      setShards({});
       setError(null);
       try {
-        const response = await fetch(`/data/parashot/${parashaId}.json`);
-        if (!response.ok) {
-          throw new Error(`Failed to load data for ${parashaId}`);
+        let shardIndex: ParashaIndex | null = null;
+        try {
+          shardIndex = await fetchJson(`parashot/${parashaId}/index.json`);
+        } catch {
+          // No shards for this parasha (or an older deploy): load the whole file
         }
-        const jsonData = await response.json();
-        
-        if (jsonData && Array.isArray(jsonData.aliyot)) {
-            setData(jsonData as VerseData);
-        } else if (jsonData && Array.isArray(jsonData.verses)) {
-            // Fallback: create one dummy aliyah for entire content
-            const dummyAliyah: Aliyah = { 
-                num: 1, 
-                range: jsonData.ref || '', 
-                verses: jsonData.verses 
-            };
-            // Ensure other fields exist
-            const fallbackData: VerseData = {
-                id: jsonData.id || parashaId,
-                name: jsonData.name || parashaId,
-                hebrew: jsonData.hebrew || '',
-                ref: jsonData.ref || '',
-                verses: jsonData.verses,
-                aliyot: [dummyAliyah]
-            };
-            setData(fallbackData);
-        } else {
-             throw new Error('Invalid data format');
+
+        if (cancelled) return;
+        if (shardIndex && Array.isArray(shardIndex.aliyot)) {
+          setIndex(withGeneratedMaftir(shardIndex));
+          return;
         }
 
+        const jsonData = await fetchJson(`parashot/${parashaId}.json`).catch(() => {
+          throw new Error(`Failed to load data for ${parashaId}`);
+        });
+        if (!cancelled) setFullData(withGeneratedMaftirVerses(decodeParasha(jsonData, parashaId)));
+
       } catch (err: unknown) {
+        if (cancelled) return;
         if (err instanceof Error) {
            setError(err.message);
         } else {
            setError('An unknown error occurred');
         }
-      } finally {
-        setLoading(false);
       }
     }
 
     if (parashaId) {
-      fetchData();
+      loadParasha();
     }
+    return () => { cancelled = true; };
   }, [parashaId]);
 
+  useEffect(() => {
+    if (!index) return;
+    let cancelled = false;
+
+    const readings = getReadings(index, nusach);
+    const current = Math.min(Math.max(aliyahIndex, 0), readings.length - 1);
+    const load = (entry: ReadingIndexEntry | undefined) => {
+      if (!entry) return Promise.resolve();
+      const path = shardPath(index.id, entry);
+      return loadShard(path).then((verses) => {
+        if (!cancelled) setShards((prev) => (prev[path] ? prev : { ...prev, [path]: verses }));
+      });
+    };
+
+    load(readings[current])
+      .then(() => {
+        // Neighbours next, so Next/Previous does not wait on the network
+        load(readings[current + 1]).catch(() => {});
+        load(readings[current - 1]).catch(() => {});
+      })
+      .catch((err: unknown) => {
+        if (!cancelled) setError(err instanceof Error ? err.message : 'An unknown error occurred');
+      });
+
+    return () => { cancelled = true; };
+  }, [index, nusach, aliyahIndex]);
+
+  const data = useMemo<VerseData | null>(() => {
+    if (fullData) return fullData;
+    if (!index) return null;
+
+    const reading = (entry: ReadingIndexEntry) => ({
+      num: entry.num,
+      range: entry.range,
+      // The last verse_count verses: all of them, or a generated Maftir's tail of the seventh
+      verses: (shards[shardPath(index.id, entry)] || []).slice(-entry.verse_count)
+    });
+    const result: VerseData = {
+      id: index.id,
+      name: index.name,
+      hebrew: index.hebrew,
+      ref: index.ref,
+      verses: [],
+      aliyot: index.aliyot.map(reading)
+    };
+    if (index.aliyot_yemenite) result.aliyot_yemenite = index.aliyot_yemenite.map(reading);
+    if (index.haftara) result.haftara = reading(index.haftara);
+    if (index.haftara_yemenite) result.haftara_yemenite = reading(index.haftara_yemenite);
+    if (index.ref_yemenite !== undefined) result.ref_yemenite = index.ref_yemenite;
+    if (index.is_override !== undefined) result.is_override = index.is_override;
+    return result;
+  }, [index, fullData, shards]);
+
+  // Only the first reading blocks the page; later ones fill in as they arrive
+  const loading = !error && !fullData &&
+    (!index || !Object.keys(shards).some((path) => path.startsWith(`parashot/${index.id}/`)));
+
   return { data, loading, error };
 }
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { type Book } from '../types';
+import { fetchData } from '../utils/assetManifest';
 
 export default function BookView() {
   const { bookId } = useParams<{ bookId: string }>();
@@ -8,7 +9,7 @@ export default function BookView() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetch('/data/manifest.json')
+    fetchData('manifest.json')
       .then((res) => res.json())
       .then((data: Book[]) => {
         const foundBook = data.find(
@@ -1,8 +1,11 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
+import { fetchData } from '../utils/assetManifest';
+import { weeklyReading, type Schedule, type WeeklyReading } from '../utils/schedule';
 
 interface Parasha {
   name: string;
+  hebrew?: string;
   id: string;
   ref: string;
 }
@@ -24,9 +27,10 @@ const BOOK_THEMES: Record<string, { bg: string, text: string, icon: string }> =
 export default function Home() {
   const [books, setBooks] = useState<Book[]>([]);
   const [loading, setLoading] = useState(true);
+  const [thisWeek, setThisWeek] = useState<WeeklyReading | null>(null);
 
   useEffect(() => {
-    fetch('/data/manifest.json')
+    fetchData('manifest.json')
       .then((res) => res.json())
       .then((data) => {
         setBooks(data);
@@ -36,8 +40,16 @@ export default function Home() {
         console.error('Failed to load manifest:', err);
         setLoading(false);
       });
+    // Computed offline by the ETL (hebrew_calendar.py); optional
+    fetchData('schedule.json')
+      .then((res) => (res.ok ? res.json() : null))
+      .then((schedule: Schedule | null) => setThisWeek(schedule && weeklyReading(schedule)))
+      .catch(() => setThisWeek(null));
   }, []);
 
+  const parashaById = new Map(books.flatMap((book) => book.parashot).map((parasha) => [parasha.id, parasha]));
+  const thisWeekParashot = (thisWeek?.parashot ?? []).map((id) => parashaById.get(id)).filter((p): p is Parasha => !!p);
+
   if (loading) {
     return (
       <div className="flex justify-center items-center h-screen text-slate-400">
@@ -51,6 +63,14 @@ export default function Home() {
       <header className="max-w-5xl mx-auto mb-16 text-center">
         <h1 className="text-5xl font-extrabold text-slate-900 mb-4 tracking-tight">מאמן קריאה בתורה</h1>
         <p className="text-lg text-slate-500 font-medium">הכלי המתקדם ללימוד קריאה בנוסח תימן ואשכנז</p>
+        {thisWeekParashot.length > 0 && (
+          <Link
+            to={`/read/${thisWeekParashot[0].id}`}
+            className="inline-block mt-8 px-6 py-3 bg-white rounded-full shadow-sm hover:shadow-md transition-shadow text-slate-700 font-bold"
+          >
+            פרשת השבוע: {thisWeekParashot.map((p) => (p.hebrew || p.name).replace(/^פרשת /, '')).join('-')}
+          </Link>
+        )}
       </header>
 
       <main className="max-w-6xl mx-auto grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-8">
@@ -3,6 +3,11 @@ export type Nusach = 'standard' | 'yemenite';
 export interface VerseVersion {
   text_full: string;
   text_clean: string;
+  // Tikun tokens (see parashaSchema.ts): the text_full word index of each
+  // text_clean word, SETUMA_TOKEN / PETUCHA_TOKEN for the gaps
+  tokens?: number[];
+  // Per word token: [clean start, clean end, full start, full end) offsets
+  bounds?: number[];
 }
 
 export interface Verse {
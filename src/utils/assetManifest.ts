@@ -0,0 +1,41 @@
+// Resolves data files to their content-hashed copies, mirrors asset_manifest.py.
+//
+// /data/assets.json maps every file under /data (by its path there, e.g.
+// "parashot/naso.json") to an immutable copy whose name changes with its
+// content, so those can be cached forever and a new build only costs the
+// files that actually changed. Deploys without assets.json (or files it
+// does not list) load from the plain path.
+
+interface AssetEntry {
+  path: string;
+  size: number;
+}
+
+interface AssetManifest {
+  version: string | null;
+  files: Record<string, AssetEntry>;
+}
+
+let assets: Promise<AssetManifest | null> | null = null;
+
+function loadAssets(): Promise<AssetManifest | null> {
+  if (!assets) {
+    // The one data file that must be revalidated; everything it points to is immutable
+    assets = fetch('/data/assets.json', { cache: 'no-cache' })
+      .then((response) => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  return assets;
+}
+
+/** URL of a data file, e.g. dataUrl('parashot/naso.json'). */
+export async function dataUrl(path: string): Promise<string> {
+  const manifest = await loadAssets();
+  const entry = manifest?.files?.[path];
+  return `/data/${entry ? entry.path : path}`;
+}
+
+/** fetch() of a data file through the manifest. */
+export async function fetchData(path: string): Promise<Response> {
+  return fetch(await dataUrl(path));
+}
@@ -0,0 +1,273 @@
+import type { Aliyah, Nusach, Verse, VerseData, VerseVersion } from '../types';
+
+// Reader for public/data/parashot/<id>.json, mirrors parasha_schema.py.
+//
+// Schema 2 stores every distinct verse once as a row of `verse_table`:
+//   [chapter, verse, standard_full, standard_clean, targum, yemenite_full?, yemenite_clean?]
+// (the Yemenite pair is omitted when it equals the standard one). Aliyot,
+// haftarot and the top-level verse list point into it with half-open
+// [start, end) `spans` and the verse_num of their first verse.
+// Schema 1 files (nested verse objects) and the oldest flat files still load.
+//
+// `verse_tokens` (optional) runs parallel to `verse_table`: per row the
+// Tikun tokens of the standard text, then of the Yemenite pair if the row
+// has one. A token is the index of the text_full word a text_clean word was
+// cleaned from, or SETUMA_TOKEN / PETUCHA_TOKEN; a plain count n stands for
+// [0, 1, ..., n - 1]. See hebrew_normalizer.align_words.
+// `verse_bounds`, in the same shape, locates each token's word: per word
+// (clean start, clean length, full start, full length), starts relative to
+// the previous word's end (hebrew_normalizer.word_bounds). They are made
+// absolute here, so TorahView slices words instead of splitting verses.
+//
+// Shards (<id>/index.json + one file per reading) carry the same rows and
+// their `tokens` and `bounds`, see parasha_schema.build_shards.
+
+export const SCHEMA_VERSION = 2;
+
+export const SETUMA_TOKEN = -1;
+export const PETUCHA_TOKEN = -2;
+
+type VerseRow = [number, number, string, string, string, string?, string?];
+type TokenEntry = number | number[];
+
+interface VerseRefs {
+  verse_num: number;
+  spans: [number, number][];
+}
+
+interface AliyahV2 extends VerseRefs {
+  num: number;
+  range: string;
+}
+
+interface ParashaFileV2 {
+  schema: 2;
+  id: string;
+  name: string;
+  hebrew: string;
+  ref: string;
+  verses: VerseRefs;
+  aliyot: AliyahV2[];
+  aliyot_yemenite?: AliyahV2[];
+  haftara?: AliyahV2;
+  haftara_yemenite?: AliyahV2;
+  ref_yemenite?: string;
+  is_override?: boolean;
+  verse_table: VerseRow[];
+  verse_tokens?: TokenEntry[][];
+  verse_bounds?: number[][][];
+}
+
+export interface ReadingIndexEntry {
+  num: number;
+  range: string;
+  verse_count: number;
+  shard: string;
+}
+
+export interface ParashaIndex {
+  schema: 2;
+  id: string;
+  name: string;
+  hebrew: string;
+  ref: string;
+  aliyot: ReadingIndexEntry[];
+  aliyot_yemenite?: ReadingIndexEntry[];
+  haftara?: ReadingIndexEntry;
+  haftara_yemenite?: ReadingIndexEntry;
+  ref_yemenite?: string;
+  is_override?: boolean;
+}
+
+interface ReadingShard {
+  num: number;
+  range: string;
+  verse_num: number;
+  verses: VerseRow[];
+  tokens?: TokenEntry[][];
+  bounds?: number[][][];
+}
+
+function expandTokens(entry: TokenEntry): number[] {
+  return typeof entry === 'number' ? Array.from({ length: entry }, (_, i) => i) : entry;
+}
+
+// Relative (start, length) pairs -> absolute [start, end) offsets, in place
+function expandBounds(bounds: number[]): number[] {
+  let cleanEnd = 0;
+  let fullEnd = 0;
+  for (let i = 0; i < bounds.length; i += 4) {
+    bounds[i] += cleanEnd;
+    cleanEnd = bounds[i + 1] += bounds[i];
+    bounds[i + 2] += fullEnd;
+    fullEnd = bounds[i + 3] += bounds[i + 2];
+  }
+  return bounds;
+}
+
+function expandRows(rows: VerseRow[], tokens?: TokenEntry[][], bounds?: number[][][]) {
+  // One versions object per row, shared by every reference to that verse
+  return rows.map(([chapter, verse, stdFull, stdClean, targum, yemFull, yemClean], i) => {
+    const standard: VerseVersion = { text_full: stdFull, text_clean: stdClean };
+    const yemenite: VerseVersion = yemFull === undefined
+      ? standard
+      : { text_full: yemFull, text_clean: yemClean ?? '' };
+    if (tokens?.[i] && bounds?.[i]) {
+      standard.tokens = expandTokens(tokens[i][0]);
+      standard.bounds = expandBounds(bounds[i][0]);
+      if (yemenite !== standard && tokens[i][1] !== undefined) {
+        yemenite.tokens = expandTokens(tokens[i][1]);
+        yemenite.bounds = expandBounds(bounds[i][1]);
+      }
+    }
+    return { chapter, verse, targum, versions: { standard, yemenite } };
+  });
+}
+
+type ExpandedRow = ReturnType<typeof expandRows>[number];
+
+function expandSpans(rows: ExpandedRow[], refs: VerseRefs): Verse[] {
+  const verses: Verse[] = [];
+  for (const [start, end] of refs.spans) {
+    for (let i = start; i < end; i++) {
+      const row = rows[i];
+      verses.push({
+        verse_num: refs.verse_num + verses.length,
+        chapter: row.chapter,
+        verse: row.verse,
+        text_full: row.versions.standard.text_full,
+        text_clean: row.versions.standard.text_clean,
+        targum: row.targum,
+        versions: row.versions
+      });
+    }
+  }
+  return verses;
+}
+
+function expandAliyah(rows: ExpandedRow[], aliyah: AliyahV2): Aliyah {
+  return { num: aliyah.num, range: aliyah.range, verses: expandSpans(rows, aliyah) };
+}
+
+function decodeV2(file: ParashaFileV2): VerseData {
+  const rows = expandRows(file.verse_table, file.verse_tokens, file.verse_bounds);
+  const data: VerseData = {
+    id: file.id,
+    name: file.name,
+    hebrew: file.hebrew,
+    ref: file.ref,
+    verses: expandSpans(rows, file.verses),
+    aliyot: file.aliyot.map((a) => expandAliyah(rows, a))
+  };
+  if (file.aliyot_yemenite) data.aliyot_yemenite = file.aliyot_yemenite.map((a) => expandAliyah(rows, a));
+  if (file.haftara) data.haftara = expandAliyah(rows, file.haftara);
+  if (file.haftara_yemenite) data.haftara_yemenite = expandAliyah(rows, file.haftara_yemenite);
+  if (file.ref_yemenite !== undefined) data.ref_yemenite = file.ref_yemenite;
+  if (file.is_override !== undefined) data.is_override = file.is_override;
+  return data;
+}
+
+/** One reading shard -> its verses. */
+export function decodeShard(shard: ReadingShard): Verse[] {
+  const rows = expandRows(shard.verses, shard.tokens, shard.bounds);
+  return expandSpans(rows, { verse_num: shard.verse_num, spans: [[0, rows.length]] });
+}
+
+/**
+ * The readings shown for a nusach, in order: Torah aliyot (Yemenite
+ * breaks when the parasha has them), then the haftara.
+ */
+export function getReadings<T>(
+  lists: { aliyot: T[]; aliyot_yemenite?: T[]; haftara?: T; haftara_yemenite?: T },
+  nusach: Nusach
+): T[] {
+  const torah = (nusach === 'yemenite' && lists.aliyot_yemenite) ? lists.aliyot_yemenite : lists.aliyot;
+  const haftara = (nusach === 'yemenite' && lists.haftara_yemenite) ? lists.haftara_yemenite : lists.haftara;
+  return haftara ? [...torah, haftara] : torah;
+}
+
+// A source with only seven aliyot gets a Maftir: the seventh's last verses, read again
+const GENERATED_MAFTIR_VERSES = 3;
+
+/** "Numbers 7:72-7:89" -> "Numbers 7:87-89" for the last `count` verses, when they share a chapter. */
+function tailRange(range: string, count: number): string {
+  const match = /^(.*) (\d+):(\d+)-(?:(\d+):)?(\d+)$/.exec(range);
+  if (!match) return 'Maftir (Generated)';
+  const chapter = match[4] ?? match[2];
+  const end = Number(match[5]);
+  return end >= count ? `${match[1]} ${chapter}:${end - count + 1}-${end}` : 'Maftir (Generated)';
+}
+
+function withMaftirEntry(aliyot: ReadingIndexEntry[]): ReadingIndexEntry[] {
+  const seventh = aliyot[6];
+  if (aliyot.length !== 7 || seventh.verse_count < GENERATED_MAFTIR_VERSES) return aliyot;
+  // Reads the tail of the seventh's shard, see useTorahData
+  const maftir = {
+    num: 8,
+    range: tailRange(seventh.range, GENERATED_MAFTIR_VERSES),
+    verse_count: GENERATED_MAFTIR_VERSES,
+    shard: seventh.shard
+  };
+  return [...aliyot, maftir];
+}
+
+function withMaftirAliyah(aliyot: Aliyah[]): Aliyah[] {
+  const seventh = aliyot[6];
+  if (aliyot.length !== 7 || seventh.verses.length < GENERATED_MAFTIR_VERSES) return aliyot;
+  const maftir = {
+    num: 8,
+    range: tailRange(seventh.range, GENERATED_MAFTIR_VERSES),
+    verses: seventh.verses.slice(-GENERATED_MAFTIR_VERSES)
+  };
+  return [...aliyot, maftir];
+}
+
+/**
+ * The index with a generated Maftir in each aliyah list that has only
+ * seven, decided from the seventh's verse count so it does not wait for
+ * the seventh's shard.
+ */
+export function withGeneratedMaftir(index: ParashaIndex): ParashaIndex {
+  const result = { ...index, aliyot: withMaftirEntry(index.aliyot) };
+  if (index.aliyot_yemenite) result.aliyot_yemenite = withMaftirEntry(index.aliyot_yemenite);
+  return result;
+}
+
+/** Same for a whole-file parasha, whose verses are all loaded. */
+export function withGeneratedMaftirVerses(data: VerseData): VerseData {
+  const result = { ...data, aliyot: withMaftirAliyah(data.aliyot) };
+  if (data.aliyot_yemenite) result.aliyot_yemenite = withMaftirAliyah(data.aliyot_yemenite);
+  return result;
+}
+
+/** Any on-disk parasha format -> VerseData. Throws on unknown formats. */
+// eslint-disable-next-line @typescript-eslint/no-explicit-any -- raw JSON, shape checked below
+export function decodeParasha(jsonData: any, parashaId: string): VerseData {
+  if (jsonData && jsonData.schema === SCHEMA_VERSION && Array.isArray(jsonData.verse_table)) {
+    return decodeV2(jsonData as ParashaFileV2);
+  }
+
+  if (jsonData && Array.isArray(jsonData.aliyot)) {
+    return jsonData as VerseData;
+  }
+
+  if (jsonData && Array.isArray(jsonData.verses)) {
+    // Fallback: create one dummy aliyah for entire content
+    const dummyAliyah: Aliyah = {
+      num: 1,
+      range: jsonData.ref || '',
+      verses: jsonData.verses
+    };
+    // Ensure other fields exist
+    return {
+      id: jsonData.id || parashaId,
+      name: jsonData.name || parashaId,
+      hebrew: jsonData.hebrew || '',
+      ref: jsonData.ref || '',
+      verses: jsonData.verses,
+      aliyot: [dummyAliyah]
+    };
+  }
+
+  throw new Error('Invalid data format');
+}
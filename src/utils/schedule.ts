@@ -0,0 +1,59 @@
+// "This week's" reading from /data/schedule.json, mirrors hebrew_calendar.py.
+//
+// Each Hebrew year lists its Shabbatot a week apart from first_shabbat, for
+// Israel and the diaspora. An entry is [reading] or [reading, haftara]: the
+// reading is a parasha index, a pair read together, or a holiday key; the
+// haftara a special haftara key, or the parasha index whose haftara is read.
+
+export type ScheduleReading = number | [number, number] | string;
+export type ScheduleEntry = [ScheduleReading] | [ScheduleReading, string | number];
+
+export interface ScheduleYear {
+  first_shabbat: string;
+  israel: ScheduleEntry[];
+  diaspora: ScheduleEntry[];
+}
+
+export interface Schedule {
+  version: number;
+  parashot: string[];
+  haftarot: Record<string, string>;
+  years: Record<string, ScheduleYear>;
+}
+
+export interface WeeklyReading {
+  // ISO date of the Shabbat
+  date: string;
+  // Parasha ids read that Shabbat (two when combined, none on a holiday)
+  parashot: string[];
+  holiday: string | null;
+  // Special haftara key (see schedule.haftarot), or the id of the parasha
+  // whose haftara is read; null for the reading's own
+  haftara: string | null;
+}
+
+const WEEK_MS = 7 * 24 * 60 * 60 * 1000;
+
+export function isInIsrael(): boolean {
+  return Intl.DateTimeFormat().resolvedOptions().timeZone === 'Asia/Jerusalem';
+}
+
+/** The reading of the Shabbat on or after `date`, or null outside the table. */
+export function weeklyReading(schedule: Schedule, date = new Date(), israel = isInIsrael()): WeeklyReading | null {
+  // Local calendar day as UTC midnight, like the ISO dates in the table
+  const saturday = Date.UTC(date.getFullYear(), date.getMonth(), date.getDate() + ((6 - date.getDay() + 7) % 7));
+  for (const year of Object.values(schedule.years)) {
+    const entries = israel ? year.israel : year.diaspora;
+    const index = Math.round((saturday - Date.parse(year.first_shabbat)) / WEEK_MS);
+    if (index < 0 || index >= entries.length) continue;
+
+    const [reading, haftara] = entries[index];
+    return {
+      date: new Date(saturday).toISOString().slice(0, 10),
+      parashot: typeof reading === 'string' ? [] : [reading].flat().map((i) => schedule.parashot[i]),
+      holiday: typeof reading === 'string' ? reading : null,
+      haftara: haftara === undefined ? null : typeof haftara === 'number' ? schedule.parashot[haftara] : haftara,
+    };
+  }
+  return null;
+}
@@ -1,23 +1,251 @@
+"""
+Golden-output and throughput checks for the ETL text cleaners.
+
+Golden pairs come from the committed public/data/parashot/*.json files
+(read through parasha_schema): every verse version stores `text_full`
+(output of clean_html_and_spaces) and `text_clean` (clean_text applied to
+it), so the current cleaners must reproduce them byte for byte.
+
+Throughput is compared against the reference_* functions below, a copy of the
+original regex chain timed in the same process. The speedup ratio does not
+depend on the machine, so it can be checked against a committed baseline.
+
+    python -m pytest -q test_clean.py      # golden + fuzz equivalence gate
+    TEST_CLEAN_THROUGHPUT=1 python -m pytest -q test_clean.py   # + throughput gate
+    python test_clean.py                   # all checks, with a timing report
+    python test_clean.py --update-baseline # after an intended speed change
+
+Wall-clock timings swing on a loaded machine, so the throughput check is
+opt-in under pytest; the equivalence tests are the gate.
+"""
+import os
 import re
+import sys
+import glob
 import html
+import json
+import time
+import random
+import argparse
+import pytest
+import parasha_schema
+from etl_pipeline import clean_text, clean_html_and_spaces
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARASHOT_DIR = os.path.join(BASE_DIR, "public", "data", "parashot")
+BASELINE_FILE = os.path.join(BASE_DIR, "test_clean_baseline.json")
+
+# Fail when a cleaner's speedup over the reference chain drops by more than this
+THROUGHPUT_TOLERANCE = 0.25
+# Best-of-N timing runs, to keep scheduler noise out of the numbers
+BENCH_REPEAT = 3
+FUZZ_CASES = 20000
+# Set (to anything) to run test_throughput under pytest
+THROUGHPUT_ENV = "TEST_CLEAN_THROUGHPUT"
+
 
-def clean_html_and_spaces(text):
+# --- Reference implementation (original regex chain, do not optimize) ---
+
+def reference_clean_text(text):
+    if not text: return ""
+    text = re.sub(r'(?:[\{\(\[]\s*פ\s*[\}\)\]]|(?<!\S)פ(?!\S))', ' __PE_MARKER__ ', text)
+    text = re.sub(r'(?:[\{\(\[]\s*ס\s*[\}\)\]]|(?<!\S)ס(?!\S))', ' __SAMEKH_MARKER__ ', text)
+    text = re.sub(r'[\u0591-\u05AF\u05B0-\u05BD\u05BF\u05C0\u05C1-\u05C2\u05C4-\u05C5\u05C7]', '', text)
+    text = re.sub(r'[:\.\u05C3]', '', text)
+    text = re.sub(r'[(){}\[\]]', '', text)
+    text = ' '.join(text.split())
+    text = text.replace(' __PE_MARKER__ ', '\n')
+    text = text.replace('__PE_MARKER__', '\n')
+    text = text.replace(' __SAMEKH_MARKER__ ', '         ')
+    text = text.replace('__SAMEKH_MARKER__', '         ')
+    return text
+
+
+def reference_clean_html_and_spaces(text):
+    if not text: return ""
     text = html.unescape(text)
-    text = re.sub(r'<[^>]+>', ' ', text) # Replace tags with space instead of empty string
+    text = re.sub(r'<[^>]+>', '', text)
     text = text.replace('\xa0', ' ').replace('\u2009', ' ')
     return ' '.join(text.split())
 
-def clean_text(text):
-    # Remove cantillation (trope)
-    text = re.sub(r'[\u0591-\u05AF]', '', text)
-    # Remove vowels (niqqud) - KEEP 05BE (Maqaf)
-    text = re.sub(r'[\u05B0-\u05BD\u05BF\u05C1-\u05C2\u05C4-\u05C5\u05C7]', '', text)
-    return text
 
-sample = "בְּרֵאשִׁ֖ית בָּרָ֣א אֱלֹהִ֑ים אֵ֥ת הַשָּׁמַ֖יִם וְאֵ֥ת הָאָֽרֶץ׃"
-cleaned = clean_html_and_spaces(sample)
-stripped = clean_text(cleaned)
+# --- Golden data ---
+
+_golden = None
+
+
+def load_golden_pairs():
+    """(label, text_full, text_clean) for every committed verse version."""
+    global _golden
+    if _golden is not None:
+        return _golden
+
+    pairs = []
+    for filepath in sorted(glob.glob(os.path.join(PARASHOT_DIR, "*.json"))):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = parasha_schema.load(f)
+        for verse in data.get('verses', []):
+            # Files from the first ETL version have no `versions`; skip them
+            for nusach, version in verse.get('versions', {}).items():
+                if 'text_full' not in version:
+                    continue
+                label = f"{data['id']} {verse['chapter']}:{verse['verse']} ({nusach})"
+                pairs.append((label, version['text_full'], version.get('text_clean')))
+    _golden = pairs
+    return pairs
+
+
+def fuzz_strings(count=FUZZ_CASES, seed=1):
+    """Short random strings dense in markers, brackets, niqqud and entities."""
+    alphabet = [
+        'פ', 'ס', 'א', 'ב', '{', '}', '(', ')', '[', ']', ' ', '  ', '\xa0', '\u2009',
+        '\n', '\u05B0', '\u0591', '\u05BE', '\u05C3', ':', '.', '&lt;', '&amp;',
+        '&thinsp;', '<b>', '</b>', 'x'
+    ]
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))) for _ in range(count)]
+
+
+# --- Benchmark ---
+
+def bench(fn, texts, repeat=BENCH_REPEAT):
+    """Best wall time of `repeat` passes -> (verses/sec, µs/verse)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(texts) / best, best / len(texts) * 1e6
+
+
+def run_benchmarks(repeat=BENCH_REPEAT):
+    pairs = load_golden_pairs()
+    fulls = [full for _, full, _ in pairs]
+    cleans_input = [full for _, full, clean in pairs if clean is not None]
+
+    results = {}
+    for name, current, reference, texts in (
+        ("clean_html_and_spaces", clean_html_and_spaces, reference_clean_html_and_spaces, fulls),
+        ("clean_text", clean_text, reference_clean_text, cleans_input),
+    ):
+        vps, us = bench(current, texts, repeat)
+        ref_vps, ref_us = bench(reference, texts, repeat)
+        results[name] = {
+            "verses": len(texts),
+            "verses_per_sec": round(vps),
+            "us_per_verse": round(us, 2),
+            "reference_us_per_verse": round(ref_us, 2),
+            "speedup": round(vps / ref_vps, 3)
+        }
+    return results
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def throughput_regressions(results, baseline):
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name, {}).get("speedup")
+        if expected is None:
+            continue
+        floor = expected * (1 - THROUGHPUT_TOLERANCE)
+        if result["speedup"] < floor:
+            failures.append(
+                f"{name}: {result['speedup']:.2f}x vs reference, baseline {expected:.2f}x (floor {floor:.2f}x)"
+            )
+    return failures
+
+
+# --- Tests ---
+
+def test_golden_pairs_present():
+    assert len(load_golden_pairs()) > 10000
+
+
+def test_clean_html_and_spaces_golden():
+    # text_full is already clean_html_and_spaces output: must be a fixed point
+    drift = [label for label, full, _ in load_golden_pairs() if clean_html_and_spaces(full) != full]
+    assert not drift, f"{len(drift)} verses drifted, e.g. {drift[:5]}"
+
+
+def test_clean_text_golden():
+    drift = [
+        label for label, full, clean in load_golden_pairs()
+        if clean is not None and clean_text(full) != clean
+    ]
+    assert not drift, f"{len(drift)} verses drifted, e.g. {drift[:5]}"
+
+
+def test_cleaners_match_reference_on_fuzz():
+    for text in fuzz_strings():
+        assert clean_html_and_spaces(text) == reference_clean_html_and_spaces(text), repr(text)
+        assert clean_text(text) == reference_clean_text(text), repr(text)
+
+
+def test_empty_input():
+    assert clean_text("") == ""
+    assert clean_text(None) == ""
+    assert clean_html_and_spaces("") == ""
+
+
+@pytest.mark.skipif(not os.environ.get(THROUGHPUT_ENV), reason=f"timing check, opt in with {THROUGHPUT_ENV}=1")
+def test_throughput():
+    failures = throughput_regressions(run_benchmarks(), load_baseline())
+    assert not failures, "Throughput regression: " + "; ".join(failures)
+
+
+# --- CLI ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Golden check and benchmark for the text cleaners.")
+    parser.add_argument("--repeat", type=int, default=BENCH_REPEAT,
+                        help=f"Timing passes per cleaner, best one counts (default {BENCH_REPEAT})")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"Write the measured speedups to {os.path.basename(BASELINE_FILE)}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    pairs = load_golden_pairs()
+    print(f"Golden pairs: {len(pairs)} verse versions")
+    failed = False
+    for test in (test_clean_html_and_spaces_golden, test_clean_text_golden, test_cleaners_match_reference_on_fuzz):
+        try:
+            test()
+            print(f"  PASS {test.__name__}")
+        except AssertionError as e:
+            failed = True
+            print(f"  FAIL {test.__name__}: {e}")
+
+    results = run_benchmarks(args.repeat)
+    print(f"\n{'cleaner':<24}{'verses/sec':>12}{'µs/verse':>10}{'reference':>11}{'speedup':>9}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['verses_per_sec']:>12,}{r['us_per_verse']:>10.2f}"
+              f"{r['reference_us_per_verse']:>11.2f}{r['speedup']:>8.2f}x")
+
+    if args.update_baseline:
+        baseline = {name: {"speedup": r["speedup"]} for name, r in results.items()}
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {BASELINE_FILE}")
+    else:
+        for failure in throughput_regressions(results, load_baseline()):
+            failed = True
+            print(f"  FAIL throughput: {failure}")
+
+    return 1 if failed else 0
+
 
-print(f"Original: {sample}")
-print(f"Cleaned:  {stripped}")
-print(f"Hex:      {[hex(ord(c)) for c in stripped]}")
+if __name__ == "__main__":
+    sys.exit(main())
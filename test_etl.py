@@ -0,0 +1,95 @@
+"""
+End-to-end checks of `etl_pipeline.py` against recorded Sefaria responses.
+
+Each test copies the ETL into a temporary tree (its paths are relative to
+the script), seeds a live public/data there and runs the pipeline as a
+script, as a deploy does, against an in-process sefaria_fixtures server.
+Skipped without fixtures; record them once with:
+
+    python sefaria_fixtures.py import-cache
+    python sefaria_fixtures.py serve --record https://www.sefaria.org   # + one ETL run through it
+
+    python -m pytest -q test_etl.py
+"""
+import os
+import sys
+import glob
+import json
+import shutil
+import subprocess
+import pytest
+import sefaria_fixtures
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# A parasha whose responses (book indexes, text, targum, haftarot) are in the fixtures
+PARASHA = "naso"
+STALE = {"id": PARASHA, "stale": True}
+ETL_TIMEOUT = 300
+
+
+@pytest.fixture(scope="module")
+def server():
+    if not glob.glob(os.path.join(sefaria_fixtures.DEFAULT_FIXTURE_DIR, "*", "*.json")):
+        pytest.skip(f"no fixtures in {sefaria_fixtures.DEFAULT_FIXTURE_DIR}")
+    server = sefaria_fixtures.start()
+    yield server
+    server.shutdown()
+
+
+def make_tree(root):
+    """The ETL scripts and inputs under `root`, with a stale live copy of PARASHA."""
+    for path in glob.glob(os.path.join(BASE_DIR, "*.py")):
+        shutil.copy(path, root)
+    shutil.copytree(os.path.join(BASE_DIR, "data"), os.path.join(root, "data"))
+    live = os.path.join(root, "public", "data")
+    os.makedirs(os.path.join(live, "parashot"))
+    shutil.copy(os.path.join(BASE_DIR, "public", "data", "manifest.json"), live)
+    write_json(os.path.join(live, "parashot", f"{PARASHA}.json"), STALE)
+    return live
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_etl(root, server, *args):
+    command = [sys.executable, "etl_pipeline.py", "--api-base", server.api_base, "--no-cache", "--force",
+               "--only", PARASHA, "--transform-workers", "0", *args]
+    return subprocess.run(command, cwd=root, capture_output=True, text=True, timeout=ETL_TIMEOUT)
+
+
+def test_async_engine_publishes(tmp_path, server):
+    pytest.importorskip("aiohttp")
+    live = make_tree(str(tmp_path))
+    served = server.stats()["served"]
+
+    result = run_etl(str(tmp_path), server, "--engine", "async", "--schema", "1", "--byte-budget", "0")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    # --api-base reached the engine, and the rebuilt parasha is in the published tree
+    assert server.stats()["served"] > served
+    data = read_json(os.path.join(live, "parashot", f"{PARASHA}.json"))
+    assert data != STALE
+    assert data["id"] == PARASHA
+    # --schema 1 too: nested verse objects, no verse table
+    assert "verse_table" not in data
+    assert read_json(os.path.join(live, "release.json"))["version"]
+
+
+def test_over_budget_is_not_published(tmp_path, server):
+    live = make_tree(str(tmp_path))
+    # Shards are checked too, and without precompression
+    result = run_etl(str(tmp_path), server, "--byte-budget", "1000", "--no-compress")
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert f"Over budget: {PARASHA}/" in result.stdout
+    assert "not published" in result.stdout
+    # The stale file is still live, nothing was released and no staging dir is left
+    assert read_json(os.path.join(live, "parashot", f"{PARASHA}.json")) == STALE
+    assert not os.path.exists(os.path.join(live, "release.json"))
+    assert not glob.glob(os.path.join(str(tmp_path), "build", "releases", "*.staging"))
@@ -0,0 +1,332 @@
+"""
+Columnar binary verse store, an alternative output for analytics/search.
+
+One file per parasha (<id>.tvs), read through mmap without decoding JSON:
+
+    magic "TVS1" | u32 header length | header JSON | sections (8-byte aligned)
+
+The header holds the parasha metadata, the readings (aliyot, Maftir,
+Yemenite aliyot, haftarot: name, range, first verse_num, span range) and
+the offset/length/typecode of every section. Sections:
+
+  chapter, verse            int32 per row (one row per distinct verse)
+  standard_full ... targum  uint32 string ids per row (see TEXT_COLUMNS)
+  string_offsets            uint32, len(strings) + 1
+  string_data               utf-8 bytes of the interned strings
+  span_start, span_end      uint32 half-open row ranges
+  reading_spans             uint32, len(readings) + 1: span range per reading
+
+Identical strings are stored once, so an unchanged Yemenite text costs
+nothing. Rows and spans come from parasha_schema.encode (schema 2).
+
+    python verse_store.py public/data/parashot/*.json   # build into STORE_DIR
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import argparse
+import parasha_schema
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "build", "verse_store")
+STORE_EXT = ".tvs"
+
+MAGIC = b"TVS1"
+FORMAT_VERSION = 1
+ALIGN = 8
+
+INT_COLUMNS = ["chapter", "verse"]
+TEXT_COLUMNS = ["standard_full", "standard_clean", "yemenite_full", "yemenite_clean", "targum"]
+# Reading lists in the order they appear in the header
+READING_LISTS = parasha_schema.ALIYAH_LISTS + parasha_schema.SINGLE_ALIYOT + ("verses",)
+
+
+def store_path(parasha_id, directory=STORE_DIR):
+    return os.path.join(directory, f"{parasha_id}{STORE_EXT}")
+
+
+# --- Writing ---
+
+class StringPool:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def sections(self):
+        offsets = array.array('I', [0])
+        data = bytearray()
+        for text in self.strings:
+            data += text.encode('utf-8')
+            offsets.append(len(data))
+        return offsets, bytes(data)
+
+
+def build_sections(data):
+    """Schema 1 parasha dict -> (header metadata, {section name: array/bytes})."""
+    encoded = parasha_schema.encode(data)
+    pool = StringPool()
+    columns = {name: array.array('i') for name in INT_COLUMNS}
+    columns.update({name: array.array('I') for name in TEXT_COLUMNS})
+
+    for row in encoded['verse_table']:
+        chapter, verse, std_full, std_clean, targum = row[:5]
+        yem_full, yem_clean = row[5:7] if len(row) > 5 else (std_full, std_clean)
+        columns['chapter'].append(chapter)
+        columns['verse'].append(verse)
+        for name, text in zip(TEXT_COLUMNS, (std_full, std_clean, yem_full, yem_clean, targum)):
+            columns[name].append(pool.intern(text))
+
+    span_start = array.array('I')
+    span_end = array.array('I')
+    reading_spans = array.array('I', [0])
+    readings = []
+
+    def add_reading(list_name, entry):
+        for start, end in entry['spans']:
+            span_start.append(start)
+            span_end.append(end)
+        reading_spans.append(len(span_start))
+        meta = {key: value for key, value in entry.items() if key != 'spans'}
+        meta['list'] = list_name
+        readings.append(meta)
+
+    for list_name in READING_LISTS:
+        value = encoded.get(list_name)
+        if value is None:
+            continue
+        for entry in (value if isinstance(value, list) else [value]):
+            add_reading(list_name, entry)
+
+    string_offsets, string_data = pool.sections()
+    sections = dict(columns)
+    sections.update({
+        "string_offsets": string_offsets,
+        "string_data": string_data,
+        "span_start": span_start,
+        "span_end": span_end,
+        "reading_spans": reading_spans
+    })
+
+    header = {
+        "format": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "parasha": {key: value for key, value in encoded.items()
+                    if key not in READING_LISTS and key not in ('schema', 'verse_fields', 'verse_table', 'verse_tokens', 'verse_bounds')},
+        "rows": len(encoded['verse_table']),
+        "strings": len(pool.strings),
+        "readings": readings
+    }
+    return header, sections
+
+
+def write_store(data, path):
+    """Writes a schema 1 parasha dict as a columnar store at `path` (atomically)."""
+    header, sections = build_sections(data)
+
+    # Section offsets depend on the header length, which depends on the
+    # offsets: lay out relative to the data start, then shift once.
+    layout = {}
+    position = 0
+    for name, payload in sections.items():
+        raw = payload.tobytes() if isinstance(payload, array.array) else payload
+        typecode = payload.typecode if isinstance(payload, array.array) else 'B'
+        position += -position % ALIGN
+        layout[name] = (position, raw, typecode)
+        position += len(raw)
+
+    def header_bytes(base):
+        header['sections'] = {
+            name: {"offset": base + offset, "length": len(raw), "type": typecode}
+            for name, (offset, raw, typecode) in layout.items()
+        }
+        return json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    base = 0
+    while True:
+        encoded_header = header_bytes(base)
+        start = len(MAGIC) + 4 + len(encoded_header)
+        start += -start % ALIGN
+        if start == base:
+            break
+        base = start
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(encoded_header)))
+        f.write(encoded_header)
+        for name, (offset, raw, _) in layout.items():
+            f.seek(base + offset)
+            f.write(raw)
+    os.replace(tmp_path, path)
+    return path
+
+
+# --- Reading ---
+
+class VerseStore:
+    """
+    Read-only view of one .tvs file. Integer columns are memoryviews over
+    the mapped file (no copy); texts are decoded on access.
+
+        with VerseStore(path) as store:
+            for row in store.reading_rows("aliyot", 3):
+                print(store.chapter[row], store.verse[row], store.text("targum", row))
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        if self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a verse store: {path}")
+        (header_length,) = struct.unpack_from('<I', self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._view[header_start:header_start + header_length]))
+        if self.header['format'] != FORMAT_VERSION or self.header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"Unsupported verse store format or byte order: {path}")
+
+        self.parasha = self.header['parasha']
+        self.readings = self.header['readings']
+        self._columns = {
+            name: self._section(name) for name in self.header['sections']
+        }
+        for name in INT_COLUMNS:
+            setattr(self, name, self._columns[name])
+        self._string_offsets = self._columns['string_offsets']
+        self._string_data = self._columns['string_data']
+
+    def _section(self, name):
+        spec = self.header['sections'][name]
+        view = self._view[spec['offset']:spec['offset'] + spec['length']]
+        return view if spec['type'] == 'B' else view.cast(spec['type'])
+
+    def __len__(self):
+        return self.header['rows']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Views must be released before the map can close
+        for attr in ('_columns', '_string_offsets', '_string_data'):
+            value = getattr(self, attr, None)
+            for view in (value.values() if isinstance(value, dict) else [value]):
+                if isinstance(view, memoryview):
+                    view.release()
+        for name in INT_COLUMNS:
+            if hasattr(self, name):
+                delattr(self, name)
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        if getattr(self, '_file', None) is not None:
+            self._file.close()
+            self._file = None
+
+    def string(self, string_id):
+        start = self._string_offsets[string_id]
+        end = self._string_offsets[string_id + 1]
+        return str(self._string_data[start:end], 'utf-8')
+
+    def string_ids(self, column):
+        """Zero-copy uint32 view of a text column (ids into the string pool)."""
+        return self._columns[column]
+
+    def text(self, column, row):
+        return self.string(self._columns[column][row])
+
+    def find_reading(self, list_name, num=None):
+        """Position of a reading in self.readings; `num` picks an aliyah."""
+        for position, reading in enumerate(self.readings):
+            if reading['list'] == list_name and (num is None or reading.get('num') == num):
+                return position
+        raise KeyError(f"No reading {list_name} {num or ''} in {self.parasha.get('id')}")
+
+    def rows_at(self, position):
+        """Row numbers of self.readings[position], in order."""
+        spans = self._columns['reading_spans']
+        starts = self._columns['span_start']
+        ends = self._columns['span_end']
+        rows = []
+        for span in range(spans[position], spans[position + 1]):
+            rows.extend(range(starts[span], ends[span]))
+        return rows
+
+    def reading_rows(self, list_name, num=None):
+        """Row numbers of a reading, in order (e.g. reading_rows("aliyot", 8) = Maftir)."""
+        return self.rows_at(self.find_reading(list_name, num))
+
+    def verse_object(self, row, verse_num):
+        texts = [self.text(column, row) for column in TEXT_COLUMNS]
+        return parasha_schema.make_verse_object(
+            verse_num, [self.chapter[row], self.verse[row], texts[0], texts[1], texts[4], texts[2], texts[3]]
+        )
+
+    def to_parasha(self):
+        """Rebuilds the schema 1 parasha dict (for checks and conversions)."""
+        result = dict(self.parasha)
+        for position, reading in enumerate(self.readings):
+            list_name = reading['list']
+            rows = self.rows_at(position)
+            verses = [self.verse_object(row, reading['verse_num'] + i) for i, row in enumerate(rows)]
+            if list_name == 'verses':
+                result['verses'] = verses
+                continue
+            entry = {key: value for key, value in reading.items() if key not in ('list', 'verse_num')}
+            entry['verses'] = verses
+            if list_name in parasha_schema.ALIYAH_LISTS:
+                result.setdefault(list_name, []).append(entry)
+            else:
+                result[list_name] = entry
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build columnar verse stores from parasha JSON files.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--out", default=STORE_DIR, help="Output directory (default: %(default)s)")
+    parser.add_argument("--check", action="store_true", help="Verify every store round-trips to the JSON")
+    args = parser.parse_args(argv)
+
+    total_json = total_store = 0
+    for filepath in args.files:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = parasha_schema.load(f)
+        if not isinstance(data.get('aliyot'), list):
+            print(f"  Skipped (unsupported format): {filepath}")
+            continue
+        path = write_store(data, store_path(data['id'], args.out))
+        total_json += os.path.getsize(filepath)
+        total_store += os.path.getsize(path)
+        if args.check:
+            with VerseStore(path) as store:
+                if store.to_parasha() != data:
+                    raise ValueError(f"Round trip mismatch for {filepath}")
+    print(f"{len(args.files)} files: {total_json:,} bytes of JSON -> {total_store:,} bytes in {args.out}")
+
+
+if __name__ == "__main__":
+    main()